@@ -0,0 +1,149 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+from dedup_index import text_hash
+
+DEFAULT_EVENT_LOG = "data/answer_events.jsonl"
+QUEUE_SIZE = 10_000  # Events waiting to be written; more are dropped rather than blocking a game
+BATCH_SIZE = 1000  # The most events written with one write()
+
+_STOP = object()
+
+
+class EventLog(threading.Thread):
+    def __init__(self, path=DEFAULT_EVENT_LOG, queue_size=QUEUE_SIZE):
+        """
+        Initializes an append-only log of answer events, written by a background thread.
+
+        Games only put a tuple on a bounded queue (see record()); building the JSON lines and writing them
+        happens on this thread, in batches of one write() each. The file is opened in append mode, so several
+        processes (e.g. prefork server workers) can share one log. If the writer falls behind by queue_size
+        events, new events are dropped and counted in self.dropped instead of slowing the game down.
+
+        Each line is a JSON object with the keys:
+            time (float): When the answer was given, in seconds since the epoch.
+            question (int): The hash of the question and its answer (see dedup_index.text_hash), stable across
+                re-imports.
+            difficulty (str): The question's difficulty label.
+            correct (bool): Whether the answer was correct.
+            distractor (int): The index of the chosen wrong answer in the question's incorrect_answers, or -1.
+            distractors (int): The number of the question's incorrect_answers.
+            latency_ms (int): How long the player took to answer, or null if unknown.
+            player (str): The player's name, or null.
+
+        Parameters:
+            path (str): The file path of the JSONL log.
+            queue_size (int): The number of events that may wait to be written.
+        """
+        super().__init__(name="answer-events", daemon=True)
+        self.path = path
+        self.dropped = 0
+        self._queue = queue.Queue(queue_size)
+
+    def record(self, question, chosen, correct, latency=None, player=None):
+        """
+        Queues an answer event. Never blocks.
+
+        Parameters:
+            question (Question): The answered question.
+            chosen (str): The chosen answer.
+            correct (bool): Whether the answer was correct.
+            latency (float, optional): The number of seconds the player took to answer.
+            player (str, optional): The name of the player.
+        """
+        try:
+            self._queue.put_nowait((time.time(), question, chosen, correct, latency, player))
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        """
+        Writes the queued events and stops the writer thread.
+        """
+        self._queue.put(_STOP)
+        self.join()
+
+    def run(self):
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            stopping = False
+            while not stopping:
+                batch = [self._queue.get()]
+                while len(batch) < BATCH_SIZE:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if batch[-1] is _STOP:
+                    batch.pop()
+                    stopping = True
+                try:
+                    os.write(fd, "".join(_to_line(event) for event in batch).encode("utf-8"))
+                except OSError as e:
+                    logging.error(f"Could not write {len(batch)} answer events: {e}")
+        finally:
+            os.close(fd)
+
+
+def _to_line(event):
+    answered_at, question, chosen, correct, latency, player = event
+    distractor = -1
+    if not correct and chosen in question.incorrect_answers:
+        distractor = question.incorrect_answers.index(chosen)
+    return json.dumps({
+        "time": round(answered_at, 3),
+        "question": text_hash(question.question, question.correct_answer),
+        "difficulty": question.difficulty,
+        "correct": correct,
+        "distractor": distractor,
+        "distractors": len(question.incorrect_answers),
+        "latency_ms": None if latency is None else round(latency * 1000),
+        "player": player,
+    }) + "\n"
+
+
+_event_log = None
+
+
+def start_event_log(path=None):
+    """
+    Starts the shared answer event log, unless QUIZ_EVENT_LOG is set to "off".
+
+    Parameters:
+        path (str, optional): The file path of the log. Defaults to QUIZ_EVENT_LOG, or data/answer_events.jsonl.
+
+    Returns:
+        EventLog: The running log, or None if it is turned off.
+    """
+    global _event_log
+    path = path or os.environ.get("QUIZ_EVENT_LOG", DEFAULT_EVENT_LOG)
+    if _event_log is None and path.lower() != "off":
+        _event_log = EventLog(path)
+        _event_log.start()
+    return _event_log
+
+
+def get_event_log():
+    """
+    Returns the shared answer event log, or None if it was not started.
+    """
+    return _event_log
+
+
+def stop_event_log():
+    """
+    Writes the queued events of the shared log and stops it.
+    """
+    global _event_log
+    if _event_log is not None:
+        _event_log.close()
+        if _event_log.dropped:
+            logging.warning(f"{_event_log.dropped} answer events were dropped")
+        _event_log = None
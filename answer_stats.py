@@ -0,0 +1,194 @@
+import argparse
+import json
+
+import numpy as np
+
+from answer_events import DEFAULT_EVENT_LOG
+
+# Upper edges (in milliseconds) of the answer time histogram bins; the last bin holds every slower answer
+LATENCY_EDGES_MS = np.array([1000, 2000, 3000, 5000, 8000, 13000, 21000, 34000])
+MAX_DISTRACTORS = 3  # Multiple choice questions have three wrong answers
+READ_BATCH = 10_000  # Events parsed per batch when reading a log
+
+
+class AnswerStats:
+    def __init__(self, capacity=1024):
+        """
+        Initializes per-question answer statistics, kept in NumPy arrays with one row per question.
+
+        Questions are identified by the text hash in the answer events (see answer_events.py) and get a row the
+        first time they are seen. Events are added in batches, each one a handful of vectorized updates, so a
+        log of millions of answers is aggregated in seconds.
+
+        Attributes:
+            answers (ndarray): The number of answers per question.
+            correct (ndarray): The number of correct answers per question.
+            latency (ndarray): Answer time histogram per question, one column per bin of LATENCY_EDGES_MS.
+            distractors (ndarray): How often each wrong answer was chosen, by index in incorrect_answers.
+            options (ndarray): The number of wrong answers per question. Logs written before events recorded it
+                only tell how many wrong answers were ever chosen, so it is at least that.
+
+        Parameters:
+            capacity (int): The number of rows to allocate up front. The arrays double when they are full.
+        """
+        self._rows = {}
+        self.hashes = np.zeros(capacity, dtype=np.int64)
+        self.answers = np.zeros(capacity, dtype=np.int64)
+        self.correct = np.zeros(capacity, dtype=np.int64)
+        self.latency = np.zeros((capacity, len(LATENCY_EDGES_MS) + 1), dtype=np.int64)
+        self.distractors = np.zeros((capacity, MAX_DISTRACTORS), dtype=np.int64)
+        self.options = np.zeros(capacity, dtype=np.int64)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _grow(self, capacity):
+        for name in ("hashes", "answers", "correct", "latency", "distractors", "options"):
+            array = getattr(self, name)
+            grown = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+            grown[:len(array)] = array
+            setattr(self, name, grown)
+
+    def _row_numbers(self, hashes):
+        rows = self._rows
+        numbers = np.empty(len(hashes), dtype=np.int64)
+        for i, question_hash in enumerate(hashes):
+            row = rows.get(question_hash)
+            if row is None:
+                row = rows[question_hash] = len(rows)
+                if row == len(self.answers):
+                    self._grow(2 * row)
+                self.hashes[row] = question_hash
+            numbers[i] = row
+        return numbers
+
+    def add(self, events):
+        """
+        Adds a batch of answer events.
+
+        Parameters:
+            events (list): Event dictionaries, as written by answer_events.EventLog.
+        """
+        if not events:
+            return
+        rows = self._row_numbers([event["question"] for event in events])
+        correct = np.fromiter((event["correct"] for event in events), dtype=bool, count=len(events))
+        latency = np.fromiter((-1 if event.get("latency_ms") is None else event["latency_ms"] for event in events),
+                              dtype=np.int64, count=len(events))
+        distractor = np.fromiter((event.get("distractor", -1) for event in events), dtype=np.int64,
+                                 count=len(events))
+        options = np.fromiter((event.get("distractors", -1) for event in events), dtype=np.int64,
+                              count=len(events))
+
+        np.add.at(self.answers, rows, 1)
+        np.add.at(self.correct, rows[correct], 1)
+        timed = latency >= 0
+        np.add.at(self.latency, (rows[timed], np.searchsorted(LATENCY_EDGES_MS, latency[timed], side="right")), 1)
+        chosen = (distractor >= 0) & (distractor < MAX_DISTRACTORS)
+        np.add.at(self.distractors, (rows[chosen], distractor[chosen]), 1)
+        # Without a recorded count, a question has at least as many wrong answers as the highest one chosen
+        np.maximum.at(self.options, rows, np.where(options >= 0, options, distractor + 1))
+
+    @classmethod
+    def from_log(cls, path=DEFAULT_EVENT_LOG):
+        """
+        Aggregates an answer event log, reading it in batches of READ_BATCH lines.
+        """
+        stats = cls()
+        batch = []
+        with open(path, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    batch.append(json.loads(line))
+                except ValueError:
+                    continue  # A line cut short by a crash
+                if len(batch) == READ_BATCH:
+                    stats.add(batch)
+                    batch = []
+        stats.add(batch)
+        return stats
+
+    def correct_rates(self):
+        """
+        Returns the share of correct answers per row, NaN for questions without answers.
+        """
+        n = len(self)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.correct[:n] / self.answers[:n]
+
+    def median_latency_ms(self):
+        """
+        Returns the upper edge of the histogram bin holding the median answer time per row (inf for the last
+        bin, NaN for questions without timed answers).
+        """
+        n = len(self)
+        counts = self.latency[:n]
+        totals = counts.sum(axis=1)
+        cumulative = counts.cumsum(axis=1)
+        bins = (cumulative < (totals[:, None] + 1) // 2).sum(axis=1)
+        edges = np.append(LATENCY_EDGES_MS, np.inf).astype(float)
+        medians = edges[np.minimum(bins, len(edges) - 1)]
+        medians[totals == 0] = np.nan
+        return medians
+
+    def flagged(self, min_answers=30, too_easy=0.95, too_hard=0.1, dead_distractor=0.02):
+        """
+        Returns the questions whose answers suggest they need attention.
+
+        Parameters:
+            min_answers (int): Questions with fewer answers are not judged yet.
+            too_easy (float): Flag questions answered correctly at least this often.
+            too_hard (float): Flag questions answered correctly at most this often.
+            dead_distractor (float): Flag questions with two or more wrong answers (i.e. multiple choice) where
+                one of them is picked by less than this share of the wrong answers, including never.
+
+        Returns:
+            list: (question text hash, reason, correct rate, answers) tuples, the most answered first.
+        """
+        n = len(self)
+        answers = self.answers[:n]
+        rates = self.correct_rates()
+        wrong = answers - self.correct[:n]
+        options = np.minimum(self.options[:n], MAX_DISTRACTORS)
+        # Only the question's own wrong answers count, true/false questions have a single one
+        offered = np.arange(MAX_DISTRACTORS) < options[:, None]
+        distractors = np.where(offered, self.distractors[:n], np.iinfo(np.int64).max)
+        eligible = options >= 2
+        with np.errstate(invalid="ignore", divide="ignore"):
+            least_chosen = np.where(eligible, distractors.min(axis=1) / wrong, np.inf)
+
+        judged = answers >= min_answers
+        reasons = [
+            (judged & (rates >= too_easy), "too easy"),
+            (judged & (rates <= too_hard), "too hard"),
+            (judged & eligible & (wrong >= min_answers) & (least_chosen < dead_distractor), "dead distractor"),
+        ]
+        flagged = []
+        for mask, reason in reasons:
+            for row in np.flatnonzero(mask):
+                flagged.append((int(self.hashes[row]), reason, float(rates[row]), int(answers[row])))
+        flagged.sort(key=lambda entry: -entry[3])
+        return flagged
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize the answer event log and flag questions to review.")
+    parser.add_argument("log", nargs="?", default=DEFAULT_EVENT_LOG)
+    parser.add_argument("--min-answers", type=int, default=30, help="only judge questions with this many answers")
+    parser.add_argument("--limit", type=int, default=20, help="the number of flagged questions to print")
+    args = parser.parse_args()
+
+    stats = AnswerStats.from_log(args.log)
+    total = int(stats.answers.sum())
+    print(f"{total} answers to {len(stats)} questions, "
+          f"{int(stats.correct.sum()) / total if total else 0:.0%} correct")
+    from question_bank import get_question_bank
+    bank = get_question_bank()
+    for question_hash, reason, rate, answers in stats.flagged(args.min_answers)[:args.limit]:
+        question = bank.get_by_text_hash(question_hash)
+        text = question["question"] if question else f"(question {question_hash} is no longer in the bank)"
+        print(f"{reason:16s} {rate:5.0%} of {answers:6d}  {text}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,124 @@
-import requests
 import json
 import os
 import logging
 import random
-import re
-import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import metrics
+from question_bank import get_question_bank, QUESTION_TYPES, SYNC_INTERVAL
+from pool_cache import PoolCache
+from question_stream import iter_questions
+from rate_limiter import TokenBucket, SingleFlight
+from text_normalizer import normalize_text, normalize_questions
 
-# Set up logging for debugging purposes, but default to WARNING to reduce verbosity
-logging.basicConfig(level=logging.WARNING)
+# The API endpoint can be pointed at a local stand-in server (e.g. for testing) with OPENTDB_BASE_URL
+API_BASE_URL = os.environ.get("OPENTDB_BASE_URL", "https://opentdb.com/api.php")
+API_TOKEN_URL = os.environ.get("OPENTDB_TOKEN_URL", "https://opentdb.com/api_token.php")
 
-def generate_api_url(difficulty, question_type):
+# The API allows one request per IP every 5 seconds
+API_REQUEST_INTERVAL = float(os.environ.get("OPENTDB_REQUEST_INTERVAL", "5"))
+# Seconds to wait for the API to connect and to send each part of a response
+API_TIMEOUT = float(os.environ.get("OPENTDB_TIMEOUT", "10"))
+
+# Parsed question pools, shared by every game in this process
+pool_cache = PoolCache()
+
+# Paces API requests across every game and every process working in this directory
+rate_limiter = TokenBucket(rate=1 / API_REQUEST_INTERVAL, capacity=1, state_file=os.path.join("data", ".api_rate_limit"))
+
+# Concurrent fetches for the same bucket share one request
+_bucket_fetches = SingleFlight()
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    """
+    Returns the shared HTTP session used for every request to the trivia API.
+
+    The session keeps its connections alive, so concurrent pool loads reuse one connection pool instead of
+    opening a new connection per request.
+
+    Returns:
+        requests.Session: The shared session.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests  # Imported on first use, it is slow to import and most runs never call the API
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=8)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+class SessionToken:
+    def __init__(self, token_url=None):
+        """
+        Initializes a new Open Trivia Database session token holder.
+
+        While a session token is passed along with the requests, the API never returns the same question twice.
+        The token is requested lazily on first use.
+
+        Parameters:
+            token_url (str, optional): The URL of the token endpoint. Defaults to API_TOKEN_URL.
+        """
+        self.token_url = token_url or API_TOKEN_URL
+        self.token = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """
+        Returns the current session token, requesting a new one if there is none.
+
+        Returns:
+            str: The session token, or None if it could not be retrieved.
+        """
+        with self._lock:
+            if self.token is None:
+                self.token = self._command("request")
+            return self.token
+
+    def renew(self):
+        """
+        Drops the current token (e.g. because the API no longer knows it) so a new one is requested on next use.
+        """
+        with self._lock:
+            self.token = None
+
+    def reset(self):
+        """
+        Resets the current token after it has returned every available question, so the API starts over.
+        """
+        with self._lock:
+            if self.token is not None and self._command("reset", self.token) is None:
+                self.token = None
+
+    def _command(self, command, token=None):
+        import requests
+        url = f"{self.token_url}?command={command}"
+        if token:
+            url += f"&token={token}"
+        try:
+            data = get_session().get(url, timeout=API_TIMEOUT).json()
+        except (requests.RequestException, ValueError) as e:
+            logging.error(f"Failed to {command} a session token: {e}")
+            return None
+        if data.get("response_code") != 0:
+            logging.error(f"Session token {command} failed with response code {data.get('response_code')}.")
+            return None
+        logging.info(f"Session token {command} succeeded.")
+        return data.get("token")
+
+def generate_api_url(difficulty, question_type, token=None):
     """
     Generates a URL for the Open Trivia Database API based on the given difficulty and question type.
 
     Parameters:
         difficulty (str): The difficulty level of the questions.
         question_type (str): The type of questions.
+        token (str, optional): A session token, so the API does not return questions it already returned.
 
     Returns:
         str: The generated URL.
@@ -24,15 +127,17 @@ def generate_api_url(difficulty, question_type):
         >>> generate_api_url("easy", "multiple")
         'https://opentdb.com/api.php?amount=50&difficulty=easy&type=multiple'
     """
-    base_url = "https://opentdb.com/api.php"
+    base_url = API_BASE_URL
     amount = 50
     url = f"{base_url}?amount={amount}&difficulty={difficulty}&type={question_type}"
+    if token:
+        url += f"&token={token}"
     logging.info(f"Generated API URL: {url}")
     return url
 
 def clean_text(text):
     """
-    Cleans the given text by removing special characters and whitespace.
+    Cleans the given text by decoding HTML entities and collapsing whitespace.
 
     Parameters:
         text (str): The text to be cleaned.
@@ -40,51 +145,70 @@ def clean_text(text):
     Returns:
         str: The cleaned text.
 
-    This function removes special characters starting with '&' followed by one or more word characters and ending with ';'. 
-    It then removes any characters that are not alphanumeric or whitespace from the text. 
-    Finally, it replaces consecutive whitespace characters with a single space and strips any leading or trailing whitespace.
+    This function delegates to text_normalizer.normalize_text, which decodes HTML entities, replaces consecutive
+    whitespace characters with a single space and strips any leading or trailing whitespace in a single pass.
+    Punctuation is kept, so questions and answers are not damaged.
 
     Example:
-        >>> clean_text("Hello, &world;! This is a test #123.")
-        'Hello world! This is a test'
+        >>> clean_text("Hello, &quot;world&quot;! This is a test #123.")
+        'Hello, "world"! This is a test #123.'
     """
-    text = re.sub(r"&\w+;", "", text)
-    cleaned_text = re.sub(r'[^\w\s]', '', text)
-    cleaned_text = re.sub(r'\s+', ' ', cleaned_text)
-    return cleaned_text.strip()
+    return normalize_text(text)
 
-def fetch_questions_from_api(url):
+def fetch_questions_from_api(url, session_token=None, wait=False):
     '''
     Fetches questions from the API by making a GET request to the specified URL.
 
     Args:
         url (str): The URL of the API.
+        session_token (SessionToken, optional): The token used in the URL. It is renewed when the API reports
+            that it does not exist (response code 3) and reset when it has returned every question (response code 4).
+        wait (bool): Wait for the rate limiter (and retry after a 429) instead of giving up. Only background
+            work such as the refill worker should wait; games fall back to the questions they already have.
 
     Returns:
         list: A list of cleaned questions fetched from the API.
 
-    This function makes a GET request to the specified URL and retrieves the response. It then checks the status code of the response. If the status code is 200, it proceeds to parse the JSON response. The function retrieves the 'response_code' from the JSON data. If the 'response_code' is 0, it iterates over the 'results' in the JSON data and cleans the 'question' using the 'clean_text' function. The cleaned questions are appended to a list. The list of cleaned questions is logged and returned.
+    Every request first takes a token from the shared rate limiter (see rate_limiter.py). If none is available and wait is not set, no request is made and an empty list is returned, so the caller serves its cached questions instead of blocking the player.
+
+    This function makes a GET request to the specified URL and retrieves the response. It then checks the status code of the response. If the status code is 200, it proceeds to parse the JSON response. The function retrieves the 'response_code' from the JSON data. If the 'response_code' is 0, it cleans the question, answer and category fields of all 'results' using 'normalize_questions'. The list of cleaned questions is logged and returned.
 
     If the 'response_code' is not 0, it logs an error message based on the 'response_code' value.
 
     If the status code of the response is not 200, it logs an error message with the status code and the response text.
 
-    If the status code is 429 (rate limit exceeded), it logs a warning message and retries the request after a delay.
+    If the status code is 429 (rate limit exceeded), it blocks every process from calling the API for the time given in the Retry-After header (or API_REQUEST_INTERVAL), and only retries if wait is set.
 
     If the response status code is not 200, or the 'response_code' is not 0, or the 'response_code' is not a known value, an empty list is returned.
+
+    A request that fails (e.g. it cannot connect, or the API sends nothing for API_TIMEOUT seconds) or returns invalid JSON is logged and an empty list is returned, so a hung API never blocks a game.
     '''
+    import requests
     retries = 3
     for attempt in range(retries):
-        response = requests.get(url)
+        with metrics.span("api.rate_limit_wait"):
+            acquired = rate_limiter.acquire(timeout=None if wait else 0)
+        if not acquired:
+            logging.warning("API rate limit reached, using the cached questions.")
+            metrics.increment("api.rate_limited")
+            break
+        if attempt:
+            metrics.increment("api.retries")
+        metrics.increment("api.requests")
+        try:
+            with metrics.span("api.request"):
+                response = get_session().get(url, timeout=API_TIMEOUT)
+            data = response.json() if response.status_code == 200 else None
+        except (requests.RequestException, ValueError) as e:
+            logging.error(f"Failed to fetch questions from API: {e}")
+            metrics.increment("api.errors")
+            break
         logging.info(f"API Response Status Code: {response.status_code}")
         if response.status_code == 200:
-            data = response.json()
             response_code = data.get('response_code', 1)
             if response_code == 0:
-                cleaned_questions = []
-                for result in data['results']:
-                    result['question'] = clean_text(result['question'])
-                    cleaned_questions.append(result)
+                # Clean the question, answer and category fields of the whole batch at once
+                cleaned_questions = normalize_questions(data['results'])
                 logging.info(f"Fetched questions from API: {cleaned_questions}")
                 return cleaned_questions
             elif response_code == 1:
@@ -95,9 +219,13 @@ def fetch_questions_from_api(url):
                 break
             elif response_code == 3:
                 logging.error("API Error: Session token does not exist.")
+                if session_token is not None:
+                    session_token.renew()
                 break
             elif response_code == 4:
                 logging.error("API Error: Session token has returned all possible questions.")
+                if session_token is not None:
+                    session_token.reset()
                 break
             else:
                 logging.error(f"API Error: Unknown response code {response_code}.")
@@ -105,13 +233,45 @@ def fetch_questions_from_api(url):
         else:
             logging.error(f"Failed to fetch questions from API. Status code: {response.status_code}, Response: {response.text}")
             if response.status_code == 429:
-                logging.warning("Rate limit exceeded. Retrying after a delay...")
-                print("Loading... (Rate limit exceeded, retrying)")
-                time.sleep(5 * (attempt + 1))
+                try:
+                    retry_after = float(response.headers.get("Retry-After", API_REQUEST_INTERVAL))
+                except ValueError:
+                    retry_after = API_REQUEST_INTERVAL
+                logging.warning(f"Rate limit exceeded. Pausing API requests for {retry_after:g} seconds.")
+                metrics.increment("api.throttled")
+                metrics.increment("api.backoff_seconds", retry_after)
+                rate_limiter.backoff(retry_after)
+                if not wait:
+                    break
             else:
                 break
     return []
 
+def fetch_bucket(difficulty, question_type, session_token=None, wait=False):
+    '''
+    Fetches a batch of questions for one (difficulty, question type) bucket.
+
+    Concurrent calls for the same bucket, session token and wait mode are coalesced: the first caller makes the
+    request and the others wait for it and get the same questions. Calls that differ in wait are never coalesced,
+    so a game does not block behind the refill worker waiting for the rate limiter, and calls with different
+    session tokens get questions new to their own session.
+
+    Args:
+        difficulty (str): The difficulty level of the questions.
+        question_type (str): The type of questions.
+        session_token (SessionToken, optional): The session token to fetch with.
+        wait (bool): Wait for the rate limiter instead of giving up, see fetch_questions_from_api.
+
+    Returns:
+        list: A list of cleaned questions, or an empty list if none could be fetched.
+    '''
+    def fetch():
+        token = session_token.get() if session_token is not None else None
+        url = generate_api_url(difficulty, question_type, token=token)
+        return fetch_questions_from_api(url, session_token=session_token, wait=wait)
+
+    return _bucket_fetches.do((difficulty, question_type, wait, session_token), fetch)
+
 def save_questions_to_file(questions, filename):
     """
     Saves the given list of questions to a JSON file at the specified filename.
@@ -142,30 +302,175 @@ def save_questions_to_file(questions, filename):
     if not os.path.exists(directory):
         os.makedirs(directory)
 
-    with open(filename, 'w') as file:
+    # Write to a temporary file first so readers never see a half-written pool
+    temp_filename = f"{filename}.tmp"
+    with open(temp_filename, 'w') as file:
         json.dump(questions, file)
+    os.replace(temp_filename, filename)
     logging.info(f"Saved questions to file: {filename}")
 
+def append_questions_to_file(questions, filename):
+    """
+    Appends questions to a pool file (a JSON array, or JSONL with one question per line) without parsing it.
+
+    The existing bytes are copied up to the closing bracket of the array and the new questions are written after
+    them, into a temporary file that then replaces the pool, so readers never see a half-written pool and the
+    cost is a copy of the file rather than a parse and a re-dump of every question in it.
+
+    Args:
+        questions (list): The questions to append.
+        filename (str): The pool file. It is created if it does not exist.
+
+    Returns:
+        None
+
+    Raises:
+        json.JSONDecodeError: If the file is neither a JSON array nor JSONL.
+    """
+    try:
+        source = open(filename, "rb")
+    except FileNotFoundError:
+        save_questions_to_file(questions, filename)
+        return
+    temp_filename = f"{filename}.tmp"
+    try:
+        _append_to_copy(source, temp_filename, questions, filename)
+    except BaseException:
+        # Nothing may be left behind in data/ when the pool cannot be appended to (or the copy fails)
+        try:
+            os.remove(temp_filename)
+        except FileNotFoundError:
+            pass
+        raise
+    os.replace(temp_filename, filename)
+    logging.info(f"Appended {len(questions)} questions to file: {filename}")
+
+def _append_to_copy(source, temp_filename, questions, filename):
+    with source, open(temp_filename, "wb") as target:
+        size = os.fstat(source.fileno()).st_size
+        head = source.read(_APPEND_CHUNK).lstrip()
+        if head[:1] == b"[":
+            # Read back from the end until the closing bracket and the byte before it are found
+            end = size
+            tail = b""
+            while end > 0 and len(tail.strip()) < 2:
+                start = max(0, end - _APPEND_CHUNK)
+                source.seek(start)
+                tail = source.read(end - start) + tail
+                end = start
+            tail = tail.rstrip()
+            if not tail.endswith(b"]"):
+                raise json.JSONDecodeError("Unterminated array", filename, size)
+            # No item of an array ends with "[", so the array is empty if the opening bracket comes right before
+            empty = tail[:-1].rstrip().endswith(b"[")
+            source.seek(0)
+            _copy(source, target, end + len(tail) - 1)
+            target.write(b"" if empty else b", ")
+            target.write(", ".join(json.dumps(q) for q in questions).encode("utf-8"))
+            target.write(b"]")
+        elif head[:1] == b"{":
+            source.seek(0)
+            _copy(source, target, size)
+            source.seek(max(0, size - 1))
+            if source.read(1) not in (b"\n", b""):
+                target.write(b"\n")
+            target.write("".join(f"{json.dumps(q)}\n" for q in questions).encode("utf-8"))
+        else:
+            raise json.JSONDecodeError("Expecting value", filename, 0)
+
+_APPEND_CHUNK = 1 << 16
+
+def _copy(source, target, length):
+    while length > 0:
+        chunk = source.read(min(length, _APPEND_CHUNK))
+        if not chunk:
+            break
+        target.write(chunk)
+        length -= len(chunk)
+
+_pool_write_lock = threading.Lock()
+
+def add_questions_to_pool(difficulty, question_type, questions, bank=None):
+    """
+    Adds questions to the pool file of the given difficulty and question type, and to the question bank.
+
+    Questions that duplicate, or nearly duplicate, a question already in the question bank (in any pool) are
+    dropped first, see QuestionBank.find_duplicates. The others are appended to the pool file and to the end of
+    the bank's bucket, so the cost of a batch does not grow with the pool and the questions already in the bank
+    keep their rows.
+
+    Args:
+        difficulty (str): The difficulty level of the pool.
+        question_type (str): The type of the pool.
+        questions (list): The questions to add.
+        bank (QuestionBank, optional): The question bank the pool feeds. Defaults to the shared bank.
+
+    Returns:
+        int: The number of questions added.
+    """
+    bank = bank or get_question_bank()
+    filename = bank.source_file(difficulty, question_type)
+    with _pool_write_lock:
+        bank.sync_bucket(difficulty, question_type)  # The bank must hold the file's questions before both grow
+        duplicates = bank.find_duplicates(questions)
+        fresh = [q for q, duplicate in zip(questions, duplicates) if duplicate is None]
+        if len(fresh) < len(questions):
+            logging.info(f"Dropped {len(questions) - len(fresh)} duplicate questions for {filename}")
+        if fresh:
+            try:
+                append_questions_to_file(fresh, filename)
+            except json.JSONDecodeError:
+                logging.error(f"Invalid JSON format in {filename}, replacing it with the new questions.")
+                save_questions_to_file(fresh, filename)
+                bank.sync_bucket(difficulty, question_type)
+            else:
+                bank.add_questions(difficulty, question_type, fresh, source_stat=os.stat(filename))
+        logging.info(f"Added {len(fresh)} new questions to {filename} ({bank.count(difficulty, question_type)} in total)")
+    return len(fresh)
+
+@metrics.timed("api.load_questions_from_file")
 def load_questions_from_file(filename):
     """
-    Load questions from a JSON file.
+    Load questions from a JSON file (a JSON array, or JSONL with one question per line).
+
+    The file is parsed question by question (see question_stream.py), so the raw text of the file is never held
+    in memory next to the parsed questions. To draw a few questions from a file too large to load, use
+    question_stream.sample_questions instead.
 
     Args:
         filename (str): The name of the file to load.
 
     Returns:
-        dict: The loaded JSON data.
+        list: The loaded questions.
 
     Raises:
         FileNotFoundError: If the file does not exist.
         json.JSONDecodeError: If the file is not in JSON format.
     """
-    with open(filename, 'r') as file:
-        data = json.load(file)
+    data = list(iter_questions(filename))
     logging.info(f"Loaded questions from file: {filename}")
     return data
 
 def get_questions(difficulty, question_type):
+    """
+    Retrieves a list of questions for the difficulty and question type, served from the in-process pool cache.
+
+    The pool is only re-read when its file changed (see pool_cache.py), so repeated calls do not touch the disk.
+    The returned list is shared with other callers and must not be modified.
+
+    Args:
+        difficulty (str): The difficulty level of the questions (easy, medium, hard).
+        question_type (str): The type of questions (multiple, boolean).
+
+    Returns:
+        list: A list of questions, as returned by _load_questions.
+    """
+    filename = f"data/{difficulty}_{question_type}_questions.json"
+    return pool_cache.get(
+        (difficulty, question_type), filename, lambda: _load_questions(difficulty, question_type)
+    )
+
+def _load_questions(difficulty, question_type):
     """
     Retrieves a list of questions from a file or from the API based on the difficulty and question type.
 
@@ -192,28 +497,68 @@ def get_questions(difficulty, question_type):
     except (FileNotFoundError, json.JSONDecodeError):
         logging.info(f"File not found or invalid JSON format: {filename}. Fetching from API.")
 
-    url = generate_api_url(difficulty, question_type)
-    questions = fetch_questions_from_api(url)
+    questions = fetch_bucket(difficulty, question_type)
     if questions:
-        save_questions_to_file(questions, filename)
-        return questions
+        # Append the fresh batch to the pool instead of throwing away the questions it already had
+        add_questions_to_pool(difficulty, question_type, questions)
     else:
         logging.warning(f"Returning questions from file due to API failure: {filename}")
-        try:
-            return load_questions_from_file(filename)
-        except (FileNotFoundError, json.JSONDecodeError):
-            logging.error(f"No valid questions available for {difficulty} {question_type}.")
-            return []
+    try:
+        return load_questions_from_file(filename)
+    except (FileNotFoundError, json.JSONDecodeError):
+        logging.error(f"No valid questions available for {difficulty} {question_type}.")
+        return []
 
-def get_random_questions(question_type):
+@metrics.timed("api.load_bucket")
+def _load_bucket(bank, difficulty, question_type, count, seen=None):
     """
-    Retrieves a specified number of random questions from the Open Trivia Database API for each difficulty level.
+    Samples questions for one (difficulty, question type) bucket, topping the bucket up first if it is too small.
 
     Parameters:
-        question_type (str): The type of questions to retrieve.
+        bank (QuestionBank): The question bank to sample from.
+        difficulty (str): The difficulty level of the questions.
+        question_type (str): The type of questions.
+        count (int): The number of questions to sample.
+        seen (SeenFilter, optional): Questions to avoid, because the player has already seen them.
 
     Returns:
-        list: A list of randomly selected questions from the API, with each question containing the following fields:
+        list: Up to count question dictionaries, or an empty list if the bucket could not be loaded.
+    """
+    try:
+        # Pick up pool files that changed on disk, checking each at most once per SYNC_INTERVAL
+        bank.sync_bucket(difficulty, question_type, max_age=SYNC_INTERVAL)
+        if bank.count(difficulty, question_type) < count:
+            try:
+                # Top up the pool file (from the API if needed) and re-import it into the bank
+                get_questions(difficulty, question_type)
+                bank.sync_bucket(difficulty, question_type)
+            except Exception as e:
+                logging.error(f"Could not top up {difficulty} {question_type}, using the questions in the bank: {e}")
+        # Draw a random sample from the indexed bank instead of shuffling the whole pool
+        return bank.sample(difficulty, question_type, count, seen=seen)
+    except Exception as e:
+        logging.error(f"Error fetching questions for {difficulty} {question_type}: {e}")
+        return []
+
+@metrics.timed("api.get_random_questions")
+def get_random_questions(question_type, player=None):
+    """
+    Retrieves a specified number of random questions for each difficulty level from the question bank.
+
+    Questions are sampled from the indexed SQLite bank (see question_bank.py), which is kept in sync with the
+    JSON pools in data/. A pool is only topped up from the Open Trivia Database API when its bucket holds fewer
+    questions than are needed for one game. All buckets are loaded concurrently through the shared HTTP session,
+    so the time to the first question is that of the slowest bucket rather than the sum of all of them.
+
+    When a player is given, questions they have already seen are avoided, and the selected questions are added to
+    their seen filter in the bank (see seen_filter.py).
+
+    Parameters:
+        question_type (str): The type of questions to retrieve ("multiple", "boolean", or "mixed" for both).
+        player (str, optional): The name of the player, to avoid repeating questions across their games.
+
+    Returns:
+        list: A list of randomly selected questions, ordered from easy to hard, with each question containing the following fields:
             - type (str): The type of question.
             - difficulty (str): The difficulty level of the question.
             - category (str): The category of the question.
@@ -221,9 +566,6 @@ def get_random_questions(question_type):
             - correct_answer (str): The correct answer to the question.
             - incorrect_answers (list): A list of incorrect answers to the question.
 
-    Raises:
-        Exception: If there is an error fetching questions from the API.
-
     Example:
         >>> get_random_questions("multiple")
         [
@@ -241,18 +583,30 @@ def get_random_questions(question_type):
     selected_questions = []
     difficulties = ["easy", "medium", "hard"]
     num_questions_per_difficulty = 5  # Adjust this number as needed
-    
+    question_types = QUESTION_TYPES if question_type == "mixed" else (question_type,)
+
     print("Loading question...")
 
+    bank = get_question_bank()
+    seen = bank.load_seen(player) if player else None
+    buckets = [(difficulty, qtype) for difficulty in difficulties for qtype in question_types]
+    with ThreadPoolExecutor(max_workers=len(buckets)) as executor:
+        futures = {
+            bucket: executor.submit(_load_bucket, bank, bucket[0], bucket[1], num_questions_per_difficulty, seen)
+            for bucket in buckets
+        }
+
     for difficulty in difficulties:
-        try:
-            difficulty_questions = get_questions(difficulty, question_type)
-            random.shuffle(difficulty_questions)  # Shuffle questions within the difficulty level
-            selected_questions.extend(difficulty_questions[:num_questions_per_difficulty])
-        except Exception as e:
-            logging.error(f"Error fetching questions for {difficulty} {question_type}: {e}")
-            continue
+        difficulty_questions = []
+        for qtype in question_types:
+            difficulty_questions.extend(futures[(difficulty, qtype)].result())
+        if len(question_types) > 1:
+            random.shuffle(difficulty_questions)  # Mix the question types within the difficulty level
+        selected_questions.extend(difficulty_questions[:num_questions_per_difficulty])
+
+    if seen is not None:
+        for q in selected_questions:
+            seen.add(q["question"])
+        bank.save_seen(player, seen)
 
     return selected_questions
-
-
@@ -0,0 +1,58 @@
+import threading
+
+# Every text asset shown by the game
+ASSET_FILES = (
+    "ascii_art_title.txt",
+    "menu.txt",
+    "instructions.txt",
+    "score_screen.txt",
+    "congrats.txt",
+    "end_screen.txt",
+)
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def get_asset(file_path):
+    """
+    Returns the content of a text asset, reading the file only the first time it is asked for.
+
+    Parameters:
+        file_path (str): The path of the asset.
+
+    Returns:
+        str: The content of the file.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+    """
+    content = _cache.get(file_path)
+    if content is None:
+        with open(file_path, "r") as file:
+            content = file.read()
+        with _lock:
+            _cache[file_path] = content
+    return content
+
+
+def preload(file_paths=ASSET_FILES):
+    """
+    Reads every given asset into the cache, so no screen has to touch the disk later. Missing files are skipped.
+
+    Parameters:
+        file_paths (iterable): The paths of the assets.
+    """
+    for file_path in file_paths:
+        try:
+            get_asset(file_path)
+        except FileNotFoundError:
+            pass
+
+
+def clear():
+    """
+    Empties the cache, so changed asset files are read again.
+    """
+    with _lock:
+        _cache.clear()
@@ -0,0 +1,227 @@
+"""
+Exercises the API rate limiter and request coalescing against a local fake of the Open Trivia Database API.
+
+The fake API answers with 429 when it is called more often than its rate limit allows, and counts every request.
+Four scenarios are run in a temporary directory:
+    - many games missing the same pool at once, which should reach the API with a single request,
+    - a throttled API, where games should get the cached (stale) pool right away instead of sleeping,
+    - several processes sharing the rate limiter, which should stay within the API's rate limit together,
+    - games started while the refill worker waits for the rate limiter, which should not wait with it.
+
+Every scenario checks its expectations and raises AssertionError if one is not met, so the benchmark fails when
+the limiter is violated or games block. tests/test_api_throttling.py runs the scenarios with pytest.
+
+Run from the repository root:
+    python -m benchmarks.bench_api_throttling
+"""
+import contextlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import api  # noqa: E402
+from rate_limiter import TokenBucket  # noqa: E402
+
+QUESTION = {
+    "type": "multiple",
+    "difficulty": "easy",
+    "category": "General Knowledge",
+    "question": "What is the capital of France?",
+    "correct_answer": "Paris",
+    "incorrect_answers": ["London", "Berlin", "Madrid"],
+}
+
+
+class FakeTriviaAPI(ThreadingHTTPServer):
+    def __init__(self, request_interval=0.5, latency=0.2, always_throttle=False):
+        """
+        Initializes a local stand-in for the trivia API with a per-server rate limit.
+
+        Parameters:
+            request_interval (float): The minimum number of seconds between two accepted requests.
+            latency (float): The number of seconds every response takes.
+            always_throttle (bool): Answer every request with 429.
+        """
+        super().__init__(("127.0.0.1", 0), FakeTriviaHandler)
+        self.request_interval = request_interval
+        self.latency = latency
+        self.always_throttle = always_throttle
+        self.requests = 0
+        self.throttled = 0
+        self.last_accepted = 0.0
+        self.counter_lock = threading.Lock()
+        self.serial = 0
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/api.php"
+
+
+class FakeTriviaHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        with server.counter_lock:
+            server.requests += 1
+            now = time.monotonic()
+            # Allow for some jitter between the client's clock and the arrival of its requests
+            throttled = server.always_throttle or now - server.last_accepted < server.request_interval * 0.9
+            if throttled:
+                server.throttled += 1
+            else:
+                server.last_accepted = now
+            server.serial += 1
+            serial = server.serial
+        time.sleep(server.latency)
+        if throttled:
+            self.send_response(429)
+            self.send_header("Retry-After", str(server.request_interval))
+            body = b"Too Many Requests"
+        else:
+            self.send_response(200)
+            results = [dict(QUESTION, question=f"Question {serial}-{i}?", correct_answer=f"Answer {serial}-{i}")
+                       for i in range(50)]
+            body = json.dumps({"response_code": 0, "results": results}).encode()
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fake_api(**kwargs):
+    server = FakeTriviaAPI(**kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    api.API_BASE_URL = server.url
+    return server
+
+
+def coalesced_misses(players=50):
+    server = start_fake_api()
+    api.rate_limiter = TokenBucket(rate=1 / server.request_interval, state_file="data/.api_rate_limit")
+    barrier = threading.Barrier(players)
+    pools = []
+
+    def player():
+        barrier.wait()
+        pools.append(api.get_questions("easy", "multiple"))
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=player) for _ in range(players)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+    print(f"{players} concurrent misses: {server.requests} upstream request(s), "
+          f"{len(pools[0])} questions each, {elapsed * 1000:.0f} ms")
+    assert server.requests == 1, f"{server.requests} upstream requests for one pool"
+    assert all(len(pool) == 50 for pool in pools), "a game did not get the fetched questions"
+
+
+def stale_when_throttled():
+    server = start_fake_api(always_throttle=True)
+    api.rate_limiter = TokenBucket(rate=1 / server.request_interval, state_file="data/.api_rate_limit")
+    api.pool_cache.invalidate()
+    with open("data/easy_boolean_questions.json", "w") as file:
+        json.dump([dict(QUESTION, type="boolean", correct_answer="True", incorrect_answers=["False"])] * 3, file)
+
+    latencies = []
+    for _ in range(3):
+        api.pool_cache.invalidate()
+        start = time.perf_counter()
+        pool = api.get_questions("easy", "boolean")
+        latencies.append(time.perf_counter() - start)
+    server.shutdown()
+    print(f"Throttled API: served {len(pool)} stale questions, {server.requests} upstream request(s), "
+          f"latencies {', '.join(f'{t * 1000:.0f} ms' for t in latencies)}")
+    assert len(pool) == 3, "the stale pool was not served"
+    assert server.requests == 1, "requests were sent while the API was backing off"
+    # Only the first call waits for the API's answer, none waits for the limiter
+    assert max(latencies) < server.latency + 0.3, "a game waited for the throttled API"
+
+
+def _hammer(url, state_file, deadline, results):
+    logging.disable(logging.CRITICAL)
+    api.rate_limiter = TokenBucket(rate=1 / 0.5, state_file=state_file)
+    fetched = 0
+    while time.time() < deadline:
+        fetched += len(api.fetch_questions_from_api(url, wait=True)) > 0
+    results.put(fetched)
+
+
+def shared_across_processes(processes=4, seconds=3.0):
+    server = start_fake_api(latency=0.0)
+    results = multiprocessing.get_context("fork").Queue()
+    deadline = time.time() + seconds
+    workers = [
+        multiprocessing.get_context("fork").Process(
+            target=_hammer, args=(server.url, "data/.api_rate_limit", deadline, results))
+        for _ in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    fetched = sum(results.get() for _ in workers)
+    server.shutdown()
+    print(f"{processes} processes for {seconds:g} s: {server.requests} upstream requests, "
+          f"{server.throttled} throttled, {fetched} batches fetched")
+    assert server.throttled == 0, f"{server.throttled} requests exceeded the API's rate limit"
+    assert fetched >= seconds / server.request_interval - 1, "the processes used less than the rate limit"
+
+
+def games_during_refill(games=20):
+    server = start_fake_api()
+    api.rate_limiter = TokenBucket(rate=1 / 2.0, state_file="data/.api_rate_limit")
+    api.rate_limiter.acquire(timeout=0)  # The refill has to wait two seconds for the next token
+    refill = threading.Thread(target=api.fetch_bucket, args=("easy", "multiple"), kwargs={"wait": True})
+    refill.start()
+    time.sleep(0.1)
+
+    latencies = []
+    for _ in range(games):
+        api.pool_cache.invalidate()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):  # Keep the game's progress messages out of the report
+            api.get_random_questions("multiple")
+        latencies.append(time.perf_counter() - start)
+    refill.join()
+    server.shutdown()
+    print(f"{games} games during a waiting refill: slowest {max(latencies) * 1000:.0f} ms, "
+          f"{server.requests} upstream request(s)")
+    assert max(latencies) < 0.5, "a game waited for the rate limiter with the refill worker"
+    assert server.requests == 1, "games reached the API without a rate limiter token"
+
+
+def main():
+    logging.disable(logging.CRITICAL)
+    previous = os.getcwd()
+    directory = tempfile.mkdtemp(prefix="quiz-throttle-")
+    os.makedirs(os.path.join(directory, "data"))
+    os.chdir(directory)
+    try:
+        coalesced_misses()
+        stale_when_throttled()
+        shared_across_processes()
+        games_during_refill()
+    finally:
+        os.chdir(previous)
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
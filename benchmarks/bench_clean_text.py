@@ -0,0 +1,106 @@
+"""
+Microbenchmark comparing text_normalizer.normalize_text with the original three-regex api.clean_text.
+
+Uncached and cached timings are reported separately: the uncached ones call normalize_text.__wrapped__ on unique
+strings, so every call does the actual work, split into strings with HTML entities (as the API sends them) and
+plain strings (the no-entity fast path). The cached timing repeats the same strings, as the answers "True" and
+"False" repeat in real pools.
+
+Run from the repository root:
+    python -m benchmarks.bench_clean_text
+"""
+import glob
+import json
+import re
+import timeit
+
+from text_normalizer import normalize_text, normalize_questions
+
+# Texts as the trivia API sends them, HTML entities included
+API_TEXTS = [
+    "Which of these is &quot;The Boss&quot; of Springsteen&#039;s E Street Band?",
+    "In &quot;Pok&eacute;mon&quot;, what type is Pikachu?",
+    "Entertainment: Music &amp; Musicals",
+    "What does the acronym &quot;CPU&quot; stand for?&nbsp; Pick one.",
+    "The Hindenburg disaster happened in 1937 &ndash; true or false?",
+    "Who wrote &ldquo;Cien a&ntilde;os de soledad&rdquo;?",
+]
+
+
+def legacy_clean_text(text):
+    """
+    The original api.clean_text, kept here as the baseline.
+    """
+    text = re.sub(r"&\w+;", "", text)
+    cleaned_text = re.sub(r'[^\w\s]', '', text)
+    cleaned_text = re.sub(r'\s+', ' ', cleaned_text)
+    return cleaned_text.strip()
+
+
+def load_strings():
+    """
+    Collects every distinct question, answer and category string from the pools in data/.
+    """
+    strings = set()
+    for filename in sorted(glob.glob("data/*_questions.json")):
+        with open(filename, "r") as file:
+            for q in json.load(file):
+                strings.update([q["question"], q["correct_answer"], q["category"], *q["incorrect_answers"]])
+    return sorted(strings)
+
+
+def entity_strings(count=20_000):
+    """
+    Returns count unique strings containing HTML entities, so neither the fast path nor the cache applies.
+    """
+    return [f"{API_TEXTS[i % len(API_TEXTS)]} &#{9312 + i % 20}; #{i}" for i in range(count)]
+
+
+def plain_strings(count=20_000):
+    """
+    Returns count unique strings without entities, from the pools in data/ if there are enough.
+    """
+    strings = load_strings() or ["What is the capital of France?"]
+    return [f"{strings[i % len(strings)]} #{i}" for i in range(count)]
+
+
+def run(number=5):
+    """
+    Times both implementations over the same strings.
+
+    Returns:
+        dict: Seconds per pass over all strings, for each implementation and case.
+    """
+    with_entities = entity_strings()
+    plain = plain_strings()
+    uncached = normalize_text.__wrapped__
+
+    legacy = min(timeit.repeat(lambda: [legacy_clean_text(s) for s in with_entities], number=1, repeat=number))
+    entities = min(timeit.repeat(lambda: [uncached(s) for s in with_entities], number=1, repeat=number))
+    fast_path = min(timeit.repeat(lambda: [uncached(s) for s in plain], number=1, repeat=number))
+
+    repeated = with_entities[:1000] * 20  # Fits the cache, so every pass after the first is hits only
+    normalize_text.cache_clear()
+    [normalize_text(s) for s in repeated]
+    cached = min(timeit.repeat(lambda: [normalize_text(s) for s in repeated], number=1, repeat=number))
+
+    normalize_text.cache_clear()
+    batches = [
+        [{"question": s, "correct_answer": s, "category": s, "incorrect_answers": [s]} for s in with_entities[i:i + 50]]
+        for i in range(0, len(with_entities), 50)
+    ]
+    batch = timeit.timeit(lambda: [normalize_questions(b) for b in batches], number=1)
+    return {
+        "strings": len(with_entities),
+        "legacy_clean_text": legacy,
+        "normalize_text_uncached_entities": entities,
+        "normalize_text_uncached_plain": fast_path,
+        "normalize_text_cached": cached,
+        "normalize_questions_batch": batch,
+    }
+
+
+if __name__ == "__main__":
+    results = run()
+    for name, value in results.items():
+        print(f"{name}: {value:.6f}" if isinstance(value, float) else f"{name}: {value}")
@@ -0,0 +1,80 @@
+"""
+Measures the memory used per question by question.Question, compared with the original dict-based class.
+
+Run from the repository root:
+    python -m benchmarks.bench_question_memory [pool_size]
+"""
+import gc
+import sys
+import tracemalloc
+
+from question import Question
+
+
+class LegacyQuestion:
+    """
+    The original question.Question, kept here as the baseline.
+    """
+    def __init__(self, question_type, difficulty, category, question, correct_answer, incorrect_answers, answers=None):
+        self.type = question_type
+        self.difficulty = difficulty
+        self.category = category
+        self.question = question
+        self.correct_answer = correct_answer
+        self.incorrect_answers = incorrect_answers
+        self.answers = answers if answers is not None else [correct_answer] + incorrect_answers
+        self.points = None
+
+
+def synthetic_pool(size, question_type):
+    """
+    Builds question dictionaries the way they come out of json.load, so no strings are shared between questions.
+    """
+    categories = ["Science: Computers", "Entertainment: Film", "History", "Geography", "Sports"]
+    difficulties = ["easy", "medium", "hard"]
+    return [
+        {
+            "type": "".join([question_type, ""]),
+            "difficulty": "".join([difficulties[i % 3], ""]),
+            "category": "".join([categories[i % len(categories)], ""]),
+            "question": f"Synthetic question number {i}?",
+            "correct_answer": f"Answer {i}" if question_type == "multiple" else "".join(["Tr", "ue"]),
+            "incorrect_answers": ([f"Wrong {i}a", f"Wrong {i}b", f"Wrong {i}c"] if question_type == "multiple"
+                                  else ["".join(["Fal", "se"])]),
+        }
+        for i in range(size)
+    ]
+
+
+def bytes_per_question(cls, size, question_type):
+    """
+    Returns the number of bytes retained per question once cls objects are built and the source dicts are dropped.
+    """
+    gc.collect()
+    tracemalloc.start()
+    pool = synthetic_pool(size, question_type)
+    questions = [cls(q["type"], q["difficulty"], q["category"], q["question"], q["correct_answer"], q["incorrect_answers"])
+                 for q in pool]
+    del pool
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del questions
+    return retained / size
+
+
+def run(size=100_000):
+    """
+    Returns the bytes allocated per question by each implementation for a pool of the given size.
+    """
+    results = {"pool_size": size}
+    for question_type in ("multiple", "boolean"):
+        results[f"legacy_{question_type}_bytes_per_question"] = bytes_per_question(LegacyQuestion, size, question_type)
+        results[f"slotted_{question_type}_bytes_per_question"] = bytes_per_question(Question, size, question_type)
+    return results
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    for name, value in run(size).items():
+        print(f"{name}: {value:.1f}" if isinstance(value, float) else f"{name}: {value}")
@@ -0,0 +1,350 @@
+"""
+Reproducible benchmark suite for startup and the question, scoring and rendering hot paths, and for the memory
+held by the question pools, decks and leaderboard (in "bytes" instead of "seconds" results).
+
+Every benchmark runs offline: synthetic question pools and leaderboards are generated from the pools in data/
+inside a temporary directory, so the API is never called. Results are written as JSON so runs from different
+commits can be compared.
+
+Run from the repository root:
+    python -m benchmarks.run_benchmarks --sizes 1000,100000 --output bench_output.json
+    python -m benchmarks.run_benchmarks --sizes 1000 --compare bench_output.json
+    python -m benchmarks.run_benchmarks --sizes 1000 --startup-budget
+"""
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import api  # noqa: E402
+import question_bank  # noqa: E402
+from question import questions_from_dicts, Question  # noqa: E402
+from score_manager import ScoreManager  # noqa: E402
+from renderer import PROFILES, Renderer  # noqa: E402
+from game_engine import QuestionDeck  # noqa: E402
+from ratings import PLAYER_RATING, RatingTable  # noqa: E402
+from memory_profile import measure  # noqa: E402
+from question_pack import QuestionPack, compile_pack  # noqa: E402
+from simulation import AccuracyStrategy, simulate  # noqa: E402
+
+DEFAULT_SIZES = (1000, 100_000)
+
+# The time budget (in milliseconds) from starting main.py to the first menu, checked with --startup-budget
+STARTUP_BUDGET_MS = 150
+
+
+def load_templates():
+    """
+    Returns every question of the bundled pools, used as templates for the synthetic pools.
+    """
+    templates = []
+    for filename in sorted(glob.glob(os.path.join(REPO_ROOT, "data", "*_questions.json"))):
+        with open(filename, "r") as file:
+            templates.extend(json.load(file))
+    return templates
+
+
+def synthetic_pool(templates, size, difficulty, question_type, seed=0):
+    """
+    Builds a pool of unique questions for a bucket by varying the bundled questions of the same type.
+    """
+    rng = random.Random(seed)
+    same_type = [q for q in templates if q["type"] == question_type]
+    pool = []
+    for i in range(size):
+        template = same_type[rng.randrange(len(same_type))]
+        pool.append({
+            "type": question_type,
+            "difficulty": difficulty,
+            "category": template["category"],
+            "question": f"{template['question']} &quot;#{i}&quot;",
+            "correct_answer": template["correct_answer"],
+            "incorrect_answers": list(template["incorrect_answers"]),
+        })
+    return pool
+
+
+def timed(function, repeat=3):
+    """
+    Runs function repeat times and returns the best wall-clock time in seconds.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+@contextlib.contextmanager
+def workspace(templates, size):
+    """
+    Creates a temporary working directory with synthetic pools of the given size per bucket and switches to it.
+    """
+    previous = os.getcwd()
+    directory = tempfile.mkdtemp(prefix="quiz-bench-")
+    os.makedirs(os.path.join(directory, "data"))
+    for difficulty in question_bank.DIFFICULTIES:
+        for question_type in question_bank.QUESTION_TYPES:
+            pool = synthetic_pool(templates, size, difficulty, question_type)
+            with open(os.path.join(directory, "data", f"{difficulty}_{question_type}_questions.json"), "w") as file:
+                json.dump(pool, file)
+    os.chdir(directory)
+    question_bank._default_bank = None
+    api.pool_cache.invalidate()
+    try:
+        yield directory
+    finally:
+        if question_bank._default_bank is not None:
+            question_bank._default_bank.close()
+            question_bank._default_bank = None
+        api.pool_cache.invalidate()
+        os.chdir(previous)
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def bench_questions(templates, size, results):
+    with workspace(templates, size):
+        def cold_get_questions():
+            api.pool_cache.invalidate()
+            api.get_questions("easy", "multiple")
+
+        record(results, "api.get_questions.cold", size, timed(cold_get_questions))
+        record(results, "api.get_questions.warm", size, timed(lambda: api.get_questions("easy", "multiple")))
+
+        start = time.perf_counter()
+        question_bank.get_question_bank()
+        record(results, "question_bank.import", size, time.perf_counter() - start)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            record(results, "api.get_random_questions", size,
+                   timed(lambda: api.get_random_questions("mixed"), repeat=20))
+
+        batch = [dict(q, question=f"{q['question']} (again)")
+                 for q in synthetic_pool(templates, 50, "easy", "multiple", seed=1)]
+        record(results, "question_bank.find_duplicates.50", size,
+               timed(lambda: question_bank.get_question_bank().find_duplicates(batch)))
+
+        pool = api.get_questions("easy", "multiple")
+        strings = [q["question"] for q in pool]
+        record(results, "api.clean_text", size, timed(lambda: [api.clean_text(s) for s in strings]))
+
+        sample = pool[:1000]
+        record(results, "question.construction.1k", size,
+               timed(lambda: [Question.from_dict(q) for q in sample]))
+        drawn = question_bank.get_question_bank().sample("easy", "multiple", 15)
+        record(results, "question.questions_from_dicts.cached", size,
+               timed(lambda: questions_from_dicts(drawn), repeat=20))
+
+        deck = QuestionDeck.from_bank("mixed")
+        record(results, "simulation.headless_games.10k", size,
+               timed(lambda: simulate(deck, AccuracyStrategy(0.8), 10_000, seed=1), repeat=1))
+
+        ratings = RatingTable(deck.questions, persist=False)
+        rng = random.Random(1)
+
+        def adaptive_answers():
+            rating = PLAYER_RATING
+            for _ in range(10_000):
+                position = ratings.choose(rng, rating)
+                rating = ratings.update(position, rating, rng.random() < 0.6)
+
+        record(results, "ratings.choose_and_update.10k", size, timed(adaptive_answers))
+
+        # Memory held by the data structures that grow with the pools
+        api.pool_cache.invalidate()
+        record_memory(results, "memory.pool_cache.easy_multiple", size,
+                      measure(lambda: api.get_questions("easy", "multiple"))[1])
+        dicts = api.get_questions("easy", "multiple")
+        record_memory(results, "memory.questions.built", size,
+                      measure(lambda: [Question.from_dict(q) for q in dicts])[1])
+        record_memory(results, "memory.deck.mixed", size, measure(lambda: QuestionDeck.from_bank("mixed"))[1])
+
+        # Compiled question pack: opening and random access should not depend on the number of questions
+        files = sorted(glob.glob(os.path.join("data", "*_questions.json")))
+        record(results, "question_pack.compile", size, timed(lambda: compile_pack(files, "questions.qpack"), repeat=1))
+        record(results, "question_pack.open", size, timed(lambda: QuestionPack("questions.qpack").close(), repeat=20))
+        pack = QuestionPack("questions.qpack")
+        positions = [rng.randrange(len(pack)) for _ in range(10_000)]
+        record(results, "question_pack.get.10k", size, timed(lambda: [pack[i] for i in positions]))
+        record_memory(results, "memory.deck.mixed.pack", size,
+                      measure(lambda: QuestionDeck.from_pack("mixed", pack))[1])
+        pack.close()
+
+
+def bench_scores(size, results):
+    directory = tempfile.mkdtemp(prefix="quiz-bench-scores-")
+    try:
+        score_file = os.path.join(directory, "high_scores.csv")
+        rng = random.Random(0)
+        with open(score_file, "w") as file:
+            for i in range(size):
+                file.write(f"player{i},{rng.randrange(46)},2024-06-11 20:32:47\n")
+
+        record(results, "score_manager.load_high_scores", size, timed(lambda: ScoreManager(score_file), repeat=1))
+        manager, retained, _ = measure(lambda: ScoreManager(score_file))
+        record_memory(results, "memory.score_manager", size, retained)
+
+        def updates():
+            for i in range(1000):
+                manager.update_high_scores(f"player{rng.randrange(size * 2)}", rng.randrange(46))
+            manager.save_high_scores()
+
+        record(results, "score_manager.update_high_scores.1k", size, timed(updates, repeat=1))
+        with contextlib.redirect_stdout(io.StringIO()):
+            record(results, "score_manager.display_high_scores", size, timed(manager.display_high_scores))
+        manager.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def bench_rendering(results):
+    stream = io.StringIO()
+    renderer = Renderer(stream=stream, profile=PROFILES["instant"])
+    with open(os.path.join(REPO_ROOT, "ascii_art_title.txt"), "r") as file:
+        title = file.read()
+    with open(os.path.join(REPO_ROOT, "menu.txt"), "r") as file:
+        frame = (title + file.read()).splitlines()
+
+    def redraw_menu():
+        for _ in range(1000):
+            renderer.draw_frame(frame)
+
+    def question_screen():
+        for i in range(1000):
+            renderer.clear()
+            renderer.animate(f"Question {i}: What is the capital of France?\n", 0.03)
+            renderer.write("1. Paris\n2. London\n3. Berlin\n4. Madrid\n")
+
+    record(results, "renderer.draw_frame.unchanged.1k", 0, timed(redraw_menu))
+    record(results, "renderer.question_screen.1k", 0, timed(question_screen))
+
+
+def time_to_first_menu(directory):
+    """
+    Starts main.py in a fresh interpreter and returns the seconds until it prompts for a menu choice.
+    """
+    env = dict(os.environ, QUIZ_ANIMATION="instant", QUIZ_LOW_WATER_MARK="0")
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-u", os.path.join(REPO_ROOT, "main.py")], cwd=directory, env=env,
+                               stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    try:
+        output = b""
+        while b"pick your choice" not in output:
+            chunk = process.stdout.read1(4096)
+            if not chunk:
+                raise RuntimeError("main.py exited before showing the menu")
+            output += chunk
+        return time.perf_counter() - start
+    finally:
+        process.kill()
+        process.wait()
+
+
+def bench_startup(results, runs=5):
+    """
+    Measures the cold start of the game: importing main and reaching the first menu, each in a fresh interpreter.
+    """
+    def import_main():
+        subprocess.run([sys.executable, "-c", "import main"], cwd=REPO_ROOT, check=True)
+
+    def bare_interpreter():
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+
+    record(results, "startup.interpreter", 0, timed(bare_interpreter, repeat=runs))
+    record(results, "startup.import_main", 0, timed(import_main, repeat=runs))
+
+    directory = tempfile.mkdtemp(prefix="quiz-bench-startup-")
+    try:
+        for filename in glob.glob(os.path.join(REPO_ROOT, "*.txt")) + [os.path.join(REPO_ROOT, "high_scores.csv")]:
+            shutil.copy(filename, directory)
+        seconds = min(time_to_first_menu(directory) for _ in range(runs))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    record(results, "startup.first_menu", 0, seconds)
+    return seconds
+
+
+def record(results, name, size, seconds):
+    results.append({"name": name, "size": size, "seconds": seconds})
+    print(f"{name:45s} {size:>9d} {seconds * 1000:12.3f} ms", file=sys.stderr)
+
+
+def record_memory(results, name, size, retained_bytes):
+    results.append({"name": name, "size": size, "bytes": retained_bytes})
+    print(f"{name:45s} {size:>9d} {retained_bytes / 1024:12.1f} KiB", file=sys.stderr)
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_file):
+    """
+    Prints the ratio of every result to the matching result of a previous run.
+    """
+    with open(baseline_file, "r") as file:
+        baseline = {(r["name"], r["size"]): r.get("seconds", r.get("bytes")) for r in json.load(file)["results"]}
+    for result in results:
+        previous = baseline.get((result["name"], result["size"]))
+        if previous:
+            value = result.get("seconds", result.get("bytes"))
+            print(f"{result['name']:45s} {result['size']:>9d} {value / previous:8.2f}x", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the quiz game benchmark suite.")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="comma separated pool and leaderboard sizes, e.g. 1000,100000,1000000")
+    parser.add_argument("--output", default=None, help="write the results as JSON to this file")
+    parser.add_argument("--compare", default=None, help="compare with the results of a previous run")
+    parser.add_argument("--startup-budget", type=float, nargs="?", const=STARTUP_BUDGET_MS, default=None,
+                        help=f"fail if the time to the first menu exceeds this many ms (default {STARTUP_BUDGET_MS})")
+    args = parser.parse_args()
+
+    templates = load_templates()
+    results = []
+    startup = bench_startup(results)
+    bench_rendering(results)
+    for size in (int(s) for s in args.sizes.split(",")):
+        bench_questions(templates, size, results)
+        bench_scores(size, results)
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    if args.compare:
+        compare(results, args.compare)
+    if args.startup_budget is not None and startup * 1000 > args.startup_budget:
+        print(f"Startup took {startup * 1000:.0f} ms, over the budget of {args.startup_budget:g} ms", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
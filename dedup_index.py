@@ -0,0 +1,136 @@
+import hashlib
+import re
+import zlib
+
+NUM_PERMUTATIONS = 32
+BANDS = 8  # 8 bands of 4 rows: pairs with a Jaccard similarity of 0.8 become candidates 98% of the time
+SHINGLE_SIZE = 4
+SIMILARITY_THRESHOLD = 0.8
+
+_MASK = (1 << 32) - 1
+_MASK64 = (1 << 64) - 1
+_BAND_PRIME = 0x100000001B3  # The 64-bit FNV prime
+_MIX = 0x9E3779B1  # Odd multiplier (the 32-bit golden ratio)
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def dedup_text(text):
+    """
+    Returns the text questions are compared by: lower case, with punctuation and extra whitespace removed.
+    """
+    return " ".join(_NON_WORD.sub(" ", text.lower()).split())
+
+
+def _hash64(data):
+    # Signed, so it fits an SQLite INTEGER
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little", signed=True)
+
+
+def text_hash(text, answer):
+    """
+    Returns the 64-bit hash of a question's dedup text and correct answer, used to find exact duplicates and as
+    the question's key for its ratings and answer events.
+
+    The answer is part of the hash because the dedup text drops punctuation, so "What is 10 + 5?" and
+    "What is 10 - 5?" have the same dedup text but are different questions.
+
+    Parameters:
+        text (str): The question text.
+        answer (str): The correct answer.
+    """
+    return _hash64(f"{dedup_text(text)}\0{dedup_text(answer)}".encode("utf-8"))
+
+
+def legacy_text_hash(text):
+    """
+    Returns the hash of the question text alone, as stored by banks before text_hash covered the answer.
+    """
+    return _hash64(dedup_text(text).encode("utf-8"))
+
+
+class MinHasher:
+    def __init__(self, num_permutations=NUM_PERMUTATIONS, bands=BANDS, shingle_size=SHINGLE_SIZE, seed=1):
+        """
+        Initializes a MinHash signer with locality-sensitive hashing bands, to find near-duplicate questions.
+
+        Two signatures agree in a position with a probability close to the Jaccard similarity of the two texts'
+        character shingle sets. Signatures are cut into bands; texts that share any band are candidates.
+
+        Signatures are computed with one-permutation hashing: every shingle is hashed once, the hash picks one of
+        num_permutations bins and the smallest value per bin is kept. Empty bins borrow the value of the next
+        non-empty bin. This costs one pass over the shingles instead of one pass per hash function.
+
+        Parameters:
+            num_permutations (int): The length of a signature.
+            bands (int): The number of bands. It must divide num_permutations.
+            shingle_size (int): The number of characters per shingle.
+            seed (int): The seed of the shingle hash. Stored signatures are only comparable with the same seed.
+        """
+        self.num_permutations = num_permutations
+        self.bands = bands
+        self.rows = num_permutations // bands
+        self.shingle_size = shingle_size
+        self.seed = seed
+
+    def shingle_hashes(self, text):
+        """
+        Returns the set of 32-bit hashes of the character shingles of a text.
+        """
+        data = dedup_text(text).encode("utf-8")
+        size = self.shingle_size
+        seed = self.seed
+        if len(data) <= size:
+            return {zlib.crc32(data, seed)}
+        return {zlib.crc32(data[i:i + size], seed) for i in range(len(data) - size + 1)}
+
+    def signature(self, text):
+        """
+        Returns the MinHash signature of a text, as a tuple of integers.
+        """
+        bins = self.num_permutations
+        empty = _MASK + 1
+        signature = [empty] * bins
+        for h in self.shingle_hashes(text):
+            h = (h * _MIX) & _MASK  # crc32 is linear, spread its bits before binning
+            index = h % bins
+            value = h // bins
+            if value < signature[index]:
+                signature[index] = value
+        if empty in signature:
+            filled = [i for i in range(bins) if signature[i] != empty]
+            if not filled:
+                return tuple(signature)
+            for i in range(bins):
+                if signature[i] == empty:
+                    # Borrow from the next non-empty bin, offset by the distance so borrowed values stay distinct
+                    offset = next((f - i for f in filled if f > i), filled[0] + bins - i)
+                    signature[i] = signature[(i + offset) % bins] + offset * empty
+        return tuple(signature)
+
+    def band_keys(self, signature):
+        """
+        Returns one signed 64-bit key per band of a signature.
+        """
+        rows = self.rows
+        keys = []
+        for band in range(self.bands):
+            key = band
+            for value in signature[band * rows:(band + 1) * rows]:
+                key = (key * _BAND_PRIME + value) & _MASK64
+            keys.append(key - (1 << 64) if key >= 1 << 63 else key)
+        return keys
+
+    @staticmethod
+    def similarity(signature, other):
+        """
+        Returns the estimated Jaccard similarity of the texts two signatures were made from.
+        """
+        return sum(a == b for a, b in zip(signature, other)) / len(signature)
+
+    @staticmethod
+    def to_bytes(signature):
+        return b"".join(v.to_bytes(8, "little") for v in signature)
+
+    @staticmethod
+    def from_bytes(data):
+        return tuple(int.from_bytes(data[i:i + 8], "little") for i in range(0, len(data), 8))
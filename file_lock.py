@@ -0,0 +1,30 @@
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows has no fcntl, locking is skipped there
+    fcntl = None
+
+
+@contextmanager
+def file_lock(lock_path, shared=False):
+    """
+    Holds an advisory lock on lock_path for the duration of the with block.
+
+    The lock is shared between processes, so several kiosk or server processes can safely use the same files.
+    On platforms without fcntl the block runs unlocked.
+
+    Parameters:
+        lock_path (str): The path of the lock file. It is created if it does not exist.
+        shared (bool): Take a shared (read) lock instead of an exclusive one.
+    """
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        yield
+    finally:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
@@ -0,0 +1,426 @@
+import os
+import random
+import threading
+import time
+
+from answer_events import get_event_log
+from question import questions_from_dicts
+from question_index import QuestionIndex
+from ratings import RatingTable
+from question_bank import get_question_bank, DIFFICULTIES, QUESTION_TYPES, SYNC_INTERVAL
+
+QUESTIONS_PER_DIFFICULTY = 5
+# Set QUIZ_QUESTION_PACK to the path of a compiled question pack (see question_pack.py) to serve decks from it
+# instead of the question bank
+QUESTION_PACK = os.environ.get("QUIZ_QUESTION_PACK")
+
+# Game status values
+PLAYING = 0
+OVER = 1  # A wrong answer was given or every question was answered
+FINISHED = 2  # The score was saved
+
+
+# The decks built by QuestionDeck.load, by question type: (bank revision, deck)
+_decks = {}
+_decks_lock = threading.Lock()
+
+
+class GameStateError(Exception):
+    """
+    Raised when a step is not allowed in the current state of a game (e.g. answering after the game is over).
+    """
+
+
+class QuestionDeck:
+    def __init__(self, stages, questions_per_stage=QUESTIONS_PER_DIFFICULTY):
+        """
+        Initializes an immutable deck of questions shared by every game drawn from it.
+
+        Parameters:
+            stages (list): (difficulty, questions) pairs, in the order the stages are played. Each stage asks
+                questions_per_stage questions drawn from its questions (or all of them, if it has fewer).
+            questions_per_stage (int): The number of questions asked per stage.
+        """
+        questions = []
+        ranges = []
+        for difficulty, stage_questions in stages:
+            start = len(questions)
+            questions.extend(stage_questions)
+            ranges.append((difficulty, start, len(questions)))
+        self.questions = tuple(questions)
+        self.stages = tuple(ranges)
+        self.questions_per_stage = questions_per_stage
+        self.game_length = sum(min(questions_per_stage, end - start) for _, start, end in ranges)
+        self._index = None
+        self._ratings = None
+
+    @property
+    def index(self):
+        """
+        The inverted index over the categories and texts of the deck's questions, built on first use.
+        """
+        if self._index is None:
+            self._index = QuestionIndex(self.questions)
+        return self._index
+
+    @property
+    def ratings(self):
+        """
+        The skill ratings of the deck's questions for adaptive games, loaded from the question bank on first use.
+        """
+        if self._ratings is None:
+            self._ratings = RatingTable(self.questions)
+        return self._ratings
+
+    @classmethod
+    def from_questions(cls, questions):
+        """
+        Creates a deck that asks the given questions in order, one stage per run of equal difficulty.
+
+        Parameters:
+            questions (list): Question objects.
+
+        Returns:
+            QuestionDeck: The deck.
+        """
+        stages = []
+        for question in questions:
+            if stages and stages[-1][0] == question.difficulty:
+                stages[-1][1].append(question)
+            else:
+                stages.append((question.difficulty, [question]))
+        return cls(stages, questions_per_stage=max((len(q) for _, q in stages), default=0))
+
+    @classmethod
+    def from_bank(cls, question_type, bank=None):
+        """
+        Creates a deck from every question of the given type in the question bank, staged from easy to hard.
+
+        Parameters:
+            question_type (str): "multiple", "boolean" or "mixed".
+            bank (QuestionBank, optional): The question bank to read. Defaults to the shared bank.
+
+        Returns:
+            QuestionDeck: The deck.
+        """
+        bank = bank or get_question_bank()
+        question_types = QUESTION_TYPES if question_type == "mixed" else (question_type,)
+        stages = []
+        for difficulty in DIFFICULTIES:
+            data = [q for qtype in question_types for q in bank.iter_bucket(difficulty, qtype)]
+            stages.append((difficulty, questions_from_dicts(data)))
+        return cls(stages)
+
+    @classmethod
+    def from_pack(cls, question_type, pack):
+        """
+        Creates a deck over the questions of the given type in a compiled question pack, staged from easy to hard.
+
+        No question is copied: the deck reads its questions from the memory-mapped pack when they are drawn, so
+        the deck is ready as soon as the pack is opened, whatever its size.
+
+        Parameters:
+            question_type (str): "multiple", "boolean" or "mixed".
+            pack (QuestionPack): The pack to read.
+
+        Returns:
+            QuestionDeck: The deck.
+        """
+        question_types = QUESTION_TYPES if question_type == "mixed" else (question_type,)
+        ranges = []
+        stages = []
+        start = 0
+        for difficulty in DIFFICULTIES:
+            # The pack keeps each difficulty's types next to each other, so a stage is one run of the view
+            ranges.extend(pack.bucket(difficulty, qtype) for qtype in question_types)
+            end = start + sum(pack_end - pack_start for pack_start, pack_end in ranges[-len(question_types):])
+            stages.append((difficulty, start, end))
+            start = end
+        deck = cls([])
+        deck.questions = pack.view(ranges)
+        deck.stages = tuple(stages)
+        deck.game_length = sum(min(deck.questions_per_stage, end - start) for _, start, end in stages)
+        return deck
+
+    @classmethod
+    def load(cls, question_type):
+        """
+        Returns the deck of a question type from the pack named by QUIZ_QUESTION_PACK if set, or from the
+        question bank.
+
+        Decks are built once per process and shared by every game, together with their index and ratings. A deck
+        from the bank is rebuilt when the bank's revision changed, i.e. when a bucket was imported or topped up
+        by any process; pool files are checked for changes at most once per SYNC_INTERVAL.
+        """
+        if QUESTION_PACK:
+            revision = None
+        else:
+            bank = get_question_bank()
+            bank.sync_from_files(max_age=SYNC_INTERVAL)
+            revision = bank.revision()
+        with _decks_lock:
+            cached = _decks.get(question_type)
+            if cached is not None and cached[0] == revision:
+                return cached[1]
+            if QUESTION_PACK:
+                from question_pack import open_pack
+                deck = cls.from_pack(question_type, open_pack(QUESTION_PACK))
+            else:
+                deck = cls.from_bank(question_type, bank)
+            _decks[question_type] = (revision, deck)
+            return deck
+
+    def draw(self, rng, seen=None, category=None, keywords=()):
+        """
+        Returns the deck indices of the questions of a new game, drawn without copying or shuffling the deck.
+
+        Parameters:
+            rng (random.Random): The random number generator to draw with.
+            seen (SeenFilter, optional): Questions to avoid, because the player has already seen them. They are
+                only used when a stage runs out of unseen questions within a bounded number of draws.
+            category (str, optional): Only draw questions from this category (or categories containing these
+                words), for a themed game.
+            keywords (iterable): Only draw questions whose text contains every one of these words.
+
+        Returns:
+            list: Deck indices, stage by stage. Stages without matching questions are skipped.
+        """
+        selection = []
+        k = self.questions_per_stage
+        for _, start, end in self.stages:
+            if category or keywords:
+                def draw_stage(n):
+                    return self.index.sample(rng, n, category, keywords, start, end)
+            else:
+                def draw_stage(n):
+                    return rng.sample(range(start, end), min(n, end - start))
+            if seen is None:
+                selection.extend(draw_stage(k))
+                continue
+            drawn = draw_stage(10 * k)
+            unseen = [i for i in drawn if self.questions[i].question not in seen]
+            if len(unseen) < k:
+                unseen.extend(i for i in drawn if i not in unseen)
+            selection.extend(unseen[:k])
+        return selection
+
+
+class GameState:
+    # Each live game only holds a cursor into the shared deck, so thousands of games fit in one process
+    __slots__ = ("deck", "seed", "selection", "cursor", "score", "status", "player", "rating", "length", "shown_at")
+
+    def __init__(self, deck, seed, selection, player=None, rating=None, length=None):
+        """
+        Initializes the state of one game.
+
+        Parameters:
+            deck (QuestionDeck): The shared deck the questions are drawn from.
+            seed (int): The seed the answer order is derived from.
+            selection (tuple): The deck indices of the questions to ask, in order. Its length is bounded by the
+                game length, not by the size of the deck.
+            player (str, optional): The name of the player, whose seen questions are tracked.
+            rating (float, optional): The player's skill rating, for an adaptive game. The selection then only
+                holds the questions asked so far, and the next one is chosen after each correct answer.
+            length (int, optional): The number of questions of the game. Defaults to the length of the selection.
+        """
+        self.deck = deck
+        self.seed = seed
+        self.selection = selection
+        self.cursor = 0
+        self.score = 0
+        self.status = PLAYING
+        self.player = player
+        self.rating = rating
+        self.length = len(selection) if length is None else length
+        self.shown_at = None  # When the current question was shown (time.time()), to measure the answer time
+
+    @property
+    def total_questions(self):
+        return self.length
+
+    @property
+    def question(self):
+        """
+        The current question.
+        """
+        return self.deck.questions[self.selection[self.cursor]]
+
+
+class Turn:
+    __slots__ = ("number", "total", "question", "answers", "new_stage")
+
+    def __init__(self, number, total, question, answers, new_stage):
+        """
+        A question as presented to the player.
+
+        Parameters:
+            number (int): The 1-based number of the question in the game.
+            total (int): The number of questions in the game.
+            question (Question): The question.
+            answers (list): The answers, in the order they are shown.
+            new_stage (bool): Whether this question starts a new difficulty stage.
+        """
+        self.number = number
+        self.total = total
+        self.question = question
+        self.answers = answers
+        self.new_stage = new_stage
+
+
+def start(deck, seed=None, selection=None, player=None, seen=None, category=None, keywords=(), adaptive=False):
+    """
+    Starts a new game on the deck.
+
+    An adaptive game does not follow the easy, medium and hard stages: each question is chosen by the deck's
+    skill ratings (see ratings.py) to match the player's current rating, which moves after every answer.
+
+    Parameters:
+        deck (QuestionDeck): The shared deck.
+        seed (int, optional): The seed of the game, for reproducible games. Random if not given.
+        selection (list, optional): Deck indices of the questions to ask. Drawn at random from the deck if not given.
+        player (str, optional): The name of the player.
+        seen (SeenFilter, optional): The questions the player has already seen, avoided in the draw.
+        category (str, optional): Only draw questions from this category, for a themed game.
+        keywords (iterable): Only draw questions containing every one of these words.
+        adaptive (bool): Choose the questions by skill rating. The seen, category and keywords filters do not
+            apply to adaptive games.
+
+    Returns:
+        GameState: The new game.
+    """
+    if seed is None:
+        seed = random.getrandbits(64)
+    if adaptive:
+        rating = deck.ratings.player_rating(player)
+        first = deck.ratings.choose(random.Random(seed), rating)
+        state = GameState(deck, seed, () if first is None else (first,), player, rating, deck.game_length)
+        if first is None or state.total_questions == 0:
+            state.status = OVER
+        return state
+    if selection is None:
+        selection = deck.draw(random.Random(seed), seen, category, keywords)
+    state = GameState(deck, seed, tuple(selection), player)
+    if state.total_questions == 0:
+        state.status = OVER
+    return state
+
+
+def next_question(state):
+    """
+    Returns the current question of the game. Calling it again before answering returns the same question,
+    with the answers in the same order.
+
+    Parameters:
+        state (GameState): The game.
+
+    Returns:
+        Turn: The current question.
+
+    Raises:
+        GameStateError: If the game is over.
+    """
+    if state.status != PLAYING:
+        raise GameStateError("The game is over.")
+    questions = state.deck.questions
+    question = questions[state.selection[state.cursor]]
+    answers = list(question.incorrect_answers)
+    answers.append(question.correct_answer)
+    # The answer order is derived from the seed, so it does not have to be stored between steps
+    random.Random(state.seed + state.cursor).shuffle(answers)
+    new_stage = state.cursor == 0 or question.difficulty != questions[state.selection[state.cursor - 1]].difficulty
+    return Turn(state.cursor + 1, state.total_questions, question, answers, new_stage)
+
+
+def answer(state, choice):
+    """
+    Answers the current question.
+
+    Parameters:
+        state (GameState): The game.
+        choice (int): The 0-based index of the chosen answer in Turn.answers.
+
+    Returns:
+        dict: 'correct', 'correct_answer', 'points' (earned by this answer), 'score' and 'game_over', plus the
+            player's new 'rating' in an adaptive game.
+
+    Raises:
+        GameStateError: If the game is over.
+        ValueError: If the choice is not a valid answer index.
+    """
+    turn = next_question(state)
+    if not 0 <= choice < len(turn.answers):
+        raise ValueError(f"The answer must be between 1 and {len(turn.answers)}.")
+    question = turn.question
+    chosen = turn.answers[choice]
+    correct = question.check_answer(chosen)
+    event_log = get_event_log()
+    if event_log is not None:
+        latency = None if state.shown_at is None else time.time() - state.shown_at
+        event_log.record(question, chosen, correct, latency, state.player)
+    state.shown_at = None
+    ratings = state.deck.ratings if state.rating is not None else None
+    if ratings is not None:
+        state.rating = ratings.update(state.selection[state.cursor], state.rating, correct)
+    points = 0
+    if correct:
+        points = question.calculate_points()
+        state.score += points
+        state.cursor += 1
+        if state.cursor == state.total_questions:
+            state.status = OVER
+        elif ratings is not None:
+            following = ratings.choose(random.Random(state.seed ^ (state.cursor << 64)), state.rating,
+                                       exclude=state.selection)
+            if following is None:
+                state.length = state.cursor  # Every question of the deck was asked
+                state.status = OVER
+            else:
+                state.selection += (following,)
+    else:
+        state.status = OVER
+    result = {
+        "correct": correct,
+        "correct_answer": question.correct_answer,
+        "points": points,
+        "score": state.score,
+        "game_over": state.status == OVER,
+    }
+    if ratings is not None:
+        result["rating"] = round(state.rating)
+        if state.status == OVER:
+            ratings.save(state.player, state.rating)
+    return result
+
+
+def asked_questions(state):
+    """
+    Returns the questions of the game that were shown to the player so far.
+    """
+    asked = state.cursor + (state.status == PLAYING or state.cursor < state.total_questions)
+    return [state.deck.questions[i] for i in state.selection[:asked]]
+
+
+def finish(state, player_name, score_manager):
+    """
+    Saves the final score of a game that is over.
+
+    Parameters:
+        state (GameState): The game.
+        player_name (str): The name to save the score under.
+        score_manager (ScoreManager): The score manager to save the score with.
+
+    Returns:
+        dict: 'score', 'rank' and 'percentile' of the player.
+
+    Raises:
+        GameStateError: If the game is still being played or was already finished.
+    """
+    if state.status != OVER:
+        raise GameStateError("The game is not over yet." if state.status == PLAYING else "The game was already saved.")
+    score_manager.update_high_scores(player_name, state.score)
+    state.status = FINISHED
+    return {
+        "score": state.score,
+        "rank": score_manager.get_rank(player_name),
+        "percentile": score_manager.get_percentile(state.score),
+    }
@@ -0,0 +1,161 @@
+from bisect import bisect_left, insort
+from typing import Dict, Iterator, List, Optional
+
+
+class _FenwickTree:
+    def __init__(self):
+        """
+        Initializes a Fenwick (binary indexed) tree counting how many players hold each score.
+
+        The tree is indexed by the rank of a score among the distinct scores it has seen, not by the score
+        itself, so its size depends on the number of distinct scores and not on how high they are. A score seen
+        for the first time changes the ranks; the tree is then rebuilt from the counts on the next query, once
+        for any number of new scores (e.g. when the high scores are loaded). Otherwise adding a score and
+        counting the players below a score are both O(log n).
+        """
+        self._scores: List[int] = []  # Every distinct score seen, in ascending order
+        self._counts: Dict[int, int] = {}
+        self._tree: Optional[List[int]] = None  # None until rebuilt after a new score
+
+    def add(self, score: int, delta: int) -> None:
+        """
+        Adds delta to the number of players holding the given score.
+        """
+        count = self._counts.get(score)
+        if count is None:
+            self._counts[score] = delta
+            self._tree = None
+            return
+        self._counts[score] = count + delta  # Scores nobody holds any more keep their rank, with a zero count
+        if self._tree is not None:
+            i = bisect_left(self._scores, score) + 1
+            while i < len(self._tree):
+                self._tree[i] += delta
+                i += i & -i
+
+    def count_below(self, score: int) -> int:
+        """
+        Returns the number of players with a score strictly lower than the given score.
+        """
+        if self._tree is None:
+            self._rebuild()
+        i = bisect_left(self._scores, score)
+        total = 0
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def _rebuild(self) -> None:
+        self._counts = {score: count for score, count in self._counts.items() if count}
+        self._scores = sorted(self._counts)
+        tree = [0] * (len(self._scores) + 1)
+        for i, score in enumerate(self._scores, 1):
+            tree[i] += self._counts[score]
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+
+
+class Leaderboard:
+    def __init__(self):
+        """
+        Initializes an empty leaderboard indexed by player name and by score.
+
+        Players are looked up by name in a dictionary and grouped in per-score buckets that keep insertion order.
+        A Fenwick tree over the ranks of the distinct scores answers rank and percentile queries, so updates and
+        queries are O(log n) and the top k players can be read without sorting the whole table.
+        """
+        self._entries: Dict[str, Dict] = {}
+        self._buckets: Dict[int, Dict[str, Dict]] = {}
+        self._scores: List[int] = []  # Distinct scores in ascending order
+        self._tree = _FenwickTree()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[Dict]:
+        """
+        Iterates over every entry, from the highest score to the lowest.
+        """
+        for score in reversed(self._scores):
+            yield from self._buckets[score].values()
+
+    def get(self, player_name: str) -> Optional[Dict]:
+        """
+        Returns the entry of a player, or None if the player is not on the leaderboard.
+        """
+        return self._entries.get(player_name)
+
+    def _insert(self, entry: Dict) -> None:
+        score = entry["score"]
+        bucket = self._buckets.get(score)
+        if bucket is None:
+            bucket = self._buckets[score] = {}
+            insort(self._scores, score)
+        bucket[entry["name"]] = entry
+        self._tree.add(score, 1)
+
+    def _remove(self, entry: Dict) -> None:
+        score = entry["score"]
+        bucket = self._buckets[score]
+        del bucket[entry["name"]]
+        if not bucket:
+            del self._buckets[score]
+            del self._scores[bisect_left(self._scores, score)]
+        self._tree.add(score, -1)
+
+    def update(self, player_name: str, score: int, date: str) -> bool:
+        """
+        Records a score for a player, keeping only the player's best score.
+
+        Parameters:
+            player_name (str): The name of the player.
+            score (int): The score of the player.
+            date (str): The date the score was achieved.
+
+        Returns:
+            bool: True if the leaderboard changed, False if the player already had a higher or equal score.
+        """
+        entry = self._entries.get(player_name)
+        if entry is not None:
+            if score <= entry["score"]:
+                return False
+            self._remove(entry)
+            entry["score"] = score
+            entry["date"] = date
+        else:
+            entry = self._entries[player_name] = {"name": player_name, "score": score, "date": date}
+        self._insert(entry)
+        return True
+
+    def top(self, k: int) -> List[Dict]:
+        """
+        Returns the k entries with the highest scores, in descending order.
+        """
+        result = []
+        for entry in self:
+            if len(result) == k:
+                break
+            result.append(entry)
+        return result
+
+    def rank(self, player_name: str) -> Optional[int]:
+        """
+        Returns the rank of a player (1 is the best), or None if the player is not on the leaderboard.
+
+        Players with the same score share the same rank.
+        """
+        entry = self._entries.get(player_name)
+        if entry is None:
+            return None
+        return len(self._entries) - self._tree.count_below(entry["score"] + 1) + 1
+
+    def percentile(self, score: int) -> float:
+        """
+        Returns the percentage of players on the leaderboard with a lower score than the given score.
+        """
+        if not self._entries:
+            return 100.0
+        return 100.0 * self._tree.count_below(score) / len(self._entries)
@@ -1,24 +1,26 @@
 from main_menu import Menu
 from score_manager import ScoreManager
-from quiz_game import QuizGame
-from api import get_random_questions
-from question import Question
-import time
+import logging
+import os
 from utils import getch, clear_screen  # Importing the functions from utils.py
+from renderer import get_renderer
+import assets
+import answer_events
+import metrics
+import memory_profile
+
+# The game modules (and with them the HTTP client) are imported when the first game starts, not at startup,
+# so the menu shows up as soon as possible
 
 def print_slow(text, delay=0.005): #Here the time of the animation can be adjusted
     """
-    Print each character of the text with a delay.
+    Print each character of the text with a delay, paced by the renderer's animation profile.
     
     Parameters:
         text (str): The text to print.
         delay (float): The delay (in seconds) between printing each character. Default is 0.005 seconds.
     """
-    for line in text.splitlines():
-        for char in line:
-            print(char, end='', flush=True)
-            time.sleep(delay)
-        print()  # Move to the next line after printing the entire line
+    get_renderer().animate("".join(f"{line}\n" for line in text.splitlines()), delay)
 
 def print_ascii_art(file_path):
     """
@@ -27,9 +29,53 @@ def print_ascii_art(file_path):
     Parameters:
         file_path (str): The path to the ASCII art file.
     """
-    with open(file_path, 'r') as file:
-        ascii_art = file.read()
-    print(ascii_art)
+    print(assets.get_asset(file_path))
+
+def get_themed_questions():
+    """
+    Asks the player for a category and an optional keyword, and draws the questions of a themed game.
+
+    Questions of both types are drawn from the question bank through the deck's category and keyword index
+    (see question_index.py), from easy to hard.
+
+    Returns:
+        list: The Question objects of the game, or an empty list if no question matches the theme.
+    """
+    import random
+    from game_engine import QuestionDeck
+
+    deck = QuestionDeck.load("mixed")
+    categories = deck.index.categories()
+    print("Choose a category:")
+    for number, (category, count) in enumerate(categories, start=1):
+        print(f"{number}. {category} ({count} questions)")
+    category_choice = input("Your choice (or press Enter for any category): ").strip()
+    category = None
+    if category_choice.isdigit() and 1 <= int(category_choice) <= len(categories):
+        category = categories[int(category_choice) - 1][0]
+    elif category_choice:
+        category = category_choice  # A word such as "science" matches every category containing it
+    keywords = input("Keyword the questions must contain (optional, e.g. planet): ").split()
+    return [deck.questions[i] for i in deck.draw(random.Random(), category=category, keywords=keywords)]
+
+def get_adaptive_game(score_manager):
+    """
+    Asks the player for their name and sets up an adaptive game on the mixed question deck.
+
+    Parameters:
+        score_manager (ScoreManager): The score manager to save the score with.
+
+    Returns:
+        QuizGame: The game, with questions chosen by the player's skill rating.
+    """
+    from game_engine import QuestionDeck
+    from quiz_game import QuizGame
+
+    player = ""
+    while not player:
+        player = input("Enter your name (your skill rating is kept under it): ").strip()
+    # The deck and its ratings are cached by QuestionDeck.load, so only the first game loads them
+    return QuizGame([], score_manager, adaptive_deck=QuestionDeck.load("mixed"), player=player)
 
 def main():
     """
@@ -43,24 +89,37 @@ def main():
     Returns:
         None
     """
-    menu = Menu('menu.txt', 'instructions.txt')
-    score_manager = ScoreManager("high_scores.csv")
+    # Set up logging for debugging purposes, but default to WARNING to reduce verbosity
+    logging.basicConfig(level=logging.WARNING)
+    memory_profile.start()  # Set QUIZ_MEMORY_PROFILE=1 to snapshot allocations per game phase
+    with metrics.span("main.startup"):  # Set QUIZ_METRICS=1 to time startup and games, see metrics.py
+        assets.preload()  # Read every screen once, so no screen touches the disk later
+        answer_events.start_event_log()  # Every answer is logged in the background, see answer_stats.py
+        menu = Menu('menu.txt', 'instructions.txt')
+        score_manager = ScoreManager("high_scores.csv")
+    memory_profile.checkpoint("startup")
     first_display = True # To print ASCII art only once
 
-    # Read the ASCII art file content once
-    with open('ascii_art_title.txt', 'r') as file:
-        ascii_art = file.read()
+    # Keep the question pools topped up in the background when a low-water mark is configured
+    refill_worker = None
+    low_water_mark = int(os.environ.get("QUIZ_LOW_WATER_MARK", "0"))
+    if low_water_mark > 0:
+        from refill_worker import RefillWorker
+        refill_worker = RefillWorker(low_water_mark=low_water_mark)
+        refill_worker.start()
 
-    while True:
-        clear_screen()  # Clear the screen before displaying the menu
+    ascii_art = assets.get_asset('ascii_art_title.txt')
 
+    while True:
         # To print ASCII art, but making sure it only prints the first time
         if first_display:
+            clear_screen()  # Clear the screen before displaying the menu
             print_slow(ascii_art)
+            menu.display()
             first_display = False
         else:
-            print(ascii_art)
-        menu.display()
+            # Only the lines that changed since the menu was last drawn are rewritten
+            get_renderer().draw_frame((ascii_art + menu.get_content()).splitlines())
 
         choice = menu.get_choice()
 
@@ -68,37 +127,65 @@ def main():
 
         if choice == "1":
             question_type = None
-            while question_type not in ["multiple", "boolean"]:
+            while question_type not in ["multiple", "boolean", "mixed", "themed", "adaptive"]:
                 clear_screen()  # Clear the screen before displaying question type choices
                 print("Choose question type:")
                 print("1. Multiple Choice Questions (MCQ)")
                 print("2. True or False (T or F)")
-                print("3. Go back to the main menu")
+                print("3. Mixed (MCQ and T or F)")
+                print("4. Themed game (pick a category or keyword)")
+                print("5. Adaptive game (questions follow your skill rating)")
+                print("6. Go back to the main menu")
                 question_type_choice = input("Your choice: ").strip().lower()
                 if question_type_choice == "1":
                     question_type = "multiple"
                 elif question_type_choice == "2":
                     question_type = "boolean"
                 elif question_type_choice == "3":
+                    question_type = "mixed"
+                elif question_type_choice == "4":
+                    question_type = "themed"
+                elif question_type_choice == "5":
+                    question_type = "adaptive"
+                elif question_type_choice == "6":
                     break  # Go back to the main menu
                 else:
-                    print("Invalid choice. Please choose 1, 2, or 3.")
+                    print("Invalid choice. Please choose 1, 2, 3, 4, 5, or 6.")
                     getch()  # Wait for a key press before clearing the screen
                     clear_screen()  # Clear the screen after invalid choice
                     continue
                 clear_screen()  # Clear the screen after valid choice
 
-            if question_type:
-                questions_data = get_random_questions(question_type)
-                questions = [Question(
-                    question_type=q['type'], 
-                    difficulty=q['difficulty'], 
-                    category=q['category'], 
-                    question=q['question'], 
-                    correct_answer=q['correct_answer'], 
-                    incorrect_answers=q['incorrect_answers']
-                ) for q in questions_data]
+            if question_type == "adaptive":
+                with metrics.span("main.start_game"):
+                    quiz_game = get_adaptive_game(score_manager)
+                memory_profile.checkpoint("game start")
+                clear_screen()  # Clear the screen before starting the quiz game
+                quiz_game.play()
+            elif question_type == "themed":
+                from quiz_game import QuizGame
+                questions = get_themed_questions()
+                memory_profile.checkpoint("pool load")
+                if not questions:
+                    print("No questions match that theme. Press any key to return to the main menu")
+                    getch()
+                    continue
                 quiz_game = QuizGame(questions, score_manager)
+                memory_profile.checkpoint("game start")
+                clear_screen()  # Clear the screen before starting the quiz game
+                quiz_game.play()
+            elif question_type:
+                from api import get_random_questions
+                from question import questions_from_dicts
+                from quiz_game import QuizGame
+                # Asked before drawing, so the questions this player has already seen are avoided
+                player = input("Enter your name to skip questions you have seen (optional): ").strip() or None
+                with metrics.span("main.start_game"):
+                    questions_data = get_random_questions(question_type, player=player)
+                    memory_profile.checkpoint("pool load")
+                    questions = questions_from_dicts(questions_data)
+                    quiz_game = QuizGame(questions, score_manager, player=player)
+                memory_profile.checkpoint("game start")
                 clear_screen()  # Clear the screen before starting the quiz game
                 quiz_game.play()
         elif choice == "2":
@@ -117,11 +204,19 @@ def main():
         elif choice == "4":
             clear_screen()  # Clear the screen before displaying the end screen
             print_ascii_art('end_screen.txt')
+            if refill_worker is not None:
+                refill_worker.stop()
+            score_manager.close()  # Commit any scores still waiting in the journal
+            answer_events.stop_event_log()
+            if metrics.enabled:
+                metrics.write_report()
+            if memory_profile.enabled:
+                memory_profile.profile.write_report()
+                print(memory_profile.profile.format_report())
             break
         else:
             print("Make sure to pick a number from 1 - 4.")
-            getch()  # Wait for a key press before clearing the screen
-            clear_screen()  # Clear the screen after invalid choice
+            getch()  # Wait for a key press before redrawing the menu
 
 if __name__ == "__main__":
     main()
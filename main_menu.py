@@ -1,3 +1,5 @@
+from assets import get_asset
+
 class Menu:
     def __init__(self, menu_file, instructions_file):
         """
@@ -14,8 +16,8 @@ class Menu:
         """
         Displays the content of the menu file.
 
-        This function opens the menu file specified during the initialization of the Menu class and reads its content. 
-        It then prints the content to the console.
+        This function gets the content of the menu file specified during the initialization of the Menu class from the asset cache,
+        so the file is only read once. It then prints the content to the console.
 
         Parameters:
             self (Menu): The current instance of the Menu class.
@@ -23,15 +25,22 @@ class Menu:
         Returns:
             None
         """
-        with open(self.menu_file, 'r') as file:
-            menu_content = file.read()
-        print(menu_content)
+        print(self.get_content())
+
+    def get_content(self):
+        """
+        Returns the content of the menu file, read once and then served from the asset cache.
+
+        Returns:
+            str: The menu text.
+        """
+        return get_asset(self.menu_file)
 
     def display_instructions(self):
         """
         Displays the instructions content from the instructions file.
 
-        This function opens the instructions file specified during the initialization of the Menu class and reads its content. 
+        This function gets the content of the instructions file specified during the initialization of the Menu class from the asset cache.
         It then prints the content to the console.
 
         Parameters:
@@ -40,9 +49,7 @@ class Menu:
         Returns:
             None
         """
-        with open(self.instructions_file, 'r') as file:
-            instructions_content = file.read()
-        print(instructions_content)
+        print(get_asset(self.instructions_file))
 
     def get_choice(self):
         """
@@ -0,0 +1,145 @@
+import json
+import linecache
+import logging
+import os
+import tracemalloc
+
+# Set QUIZ_MEMORY_PROFILE=1 to snapshot allocations at every phase of the game (startup, pool load, game start,
+# each question, score save). Tracing slows Python down noticeably, so it is meant for testing, not for play.
+enabled = os.environ.get("QUIZ_MEMORY_PROFILE", "").lower() not in ("", "0", "off", "false", "no")
+DEFAULT_REPORT_FILE = "memory_profile.json"
+TRACE_FRAMES = 1  # Frames kept per allocation; more gives longer tracebacks at a higher cost
+TOP_SITES = 10
+
+_FILTERS = (
+    tracemalloc.Filter(False, __file__),  # The checkpoints themselves
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, linecache.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+)
+
+
+class MemoryProfile:
+    def __init__(self, top=TOP_SITES):
+        """
+        Initializes a recorder of allocation snapshots taken at phase boundaries.
+
+        Each checkpoint keeps the traced memory in use and its peak since the previous checkpoint, the top
+        allocation sites by size and the sites that grew (or shrank) the most since the previous checkpoint.
+        Only the last snapshot is held, so a long session does not pile up snapshots.
+
+        Parameters:
+            top (int): The number of allocation sites listed per checkpoint.
+        """
+        self.top = top
+        self.checkpoints = []
+        self._previous = None
+
+    def start(self):
+        """
+        Starts tracing allocations, if not already started.
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACE_FRAMES)
+
+    def checkpoint(self, phase):
+        """
+        Takes an allocation snapshot and records it under the given phase name.
+
+        Parameters:
+            phase (str): The name of the phase that just ended, e.g. "startup" or "question 3".
+
+        Returns:
+            dict: The recorded checkpoint.
+        """
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        snapshot = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+        entry = {
+            "phase": phase,
+            "current_bytes": current,
+            "peak_bytes": peak,
+            "top_sites": [_site(stat.traceback, stat.size, stat.count)
+                          for stat in snapshot.statistics("lineno")[:self.top]],
+        }
+        if self._previous is not None:
+            entry["growth_bytes"] = current - self.checkpoints[-1]["current_bytes"]
+            entry["top_diffs"] = [_site(stat.traceback, stat.size_diff, stat.count_diff)
+                                  for stat in snapshot.compare_to(self._previous, "lineno")[:self.top]
+                                  if stat.size_diff]
+        self._previous = snapshot
+        self.checkpoints.append(entry)
+        logging.info(f"Memory after {phase}: {current / 1024:.0f} KiB in use, peak {peak / 1024:.0f} KiB")
+        return entry
+
+    def format_report(self):
+        """
+        Returns a plain text summary: memory per phase, and the sites that grew most in each phase.
+        """
+        lines = []
+        for entry in self.checkpoints:
+            growth = entry.get("growth_bytes")
+            change = "" if growth is None else f" ({growth / 1024:+.0f} KiB)"
+            lines.append(f"{entry['phase']}: {entry['current_bytes'] / 1024:.0f} KiB in use{change}, "
+                         f"peak {entry['peak_bytes'] / 1024:.0f} KiB")
+            for site in entry.get("top_diffs", entry["top_sites"])[:3]:
+                lines.append(f"    {site['size_bytes'] / 1024:+9.1f} KiB {site['count']:+7d} blocks  {site['site']}")
+        return "\n".join(lines)
+
+    def write_report(self, path=None):
+        """
+        Writes every checkpoint as JSON.
+
+        Parameters:
+            path (str, optional): The file to write. Defaults to QUIZ_MEMORY_PROFILE_FILE, or memory_profile.json.
+        """
+        path = path or os.environ.get("QUIZ_MEMORY_PROFILE_FILE", DEFAULT_REPORT_FILE)
+        with open(path, "w") as file:
+            json.dump({"frames": TRACE_FRAMES, "checkpoints": self.checkpoints}, file, indent=2)
+
+
+def _site(traceback, size, count):
+    frame = traceback[0]
+    return {"site": f"{frame.filename}:{frame.lineno}", "size_bytes": size, "count": count}
+
+
+profile = MemoryProfile()
+
+
+def start():
+    """
+    Starts tracing allocations if QUIZ_MEMORY_PROFILE is set.
+    """
+    if enabled:
+        profile.start()
+
+
+def checkpoint(phase):
+    """
+    Records an allocation snapshot for the phase if QUIZ_MEMORY_PROFILE is set.
+    """
+    if enabled:
+        profile.checkpoint(phase)
+
+
+def measure(function):
+    """
+    Calls function with allocation tracing on, and returns its result with the number of bytes it allocated and
+    still held when it returned (its result included). Used by the benchmarks to catch memory regressions.
+
+    Returns:
+        tuple: (result, retained bytes, peak bytes).
+    """
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start(TRACE_FRAMES)
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        result = function()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+    return result, current - before, peak - before
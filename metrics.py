@@ -0,0 +1,198 @@
+import json
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+
+# Upper bounds (in seconds) of the duration histogram buckets, as in a Prometheus histogram
+BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+# Set QUIZ_METRICS=1 to collect metrics. It is read once at import: functions decorated with timed() are left
+# untouched when metrics are off, so they cost nothing.
+enabled = os.environ.get("QUIZ_METRICS", "").lower() not in ("", "0", "off", "false", "no")
+DEFAULT_METRICS_FILE = "metrics.json"
+
+
+class _Timer:
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)  # The last bucket counts durations above the largest bound
+
+
+class Registry:
+    def __init__(self):
+        """
+        Initializes a store of named timers and counters for this process.
+
+        A timer keeps the count, total and maximum of the durations it observed and a histogram over BUCKETS.
+        A counter is a running total. Names are dotted, e.g. "api.request" or "question.cache_hits".
+        """
+        self._timers = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds):
+        """
+        Adds a duration to a timer.
+        """
+        with self._lock:
+            timer = self._timers.get(name)
+            if timer is None:
+                timer = self._timers[name] = _Timer()
+            timer.count += 1
+            timer.total += seconds
+            if seconds > timer.max:
+                timer.max = seconds
+            timer.buckets[bisect_left(BUCKETS, seconds)] += 1
+
+    def increment(self, name, amount=1):
+        """
+        Adds to a counter.
+        """
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def reset(self):
+        """
+        Drops every timer and counter.
+        """
+        with self._lock:
+            self._timers.clear()
+            self._counters.clear()
+
+    def snapshot(self):
+        """
+        Returns every timer and counter as a dictionary that can be dumped as JSON.
+        """
+        with self._lock:
+            timers = {
+                name: {
+                    "count": timer.count,
+                    "total_seconds": timer.total,
+                    "mean_seconds": timer.total / timer.count,
+                    "max_seconds": timer.max,
+                    "buckets": {str(bound): count for bound, count in zip(BUCKETS + ("+Inf",), timer.buckets)},
+                }
+                for name, timer in sorted(self._timers.items())
+            }
+            counters = dict(sorted(self._counters.items()))
+        return {"timestamp": time.time(), "timers": timers, "counters": counters}
+
+    def to_prometheus(self, prefix="quiz_"):
+        """
+        Returns every timer and counter in the Prometheus text exposition format. Timers become histograms
+        named <prefix><name>_seconds, counters <prefix><name>_total.
+        """
+        lines = []
+        snapshot = self.snapshot()
+        for name, timer in snapshot["timers"].items():
+            metric = f"{prefix}{_metric_name(name)}_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, count in timer["buckets"].items():
+                cumulative += count
+                lines.append(f'{metric}_bucket{{le="{bound}"}} {cumulative}')
+            lines.append(f"{metric}_sum {timer['total_seconds']}")
+            lines.append(f"{metric}_count {timer['count']}")
+        for name, value in snapshot["counters"].items():
+            metric = f"{prefix}{_metric_name(name)}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _metric_name(name):
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+registry = Registry()
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        registry.observe(self.name, time.perf_counter() - self.start)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name):
+    """
+    Returns a context manager that times its block under the given name, or a shared no-op when metrics are off.
+
+    Example:
+        with metrics.span("api.request"):
+            response = session.get(url)
+    """
+    return _Span(name) if enabled else _NULL_SPAN
+
+
+def timed(name):
+    """
+    Decorates a function to time every call under the given name. When metrics are off, the function is
+    returned as it is.
+    """
+    def decorate(function):
+        if not enabled:
+            return function
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                registry.observe(name, time.perf_counter() - start)
+
+        return wrapper
+
+    return decorate
+
+
+def increment(name, amount=1):
+    """
+    Adds to the counter with the given name, if metrics are on.
+    """
+    if enabled:
+        registry.increment(name, amount)
+
+
+def write_report(path=None):
+    """
+    Writes the collected metrics to a file: in the Prometheus text format if its name ends in .prom, as JSON
+    otherwise.
+
+    Parameters:
+        path (str, optional): The file to write. Defaults to QUIZ_METRICS_FILE, or metrics.json.
+    """
+    path = path or os.environ.get("QUIZ_METRICS_FILE", DEFAULT_METRICS_FILE)
+    with open(path, "w") as file:
+        if path.endswith(".prom"):
+            file.write(registry.to_prometheus())
+        else:
+            json.dump(registry.snapshot(), file, indent=2)
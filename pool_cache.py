@@ -0,0 +1,120 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import metrics
+from rate_limiter import SingleFlight
+
+
+class _PoolEntry:
+    __slots__ = ("questions", "mtime", "size", "checked_at")
+
+    def __init__(self, questions, mtime, size, checked_at):
+        self.questions = questions
+        self.mtime = mtime
+        self.size = size
+        self.checked_at = checked_at
+
+
+def _file_signature(filename):
+    """
+    Returns the (mtime, size) of a file, or (None, None) if it does not exist.
+    """
+    try:
+        stat = os.stat(filename)
+    except FileNotFoundError:
+        return None, None
+    return stat.st_mtime, stat.st_size
+
+
+class PoolCache:
+    def __init__(self, max_questions=200_000, check_interval=5.0):
+        """
+        Initializes an in-process cache of question pools keyed by (difficulty, question_type).
+
+        A cached pool is reused until the modification time or size of its file changes. The file is stat'ed at
+        most once every check_interval seconds per pool, so back-to-back games are served from memory.
+        When the cached pools hold more than max_questions questions in total, the least recently used pools
+        are evicted.
+
+        Parameters:
+            max_questions (int): The memory budget of the cache, in questions.
+            check_interval (float): The minimum number of seconds between two checks of the same file.
+        """
+        self.max_questions = max_questions
+        self.check_interval = check_interval
+        self._pools = OrderedDict()
+        self._total = 0
+        self._lock = threading.Lock()
+        self._loads = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, filename, loader):
+        """
+        Returns the cached pool for key, calling loader() to (re)load it if it is missing or its file changed.
+
+        The returned list is shared between callers and must not be modified.
+
+        Parameters:
+            key (tuple): The (difficulty, question_type) of the pool.
+            filename (str): The file the pool is stored in.
+            loader (callable): A function without arguments that returns the pool as a list.
+
+        Returns:
+            list: The questions of the pool.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._pools.get(key)
+            if entry is not None:
+                if now - entry.checked_at < self.check_interval:
+                    self._pools.move_to_end(key)
+                    self.hits += 1
+                    metrics.increment("pool_cache.hits")
+                    return entry.questions
+                mtime, size = _file_signature(filename)
+                if mtime == entry.mtime and size == entry.size:
+                    entry.checked_at = now
+                    self._pools.move_to_end(key)
+                    self.hits += 1
+                    metrics.increment("pool_cache.hits")
+                    return entry.questions
+                logging.info(f"Pool file changed, reloading: {filename}")
+            self.misses += 1
+            metrics.increment("pool_cache.misses")
+
+        # Load outside the lock so a slow reload does not block readers of other pools. Concurrent misses for the
+        # same pool wait for one load instead of each loading it.
+        questions = self._loads.do(key, loader)
+        mtime, size = _file_signature(filename)
+        with self._lock:
+            # Swap the new pool in as a whole so readers never see a partially loaded pool
+            old = self._pools.pop(key, None)
+            if old is not None:
+                self._total -= len(old.questions)
+            self._pools[key] = _PoolEntry(questions, mtime, size, time.monotonic())
+            self._total += len(questions)
+            self._evict()
+        return questions
+
+    def _evict(self):
+        while self._total > self.max_questions and len(self._pools) > 1:
+            key, entry = self._pools.popitem(last=False)
+            self._total -= len(entry.questions)
+            logging.info(f"Evicted pool {key} from the cache")
+
+    def invalidate(self, key=None):
+        """
+        Drops one cached pool, or every cached pool if key is None.
+        """
+        with self._lock:
+            if key is None:
+                self._pools.clear()
+                self._total = 0
+            else:
+                entry = self._pools.pop(key, None)
+                if entry is not None:
+                    self._total -= len(entry.questions)
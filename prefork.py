@@ -0,0 +1,240 @@
+import gc
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+from multiprocessing.managers import BaseManager
+
+from werkzeug.serving import make_server
+
+import answer_events
+from game_engine import GameState, QuestionDeck
+import question_bank
+from score_manager import ScoreManager
+from server import SessionStore, create_app
+
+QUESTION_TYPES = ("multiple", "boolean", "mixed")
+
+# Objects living in the owner process, created on first use
+_owned = {}
+_owned_lock = threading.Lock()
+
+
+class ScoreOwner:
+    def __init__(self, high_score_file):
+        """
+        Initializes the single owner of the high scores, shared by every worker through a manager proxy.
+
+        The manager serves each worker connection from its own thread, so every call is serialized here.
+
+        Parameters:
+            high_score_file (str): The file path of the high score file.
+        """
+        self._score_manager = ScoreManager(high_score_file)
+        self._lock = threading.Lock()
+
+    def update_high_scores(self, player_name, score):
+        with self._lock:
+            self._score_manager.update_high_scores(player_name, score)
+
+    def get_rank(self, player_name):
+        with self._lock:
+            return self._score_manager.get_rank(player_name)
+
+    def get_percentile(self, score):
+        with self._lock:
+            return self._score_manager.get_percentile(score)
+
+    def get_top_scores(self, count):
+        with self._lock:
+            return self._score_manager.get_top_scores(count)
+
+    def close(self):
+        with self._lock:
+            self._score_manager.close()
+
+
+def _get_owned(name, factory, *args):
+    with _owned_lock:
+        if name not in _owned:
+            _owned[name] = factory(*args)
+        return _owned[name]
+
+
+def _score_owner(high_score_file):
+    return _get_owned("scores", ScoreOwner, high_score_file)
+
+
+def _session_store(ttl, max_sessions):
+    return _get_owned("sessions", SessionStore, ttl, max_sessions)
+
+
+class OwnerManager(BaseManager):
+    """
+    Runs the process that owns the state every worker writes to: the high scores and the live games.
+    """
+
+
+OwnerManager.register("scores", callable=_score_owner)
+OwnerManager.register("sessions", callable=_session_store)
+
+
+class SharedSessionStore:
+    def __init__(self, store, decks):
+        """
+        Initializes a worker's view of the live games kept by the owner process.
+
+        Games are stored as plain tuples that refer to their deck by question type, since every worker holds
+        its own (copy-on-write shared) copy of the decks. Any worker can therefore serve any step of any game.
+
+        A game is only read and written through checkout() and checkin(), which the owner serializes per game,
+        so two workers never both change the same game. Every request on a game thus makes two round trips to the
+        single owner process.
+
+        Parameters:
+            store: A proxy of the owner's SessionStore.
+            decks (dict): The shared decks by question type.
+        """
+        self._store = store
+        self._decks = decks
+        self._deck_types = {id(deck): question_type for question_type, deck in decks.items()}
+
+    def _pack(self, state):
+        return (self._deck_types[id(state.deck)], state.seed, state.selection, state.cursor, state.score,
+                state.status, state.player, state.rating, state.length, state.shown_at)
+
+    def _unpack(self, record):
+        question_type, seed, selection, cursor, score, status, player, rating, length, shown_at = record
+        state = GameState(self._decks[question_type], seed, selection, player, rating, length)
+        state.shown_at = shown_at
+        state.cursor = cursor
+        state.score = score
+        state.status = status
+        return state
+
+    def create(self, state):
+        return self._store.create(self._pack(state))
+
+    def checkout(self, game_id):
+        record = self._store.checkout(game_id)
+        return None if record is None else self._unpack(record)
+
+    def checkin(self, game_id, state):
+        self._store.checkin(game_id, self._pack(state))
+
+    def remove(self, game_id):
+        self._store.remove(game_id)
+
+
+def load_decks(question_types=QUESTION_TYPES):
+    """
+    Loads the deck of every question type and moves them out of the reach of the garbage collector.
+
+    Called in the parent before forking, so the workers share the decks' memory pages copy-on-write instead of
+    each loading its own copy. gc.freeze() keeps collections in the workers from writing to those pages.
+
+    Returns:
+        dict: The decks by question type.
+    """
+    decks = {question_type: QuestionDeck.load(question_type) for question_type in question_types}
+    for deck in decks.values():
+        deck.index  # Build the category and keyword index before forking too
+        deck.ratings  # And load the skill ratings; each worker then updates its own copy and saves its changes
+    gc.collect()
+    gc.freeze()
+    return decks
+
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def _terminate(signum, frame):
+    answer_events.stop_event_log()  # Write the queued answer events first
+    os._exit(0)
+
+
+def _run_worker(listener, decks, manager, high_score_file, ttl, max_sessions):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # The parent shuts the workers down
+    signal.signal(signal.SIGTERM, _terminate)
+    question_bank._default_bank = None  # The parent's database connection must not be used after the fork
+    answer_events.start_event_log()  # Threads do not survive a fork, every worker runs its own writer
+    app = create_app(
+        score_manager=manager.scores(high_score_file),
+        sessions=SharedSessionStore(manager.sessions(ttl, max_sessions), decks),
+        decks=decks,
+    )
+    host, port = listener.getsockname()[:2]
+    server = make_server(host, port, app, threaded=True, fd=listener.fileno())
+    server.serve_forever()
+
+
+def serve(host, port, workers=None, high_score_file="high_scores.csv", ttl=1800, max_sessions=100_000):
+    """
+    Serves the quiz game from several prefork worker processes.
+
+    The parent binds the listening socket, starts the owner process for the high scores and live games, loads
+    the question decks once and then forks the workers, which accept connections on the shared socket. Dead
+    workers are replaced until the server is interrupted.
+
+    Parameters:
+        host (str): The address to listen on.
+        port (int): The port to listen on.
+        workers (int, optional): The number of worker processes. Defaults to the number of CPUs.
+        high_score_file (str): The file path of the high score file.
+        ttl (float): The number of seconds after which an idle game is dropped.
+        max_sessions (int): The maximum number of live games.
+    """
+    workers = workers or os.cpu_count() or 1
+    listener = socket.create_server((host, port), backlog=1024)
+    listener.set_inheritable(True)
+
+    manager = OwnerManager(ctx=multiprocessing.get_context("fork"))
+    # Forked before the decks are loaded, so it does not hold a copy of them. Ctrl+C is left to the parent, which
+    # still needs the owner to commit the scores when shutting down.
+    manager.start(signal.signal, (signal.SIGINT, signal.SIG_IGN))
+    scores = manager.scores(high_score_file)
+    decks = load_decks()
+
+    children = set()
+    signal.signal(signal.SIGTERM, _interrupt)
+
+    def fork_worker():
+        pid = os.fork()
+        if pid == 0:
+            try:
+                _run_worker(listener, decks, manager, high_score_file, ttl, max_sessions)
+            finally:
+                os._exit(1)
+        children.add(pid)
+
+    for _ in range(workers):
+        fork_worker()
+    print(f"Serving on http://{host}:{port} with {workers} workers")
+
+    try:
+        while True:
+            pid, status = os.wait()
+            children.discard(pid)
+            logging.warning(f"Worker {pid} exited with status {status}, starting a new one")
+            fork_worker()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        signal.signal(signal.SIGINT, signal.SIG_IGN)  # Let the shutdown finish
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in children:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        scores.close()
+        manager.shutdown()
+        listener.close()
@@ -1,8 +1,25 @@
+import sys
+import threading
+from collections import OrderedDict
+
+import metrics
+
+# Points awarded for a correct answer at each difficulty level
+POINTS = {"easy": 1, "medium": 3, "hard": 5}
+
+
 class Question:
-    def __init__(self, question_type, difficulty, category, question, correct_answer, incorrect_answers, answers=None):
+    # Slots instead of a per-instance __dict__ keep each question small when pools hold many thousands of them
+    __slots__ = ("type", "difficulty", "category", "question", "correct_answer", "incorrect_answers", "_answers", "points")
+
+    def __init__(self, question_type, difficulty, category, question, correct_answer, incorrect_answers, answers=None,
+                 points=None):
         """
         Initializes a new instance of the Question class with the specified attributes.
 
+        The type, difficulty and category strings (and true/false answers) are interned, so every question in a
+        pool shares one copy of them, and the points are computed once here instead of on every answer.
+
         Parameters:
             question_type (str): The type of the question.
             difficulty (str): The difficulty level of the question.
@@ -12,18 +29,54 @@ class Question:
             incorrect_answers (list): A list of incorrect answers.
             answers (list, optional): A list of all answers including correct and incorrect ones.
                 If not provided, it defaults to [correct_answer] + incorrect_answers.
+            points (int, optional): Precomputed points, e.g. read from a question pack. If not provided, they are
+                looked up in POINTS by difficulty.
 
         Returns:
             None
         """
-        self.type = question_type
-        self.difficulty = difficulty
-        self.category = category
+        self.type = sys.intern(question_type)
+        self.difficulty = sys.intern(difficulty)
+        self.category = sys.intern(category)
         self.question = question
-        self.correct_answer = correct_answer
-        self.incorrect_answers = incorrect_answers
-        self.answers = answers if answers is not None else [correct_answer] + incorrect_answers
-        self.points = None  # Initialize points as None initially
+        if question_type == "boolean":
+            # Every true/false question shares the same two answer strings
+            self.correct_answer = sys.intern(correct_answer)
+            self.incorrect_answers = tuple(sys.intern(answer) for answer in incorrect_answers)
+        else:
+            self.correct_answer = correct_answer
+            self.incorrect_answers = tuple(incorrect_answers)
+        self._answers = tuple(answers) if answers is not None else None
+        self.points = points if points is not None else POINTS.get(difficulty)
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Creates a Question from a question dictionary in the Open Trivia Database format.
+
+        Parameters:
+            data (dict): The question dictionary.
+
+        Returns:
+            Question: The new question.
+        """
+        return cls(
+            question_type=data['type'],
+            difficulty=data['difficulty'],
+            category=data['category'],
+            question=data['question'],
+            correct_answer=data['correct_answer'],
+            incorrect_answers=data['incorrect_answers']
+        )
+
+    @property
+    def answers(self):
+        """
+        All answers including correct and incorrect ones, built on demand instead of being stored per question.
+        """
+        if self._answers is not None:
+            return list(self._answers)
+        return [self.correct_answer, *self.incorrect_answers]
 
     def calculate_points(self):
         """
@@ -35,14 +88,9 @@ class Question:
         Raises:
             ValueError: If the difficulty level is invalid.
         """
-        if self.difficulty == "easy":
-            return 1
-        elif self.difficulty == "medium":
-            return 3
-        elif self.difficulty == "hard":
-            return 5
-        else:
+        if self.points is None:
             raise ValueError("Invalid difficulty level.")
+        return self.points
 
 
     def check_answer(self, user_answer):
@@ -61,6 +109,47 @@ class Question:
         """
         Update the points for the question based on its difficulty level.
 
-        This method should be called after creating the Question object to initialize the points attribute.
+        Points are already computed when the question is created; this recomputes them after the difficulty changed.
         """
-        self.points = self.calculate_points()
\ No newline at end of file
+        self.points = POINTS.get(self.difficulty)
+
+
+_question_cache = OrderedDict()
+_question_cache_lock = threading.Lock()
+QUESTION_CACHE_SIZE = 100_000
+
+
+@metrics.timed("question.questions_from_dicts")
+def questions_from_dicts(questions_data):
+    """
+    Returns Question objects for the given question dictionaries, reusing objects that were already built.
+
+    Questions are cached by their content (type, difficulty, category, text and answers), so each question is
+    built once and then shared by every game that draws it. Row ids of the question bank are not used as keys:
+    SQLite hands out the ids of deleted rows again, so after a bucket is re-imported an id may name another
+    question. The cache holds at most QUESTION_CACHE_SIZE questions.
+
+    Parameters:
+        questions_data (list): Question dictionaries in the Open Trivia Database format.
+
+    Returns:
+        list: The corresponding Question objects, in the same order.
+    """
+    questions = []
+    built = 0
+    with _question_cache_lock:
+        for data in questions_data:
+            key = (data['type'], data['difficulty'], data['category'], data['question'], data['correct_answer'],
+                   tuple(data['incorrect_answers']))
+            question = _question_cache.get(key)
+            if question is None:
+                question = _question_cache[key] = Question.from_dict(data)
+                built += 1
+                if len(_question_cache) > QUESTION_CACHE_SIZE:
+                    _question_cache.popitem(last=False)
+            else:
+                _question_cache.move_to_end(key)
+            questions.append(question)
+    metrics.increment("question.built", built)
+    metrics.increment("question.cache_hits", len(questions) - built)
+    return questions
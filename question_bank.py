@@ -0,0 +1,646 @@
+import itertools
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+
+from dedup_index import MinHasher, SIMILARITY_THRESHOLD, dedup_text, legacy_text_hash, text_hash
+from question_stream import iter_questions
+from seen_filter import SeenFilter
+from text_normalizer import normalize_text
+
+DEFAULT_DB_PATH = "data/questions.db"
+DEFAULT_DATA_DIR = "data"
+IMPORT_BATCH = 1000  # Questions inserted at a time when a bucket is imported
+SYNC_INTERVAL = 5.0  # Seconds during which a checked pool file is not checked again on the game path
+DIFFICULTIES = ("easy", "medium", "hard")
+QUESTION_TYPES = ("multiple", "boolean")
+HASH_VERSION = 1  # Stored as the database's user_version: text hashes cover the correct answer
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY,
+    difficulty TEXT NOT NULL,
+    type TEXT NOT NULL,
+    category TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    question TEXT NOT NULL,
+    correct_answer TEXT NOT NULL,
+    incorrect_answers TEXT NOT NULL,
+    text_hash INTEGER
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_questions_bucket_position
+    ON questions (difficulty, type, position);
+CREATE INDEX IF NOT EXISTS idx_questions_bucket_category
+    ON questions (difficulty, type, category);
+CREATE TABLE IF NOT EXISTS buckets (
+    difficulty TEXT NOT NULL,
+    type TEXT NOT NULL,
+    size INTEGER NOT NULL DEFAULT 0,
+    source_mtime REAL,
+    source_size INTEGER,
+    PRIMARY KEY (difficulty, type)
+);
+CREATE TABLE IF NOT EXISTS signatures (
+    text_hash INTEGER PRIMARY KEY,
+    signature BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS signature_bands (
+    band_key INTEGER NOT NULL,
+    text_hash INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_signature_bands_key
+    ON signature_bands (band_key);
+CREATE TABLE IF NOT EXISTS seen_filters (
+    player TEXT PRIMARY KEY,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS question_ratings (
+    text_hash INTEGER PRIMARY KEY,
+    rating REAL NOT NULL,
+    answers INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS player_ratings (
+    player TEXT PRIMARY KEY,
+    rating REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS revision (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    value INTEGER NOT NULL
+);
+"""
+
+_COLUMNS = "id, type, difficulty, category, question, correct_answer, incorrect_answers"
+
+
+def _row_to_question(row):
+    """
+    Converts a row from the questions table into the dictionary shape used by the rest of the game.
+
+    Parameters:
+        row (tuple): A row selected with the columns in _COLUMNS.
+
+    Returns:
+        dict: A question dictionary with the same keys as the Open Trivia Database results, plus 'id'.
+    """
+    return {
+        "id": row[0],
+        "type": row[1],
+        "difficulty": row[2],
+        "category": row[3],
+        "question": row[4],
+        "correct_answer": row[5],
+        "incorrect_answers": json.loads(row[6]),
+    }
+
+
+def _distinct_positions(size, rng):
+    """
+    Yields distinct random positions below size, without materializing the range.
+    """
+    drawn = set()
+    while True:
+        position = rng.randrange(size)
+        if position not in drawn:
+            drawn.add(position)
+            yield position
+
+
+class QuestionBank:
+    def __init__(self, db_path=DEFAULT_DB_PATH, data_dir=DEFAULT_DATA_DIR):
+        """
+        Opens (or creates) the SQLite question bank at the given path.
+
+        Questions are grouped in buckets keyed by (difficulty, type). Every question in a bucket has a
+        dense position number from 0 to size - 1, so a random sample of k questions only needs k random
+        positions and one indexed lookup, no matter how large the bucket grows.
+
+        The bank also keeps a duplicate index over every question it has imported: the hash of the question text
+        and answer for exact duplicates, and MinHash signatures with LSH bands for near duplicates (see dedup_index.py).
+        Signatures are stored by text hash, so re-importing a pool only signs the questions that are new.
+
+        Parameters:
+            db_path (str): The file path of the SQLite database.
+            data_dir (str): The directory holding the data/{difficulty}_{type}_questions.json pools.
+        """
+        self.db_path = db_path
+        self.data_dir = data_dir
+        directory = os.path.dirname(db_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._minhasher = MinHasher()
+        self._checked_at = {}  # When each bucket's pool file was last compared with the bank
+        with self._lock:
+            self._conn.executescript(_SCHEMA)
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(questions)")]
+            if "text_hash" not in columns:
+                # Banks created before the duplicate index: add the column and re-import every pool to fill it
+                self._conn.execute("ALTER TABLE questions ADD COLUMN text_hash INTEGER")
+                self._conn.execute("UPDATE buckets SET source_mtime = NULL, source_size = NULL")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_questions_text_hash ON questions (text_hash)")
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] < HASH_VERSION:
+                self._rehash()
+            self._conn.commit()
+
+    def _rehash(self):
+        # Banks from before text_hash covered the correct answer: recompute the hashes, rebuild the signature
+        # index and move the stored question ratings to the new hashes
+        rows = self._conn.execute("SELECT id, question, correct_answer FROM questions").fetchall()
+        hashes = {}
+        renamed = {}
+        for question_id, question, answer in rows:
+            hash_value = hashes[question_id] = text_hash(question, answer)
+            renamed.setdefault(legacy_text_hash(question), []).append(hash_value)
+        self._conn.executemany("UPDATE questions SET text_hash = ? WHERE id = ?",
+                               [(hash_value, question_id) for question_id, hash_value in hashes.items()])
+        self._conn.execute("DELETE FROM signatures")
+        self._conn.execute("DELETE FROM signature_bands")
+        self._index_signatures({hashes[question_id]: question for question_id, question, _ in rows})
+        ratings = self._conn.execute("SELECT text_hash, rating, answers FROM question_ratings").fetchall()
+        self._conn.execute("DELETE FROM question_ratings")
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO question_ratings (text_hash, rating, answers) VALUES (?, ?, ?)",
+            [(new, rating, answers) for old, rating, answers in ratings for new in renamed.get(old, ())],
+        )
+        self._conn.execute(f"PRAGMA user_version = {HASH_VERSION}")
+
+    def close(self):
+        """
+        Closes the underlying database connection.
+        """
+        with self._lock:
+            self._conn.close()
+
+    def source_file(self, difficulty, question_type):
+        """
+        Returns the JSON pool file that feeds the given bucket.
+        """
+        return os.path.join(self.data_dir, f"{difficulty}_{question_type}_questions.json")
+
+    def count(self, difficulty, question_type, category=None):
+        """
+        Returns the number of questions stored for a bucket.
+
+        Parameters:
+            difficulty (str): The difficulty level of the questions.
+            question_type (str): The type of questions.
+            category (str, optional): Only count questions from this category.
+
+        Returns:
+            int: The number of matching questions.
+        """
+        with self._lock:
+            if category is None:
+                row = self._conn.execute(
+                    "SELECT size FROM buckets WHERE difficulty = ? AND type = ?",
+                    (difficulty, question_type),
+                ).fetchone()
+            else:
+                row = self._conn.execute(
+                    "SELECT COUNT(*) FROM questions WHERE difficulty = ? AND type = ? AND category = ?",
+                    (difficulty, question_type, category),
+                ).fetchone()
+        return row[0] if row else 0
+
+    def revision(self):
+        """
+        Returns the revision of the bank's questions, which changes whenever a bucket changes in any process.
+
+        Caches built from the bank's questions (e.g. the decks, see game_engine.QuestionDeck.load) compare it with
+        the revision they were built at, which costs one indexed query instead of reloading the questions.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM revision WHERE id = 0").fetchone()
+        return row[0] if row else 0
+
+    def add_questions(self, difficulty, question_type, questions, source_stat=None):
+        """
+        Appends questions to the end of a bucket. The questions already in it keep their rows and positions.
+
+        Parameters:
+            difficulty (str): The difficulty level of the bucket.
+            question_type (str): The type of the bucket.
+            questions (list): Question dictionaries in the Open Trivia Database format.
+            source_stat (os.stat_result, optional): The stat of the pool file after the same questions were
+                appended to it, so the next sync_bucket does not import the file again.
+
+        Returns:
+            int: The number of questions added.
+        """
+        with self._lock:
+            try:
+                self._insert(difficulty, question_type, questions, self.count(difficulty, question_type))
+                if source_stat is not None:
+                    self._conn.execute(
+                        "UPDATE buckets SET source_mtime = ?, source_size = ? WHERE difficulty = ? AND type = ?",
+                        (source_stat.st_mtime, source_stat.st_size, difficulty, question_type),
+                    )
+            except BaseException:
+                self._conn.rollback()
+                raise
+            self._conn.commit()
+        logging.info(f"Added {len(questions)} questions to bank bucket {difficulty}/{question_type}")
+        return len(questions)
+
+    def replace_bucket(self, difficulty, question_type, questions, source_stat=None):
+        """
+        Replaces every question in a bucket with the given questions.
+
+        Parameters:
+            difficulty (str): The difficulty level of the bucket.
+            question_type (str): The type of the bucket.
+            questions (iterable): Question dictionaries in the Open Trivia Database format. They are inserted in
+                batches of IMPORT_BATCH as they are iterated, so this may be a stream (see question_stream.py).
+            source_stat (os.stat_result, optional): The stat of the JSON file the questions came from.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            # Everything up to the commit is one transaction: if a batch fails (a malformed question, a read
+            # error), the rollback restores the old bucket instead of leaving it deleted for the next commit
+            try:
+                self._conn.execute(
+                    "DELETE FROM questions WHERE difficulty = ? AND type = ?", (difficulty, question_type)
+                )
+                count = 0
+                questions = iter(questions)
+                while True:
+                    batch = list(itertools.islice(questions, IMPORT_BATCH))
+                    if not batch:
+                        break
+                    self._insert(difficulty, question_type, batch, count)
+                    count += len(batch)
+                if count == 0:
+                    self._insert(difficulty, question_type, [], 0)  # Record the bucket as empty
+                if source_stat is not None:
+                    self._conn.execute(
+                        "UPDATE buckets SET source_mtime = ?, source_size = ? WHERE difficulty = ? AND type = ?",
+                        (source_stat.st_mtime, source_stat.st_size, difficulty, question_type),
+                    )
+            except BaseException:
+                self._conn.rollback()
+                raise
+            self._conn.commit()
+        logging.info(f"Replaced bank bucket {difficulty}/{question_type} with {count} questions")
+
+    def _insert(self, difficulty, question_type, questions, start):
+        rows = []
+        for offset, q in enumerate(questions):
+            question = normalize_text(q["question"])
+            correct_answer = normalize_text(q["correct_answer"])
+            rows.append((
+                difficulty,
+                question_type,
+                normalize_text(q.get("category", "")),
+                start + offset,
+                question,
+                correct_answer,
+                json.dumps([normalize_text(answer) for answer in q["incorrect_answers"]]),
+                text_hash(question, correct_answer),
+            ))
+        self._conn.executemany(
+            "INSERT INTO questions "
+            "(difficulty, type, category, position, question, correct_answer, incorrect_answers, text_hash) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        self._index_signatures({row[7]: row[4] for row in rows})
+        # Committed with the questions, so every process sees the new revision with them
+        self._conn.execute(
+            "INSERT INTO revision (id, value) VALUES (0, 1) ON CONFLICT (id) DO UPDATE SET value = value + 1"
+        )
+        self._conn.execute(
+            "INSERT INTO buckets (difficulty, type, size) VALUES (?, ?, ?) "
+            "ON CONFLICT (difficulty, type) DO UPDATE SET size = excluded.size",
+            (difficulty, question_type, start + len(rows)),
+        )
+
+    def _index_signatures(self, texts):
+        # Only sign the texts that have no signature yet, which after the first import are the new questions
+        hashes = list(texts)
+        known = set()
+        for start in range(0, len(hashes), 500):
+            chunk = hashes[start:start + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            known.update(row[0] for row in self._conn.execute(
+                f"SELECT text_hash FROM signatures WHERE text_hash IN ({placeholders})", chunk))
+        signatures = []
+        bands = []
+        for hash_value in hashes:
+            if hash_value in known:
+                continue
+            signature = self._minhasher.signature(texts[hash_value])
+            signatures.append((hash_value, MinHasher.to_bytes(signature)))
+            bands.extend((band_key, hash_value) for band_key in self._minhasher.band_keys(signature))
+        self._conn.executemany("INSERT INTO signatures (text_hash, signature) VALUES (?, ?)", signatures)
+        self._conn.executemany("INSERT INTO signature_bands (band_key, text_hash) VALUES (?, ?)", bands)
+
+    def find_duplicates(self, questions, threshold=SIMILARITY_THRESHOLD):
+        """
+        Finds the questions that are (near) duplicates of a question in the bank, in any bucket, or of an earlier
+        question in the same list.
+
+        Exact duplicates are found by the hash of the question text and correct answer. Near duplicates are found
+        through the LSH bands of their MinHash signatures and confirmed by the estimated similarity of the
+        signatures, so each question costs a few indexed lookups no matter how many questions the bank holds.
+        A near duplicate must also have the same correct answer (compared like the texts, see
+        dedup_index.dedup_text): texts differing in a character or two, such as "WWI" and "WWII" or "7 x 8" and
+        "7 x 9", are often different questions.
+
+        Parameters:
+            questions (list): Question dictionaries in the Open Trivia Database format.
+            threshold (float): The estimated Jaccard similarity from which two questions are near duplicates.
+
+        Returns:
+            list: For every question, the text of the question it duplicates, or None if it is new.
+        """
+        duplicates = []
+        batch_hashes = {}
+        batch_bands = {}
+        with self._lock:
+            for q in questions:
+                question = normalize_text(q["question"])
+                correct_answer = normalize_text(q["correct_answer"])
+                hash_value = text_hash(question, correct_answer)
+                if hash_value in batch_hashes:
+                    duplicates.append(batch_hashes[hash_value])
+                    continue
+                row = self._conn.execute(
+                    "SELECT question FROM questions WHERE text_hash = ? LIMIT 1", (hash_value,)
+                ).fetchone()
+                if row is not None:
+                    duplicates.append(row[0])
+                    continue
+
+                answer = dedup_text(correct_answer)
+                signature = self._minhasher.signature(question)
+                band_keys = self._minhasher.band_keys(signature)
+                duplicate = None
+                for band_key in band_keys:
+                    for other_signature, other_question, other_answer in batch_bands.get(band_key, ()):
+                        if other_answer == answer and MinHasher.similarity(signature, other_signature) >= threshold:
+                            duplicate = other_question
+                            break
+                    if duplicate is not None:
+                        break
+                if duplicate is None:
+                    duplicate = self._find_near_duplicate(signature, band_keys, answer, threshold)
+                duplicates.append(duplicate)
+                if duplicate is None:
+                    batch_hashes[hash_value] = question
+                    for band_key in band_keys:
+                        batch_bands.setdefault(band_key, []).append((signature, question, answer))
+        return duplicates
+
+    def _find_near_duplicate(self, signature, band_keys, answer, threshold):
+        placeholders = ", ".join("?" * len(band_keys))
+        # Only questions still in the bank count: signatures of removed questions stay in the index
+        rows = self._conn.execute(
+            f"SELECT s.signature, q.question, q.correct_answer FROM signatures s "
+            f"JOIN questions q ON q.text_hash = s.text_hash "
+            f"WHERE s.text_hash IN (SELECT text_hash FROM signature_bands WHERE band_key IN ({placeholders}))",
+            band_keys,
+        )
+        for data, question, correct_answer in rows:  # Stops reading at the first match
+            if dedup_text(correct_answer) == answer and \
+                    MinHasher.similarity(signature, MinHasher.from_bytes(data)) >= threshold:
+                return question
+        return None
+
+    def sync_bucket(self, difficulty, question_type, max_age=0.0):
+        """
+        Re-imports a bucket from its JSON pool file if the file changed since the last import.
+
+        The file's modification time and size are compared with the values recorded at the last import,
+        so an unchanged file is never parsed again. The file is streamed into the bank (see question_stream.py),
+        so importing a large pool never holds more than a batch of its questions in memory. It may also be a
+        JSONL file, one question per line. If the file is invalid, the bucket keeps its current questions.
+
+        Parameters:
+            difficulty (str): The difficulty level of the bucket.
+            question_type (str): The type of the bucket.
+            max_age (float): Skip the check if the file was already checked within this many seconds, so
+                back-to-back games neither stat the file nor query the bank for it (e.g. SYNC_INTERVAL).
+
+        Returns:
+            bool: True if the bucket was re-imported, False otherwise.
+        """
+        now = time.monotonic()
+        key = (difficulty, question_type)
+        if max_age and now - self._checked_at.get(key, -max_age) < max_age:
+            return False
+        self._checked_at[key] = now
+        filename = self.source_file(difficulty, question_type)
+        try:
+            stat = os.stat(filename)
+        except FileNotFoundError:
+            return False
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT source_mtime, source_size FROM buckets WHERE difficulty = ? AND type = ?",
+                (difficulty, question_type),
+            ).fetchone()
+            if row is not None and row[0] == stat.st_mtime and row[1] == stat.st_size:
+                return False
+            try:
+                self.replace_bucket(difficulty, question_type, iter_questions(filename), source_stat=stat)
+            except json.JSONDecodeError:
+                logging.error(f"Invalid JSON format in {filename}, keeping the current bank contents.")
+                return False
+            except (KeyError, TypeError, AttributeError) as e:
+                logging.error(f"Malformed question in {filename} ({e!r}), keeping the current bank contents.")
+                return False
+        return True
+
+    def sync_from_files(self, max_age=0.0):
+        """
+        Re-imports every bucket whose JSON pool file changed since the last import.
+
+        Parameters:
+            max_age (float): Skip the buckets checked within this many seconds, see sync_bucket.
+
+        Returns:
+            int: The number of buckets that were re-imported.
+        """
+        synced = 0
+        for difficulty in DIFFICULTIES:
+            for question_type in QUESTION_TYPES:
+                if self.sync_bucket(difficulty, question_type, max_age):
+                    synced += 1
+        return synced
+
+    def sample(self, difficulty, question_type, k, rng=random, seen=None):
+        """
+        Returns up to k random questions from a bucket without loading or shuffling the whole bucket.
+
+        Random positions are drawn one batch at a time and looked up through the position index, so the cost
+        grows with k rather than with the size of the bucket. Questions in seen are skipped; only when fewer than
+        k unseen questions turn up within a bounded number of draws are seen questions used to fill the sample.
+
+        Parameters:
+            difficulty (str): The difficulty level of the questions.
+            question_type (str): The type of questions.
+            k (int): The number of questions to return.
+            rng (random.Random, optional): The random number generator to draw with.
+            seen (SeenFilter, optional): The questions the player has already seen.
+
+        Returns:
+            list: Up to k question dictionaries in random order.
+        """
+        with self._lock:
+            size = self.count(difficulty, question_type)
+            max_draws = min(size, k if seen is None else 10 * k)
+            if max_draws < size:
+                draws = _distinct_positions(size, rng)
+            else:
+                draws = iter(rng.sample(range(size), size))  # Small bucket, every position may be needed
+            chosen = []
+            skipped = []
+            drawn = 0
+            while len(chosen) < k and drawn < max_draws:
+                batch = [next(draws) for _ in range(min(2 * (k - len(chosen)), max_draws - drawn))]
+                drawn += len(batch)
+                placeholders = ", ".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT position, {_COLUMNS} FROM questions WHERE difficulty = ? AND type = ? "
+                    f"AND position IN ({placeholders})",
+                    (difficulty, question_type, *batch),
+                ).fetchall()
+                by_position = {row[0]: row[1:] for row in rows}
+                for position in batch:
+                    row = by_position.get(position)
+                    if row is None:
+                        continue
+                    if seen is not None and row[4] in seen:
+                        skipped.append(row)
+                    elif len(chosen) < k:
+                        chosen.append(row)
+        chosen.extend(skipped[:k - len(chosen)])  # The player has seen (almost) the whole bucket
+        return [_row_to_question(row) for row in chosen]
+
+    def iter_bucket(self, difficulty, question_type):
+        """
+        Iterates over every question of a bucket, in position order, without loading the bucket at once.
+
+        Parameters:
+            difficulty (str): The difficulty level of the bucket.
+            question_type (str): The type of the bucket.
+
+        Yields:
+            dict: Question dictionaries.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM questions WHERE difficulty = ? AND type = ? ORDER BY position",
+                (difficulty, question_type),
+            )
+            rows = cursor.fetchmany(1000)
+        while rows:
+            for row in rows:
+                yield _row_to_question(row)
+            with self._lock:
+                rows = cursor.fetchmany(1000)
+
+    def load_seen(self, player):
+        """
+        Returns the filter of the questions the given player has already seen, or an empty one for a new player.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM seen_filters WHERE player = ?", (player,)).fetchone()
+        return SeenFilter(data=row[0] if row else None)
+
+    def save_seen(self, player, seen):
+        """
+        Stores the filter of the questions the given player has seen.
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO seen_filters (player, data) VALUES (?, ?) "
+                "ON CONFLICT (player) DO UPDATE SET data = excluded.data",
+                (player, seen.to_bytes()),
+            )
+            self._conn.commit()
+
+    def load_question_ratings(self):
+        """
+        Returns the stored skill ratings of questions (see ratings.py).
+
+        Returns:
+            dict: (rating, answers) pairs by question text hash.
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT text_hash, rating, answers FROM question_ratings").fetchall()
+        return {row[0]: (row[1], row[2]) for row in rows}
+
+    def save_question_ratings(self, rows):
+        """
+        Stores changes of the skill ratings of questions, given as (text_hash, rating, answers, rating change,
+        answers change) rows.
+
+        A question without a stored rating gets the given rating and answers. Otherwise only the changes are added
+        to the stored values, so processes that each hold their own copy of the ratings (e.g. prefork workers)
+        add up their updates instead of overwriting each other's.
+        """
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO question_ratings (text_hash, rating, answers) VALUES (?, ?, ?) "
+                "ON CONFLICT (text_hash) DO UPDATE SET rating = rating + ?, answers = answers + ?",
+                rows,
+            )
+            self._conn.commit()
+
+    def load_player_rating(self, player):
+        """
+        Returns the stored skill rating of a player, or None for a new player.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT rating FROM player_ratings WHERE player = ?", (player,)).fetchone()
+        return row[0] if row else None
+
+    def save_player_rating(self, player, rating):
+        """
+        Stores the skill rating of a player.
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO player_ratings (player, rating) VALUES (?, ?) "
+                "ON CONFLICT (player) DO UPDATE SET rating = excluded.rating",
+                (player, rating),
+            )
+            self._conn.commit()
+
+    def get_by_text_hash(self, question_hash):
+        """
+        Returns a question with the given text hash (see dedup_index.text_hash), or None if there is none.
+        """
+        with self._lock:
+            row = self._conn.execute(f"SELECT {_COLUMNS} FROM questions WHERE text_hash = ? LIMIT 1",
+                                     (question_hash,)).fetchone()
+        return _row_to_question(row) if row else None
+
+
+_default_bank = None
+_default_bank_lock = threading.Lock()
+
+
+def get_question_bank():
+    """
+    Returns the shared QuestionBank for the default database, syncing it with the JSON pools on first use.
+
+    Returns:
+        QuestionBank: The shared question bank.
+    """
+    global _default_bank
+    with _default_bank_lock:
+        if _default_bank is None:
+            _default_bank = QuestionBank()
+            _default_bank.sync_from_files()
+        return _default_bank
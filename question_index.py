@@ -0,0 +1,174 @@
+import re
+from array import array
+from bisect import bisect_left
+
+_TOKEN_PATTERN = re.compile(r"[^\W_]+")
+_STOPWORDS = frozenset((
+    "the", "and", "for", "was", "are", "which", "what", "who", "whom", "whose", "when", "where", "how", "why",
+    "this", "that", "these", "those", "with", "from", "into", "has", "had", "have", "not", "its", "his", "her",
+    "their", "one", "first", "name", "does", "did", "true", "false", "following",
+))
+_EMPTY = array("I")
+
+
+def tokenize(text):
+    """
+    Returns the distinct search tokens of a text: lower-case words of three or more characters, without stopwords.
+    """
+    return {token for token in _TOKEN_PATTERN.findall(text.lower()) if len(token) > 2 and token not in _STOPWORDS}
+
+
+class QuestionIndex:
+    def __init__(self, questions):
+        """
+        Builds an in-memory inverted index over the categories and question texts of a list of questions.
+
+        Every category, category word and question word maps to the sorted positions of the questions that have
+        it, stored as compact arrays. A filtered search intersects the shortest lists first and narrows them to a
+        position range (such as one difficulty stage of a QuestionDeck) by binary search, so it only touches
+        matching questions instead of scanning the whole list.
+
+        Parameters:
+            questions (sequence): Question objects, looked up by position.
+        """
+        self._categories = {}
+        self._category_names = {}
+        self._category_tokens = {}
+        self._tokens = {}
+        self._merged = {}  # Merged postings of categories matched by words, by set of categories
+        for position, question in enumerate(questions):
+            key = question.category.lower()
+            postings = self._categories.get(key)
+            if postings is None:
+                postings = self._categories[key] = array("I")
+                self._category_names[key] = question.category
+                for token in tokenize(question.category):
+                    self._category_tokens.setdefault(token, []).append(key)
+            postings.append(position)
+            for token in tokenize(question.question):
+                postings = self._tokens.get(token)
+                if postings is None:
+                    postings = self._tokens[token] = array("I")
+                postings.append(position)
+
+    def categories(self):
+        """
+        Returns every category with its number of questions, sorted by name.
+
+        Returns:
+            list: (category, count) pairs.
+        """
+        return sorted((self._category_names[key], len(postings)) for key, postings in self._categories.items())
+
+    def _category_postings(self, category):
+        exact = self._categories.get(category.strip().lower())
+        if exact is not None:
+            return exact
+        # Not a category name: match the categories containing every word, e.g. "science" matches
+        # "Science & Nature" and "Science: Computers"
+        keys = None
+        for token in tokenize(category):
+            matching = set(self._category_tokens.get(token, ()))
+            keys = matching if keys is None else keys & matching
+        if not keys:
+            return None
+        keys = frozenset(keys)
+        merged = self._merged.get(keys)
+        if merged is None:
+            merged = self._merged[keys] = array("I", sorted(p for key in keys for p in self._categories[key]))
+        return merged
+
+    def _bounds(self, category, keywords, start, end):
+        # The posting lists to intersect, narrowed to [start, end) and sorted from the shortest; None if nothing
+        # can match
+        lists = []
+        if category:
+            postings = self._category_postings(category)
+            if postings is None:
+                return None
+            lists.append(postings)
+        for keyword in keywords:
+            tokens = tokenize(keyword)
+            if not tokens and keyword.strip():
+                return None  # Only stopwords or short words, which are not indexed
+            lists.extend(self._tokens.get(token, _EMPTY) for token in tokens)
+        bounds = [(p, bisect_left(p, start), bisect_left(p, end)) for p in lists]
+        bounds.sort(key=lambda bound: bound[2] - bound[1])
+        return bounds
+
+    @staticmethod
+    def _in_all(position, bounds):
+        for postings, low, high in bounds:
+            i = bisect_left(postings, position, low, high)
+            if i == high or postings[i] != position:
+                return False
+        return True
+
+    def search(self, category=None, keywords=(), start=0, end=None):
+        """
+        Returns the positions of the questions matching every given filter, within [start, end).
+
+        Parameters:
+            category (str, optional): A category name, or words that the category must contain.
+            keywords (iterable): Words that the question text must contain.
+            start (int): The first position to consider.
+            end (int, optional): The position to stop at. Defaults to no limit.
+
+        Returns:
+            sequence: The matching positions in increasing order. Without any filter, a range.
+        """
+        if end is None:
+            end = 1 << 32
+        bounds = self._bounds(category, keywords, start, end)
+        if bounds is None:
+            return _EMPTY
+        if not bounds:
+            return range(start, end)
+        postings, low, high = bounds[0]
+        if len(bounds) == 1:
+            return memoryview(postings)[low:high]  # No copy
+        return [p for p in memoryview(postings)[low:high] if self._in_all(p, bounds[1:])]
+
+    def sample(self, rng, k, category=None, keywords=(), start=0, end=None):
+        """
+        Returns up to k distinct random positions of questions matching every given filter, within [start, end).
+
+        Positions are drawn from the shortest posting list and checked against the others, so a draw costs about
+        k / (share of matching positions) lookups instead of a full intersection. Only when few positions match
+        is the full intersection computed.
+
+        Parameters:
+            rng (random.Random): The random number generator to draw with.
+            k (int): The number of positions to draw.
+            category (str, optional): A category name, or words that the category must contain.
+            keywords (iterable): Words that the question text must contain.
+            start (int): The first position to consider.
+            end (int): The position to stop at.
+
+        Returns:
+            list: Up to k positions, in random order.
+        """
+        if end is None:
+            end = 1 << 32
+        bounds = self._bounds(category, keywords, start, end)
+        if bounds is None:
+            return []
+        if not bounds:
+            return [start + j for j in rng.sample(range(end - start), min(k, end - start))]
+        postings, low, high = bounds[0]
+        size = high - low
+        if len(bounds) == 1:
+            return [postings[low + j] for j in rng.sample(range(size), min(k, size))]
+
+        tries = min(size, 20 * k + 20)
+        chosen = []
+        for j in rng.sample(range(size), tries):
+            position = postings[low + j]
+            if self._in_all(position, bounds[1:]):
+                chosen.append(position)
+                if len(chosen) == k:
+                    return chosen
+        if tries == size:
+            return chosen  # Every candidate was checked
+        matches = [p for p in memoryview(postings)[low:high] if self._in_all(p, bounds[1:])]
+        return [matches[j] for j in rng.sample(range(len(matches)), min(k, len(matches)))]
@@ -0,0 +1,319 @@
+import argparse
+import functools
+import glob
+import mmap
+import os
+import struct
+import zlib
+from array import array
+
+from question import Question, POINTS
+from question_bank import DIFFICULTIES, QUESTION_TYPES
+from question_stream import iter_questions
+from text_normalizer import normalize_text
+
+DEFAULT_PACK_FILE = "data/questions.qpack"
+MAGIC = b"QPAK"
+VERSION = 1
+FLAG_COMPRESSED = 1
+# Uncompressed bytes per compressed string block. Reading a question decompresses the blocks holding its strings,
+# so larger blocks compress better but make random access slower
+BLOCK_SIZE = 1 << 12
+
+# magic, version, flags, questions, strings, blocks, then the offsets of the records, the string index,
+# the block index and the string data
+_HEADER = struct.Struct("<4sHHIII4xQQQQ")
+_BUCKET = struct.Struct("<II")  # start, end of each (difficulty, type) bucket, in DIFFICULTIES x QUESTION_TYPES order
+# type, difficulty, category, question, correct answer, three incorrect answers (string ids), points, number of
+# incorrect answers
+_RECORD = struct.Struct("<8IBB2x")
+_STRING = struct.Struct("<QI")  # position, length
+_NO_STRING = 0xFFFFFFFF
+_BUCKETS = [(difficulty, question_type) for difficulty in DIFFICULTIES for question_type in QUESTION_TYPES]
+
+
+class QuestionPack:
+    def __init__(self, path=DEFAULT_PACK_FILE):
+        """
+        Opens a compiled question pack (see compile_pack) by memory-mapping it.
+
+        Opening only reads the fixed-size header, so it takes the same time for a thousand or a million
+        questions, and the pages of the file are shared by every process that maps it (e.g. prefork workers).
+        Question i is one fixed-width record at a computed offset; its strings are looked up by id in the string
+        index. In a compressed pack, strings are stored in zlib blocks, and the most recently used blocks are
+        kept decompressed.
+
+        The pack is a read-only sequence: pack[i] builds the Question at position i. Questions are sorted by
+        difficulty, then type, see bucket().
+
+        Parameters:
+            path (str): The file path of the pack.
+
+        Raises:
+            ValueError: If the file is not a question pack of a supported version.
+        """
+        self.path = path
+        with open(path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, flags, self._count, self._string_count, self._block_count, self._records,
+         self._string_index, self._block_index, self._data) = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            raise ValueError(f"{path} is not a question pack of version {VERSION}.")
+        self.compressed = bool(flags & FLAG_COMPRESSED)
+        self._buckets = {
+            bucket: _BUCKET.unpack_from(self._map, _HEADER.size + i * _BUCKET.size)
+            for i, bucket in enumerate(_BUCKETS)
+        }
+        self._block = functools.lru_cache(maxsize=32)(self._read_block)
+
+    def close(self):
+        self._map.close()
+
+    def __len__(self):
+        return self._count
+
+    def bucket(self, difficulty, question_type):
+        """
+        Returns the (start, end) positions of the questions of a difficulty and type.
+        """
+        return self._buckets[(difficulty, question_type)]
+
+    def _read_block(self, block):
+        start, end = struct.unpack_from("<QQ", self._map, self._block_index + 8 * block)
+        return zlib.decompress(self._map[self._data + start:self._data + end])
+
+    def string(self, string_id):
+        """
+        Returns the string with the given id from the string table.
+        """
+        position, length = _STRING.unpack_from(self._map, self._string_index + string_id * _STRING.size)
+        if self.compressed:
+            offset = position & 0xFFFFFFFF
+            return self._block(position >> 32)[offset:offset + length].decode("utf-8")
+        start = self._data + position
+        return self._map[start:start + length].decode("utf-8")
+
+    def _record(self, position):
+        if not 0 <= position < self._count:
+            raise IndexError("question pack index out of range")
+        return _RECORD.unpack_from(self._map, self._records + position * _RECORD.size)
+
+    def __getitem__(self, position):
+        if position < 0:
+            position += self._count
+        record = self._record(position)
+        string = self.string
+        return Question(
+            string(record[0]),
+            string(record[1]),
+            string(record[2]),
+            string(record[3]),
+            string(record[4]),
+            [string(i) for i in record[5:5 + record[9]]],
+            points=record[8] or None,
+        )
+
+    def points(self, position):
+        """
+        Returns the precomputed points of the question at a position, without reading any string.
+        """
+        return self._record(position)[8] or None
+
+    def get_dict(self, position):
+        """
+        Returns the question at a position as a dictionary in the Open Trivia Database format.
+        """
+        question = self[position]
+        return {
+            "type": question.type,
+            "difficulty": question.difficulty,
+            "category": question.category,
+            "question": question.question,
+            "correct_answer": question.correct_answer,
+            "incorrect_answers": list(question.incorrect_answers),
+        }
+
+    def view(self, ranges):
+        """
+        Returns a read-only sequence over the questions in the given (start, end) position ranges, in order.
+        """
+        return PackView(self, ranges)
+
+
+class PackView:
+    def __init__(self, pack, ranges):
+        """
+        Initializes a sequence over some position ranges of a pack, without copying any question.
+
+        Parameters:
+            pack (QuestionPack): The pack.
+            ranges (list): (start, end) position ranges of the pack.
+        """
+        self.pack = pack
+        self._ranges = [(start, end) for start, end in ranges if end > start]
+        self._starts = []  # The view position each range starts at
+        total = 0
+        for start, end in self._ranges:
+            self._starts.append(total)
+            total += end - start
+        self._length = total
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, position):
+        if position < 0:
+            position += self._length
+        if not 0 <= position < self._length:
+            raise IndexError("question pack view index out of range")
+        i = len(self._starts) - 1
+        while self._starts[i] > position:  # There are at most six ranges
+            i -= 1
+        return self.pack[self._ranges[i][0] + position - self._starts[i]]
+
+    def __iter__(self):
+        for start, end in self._ranges:
+            for position in range(start, end):
+                yield self.pack[position]
+
+
+@functools.lru_cache(maxsize=None)
+def open_pack(path=DEFAULT_PACK_FILE):
+    """
+    Returns the shared QuestionPack for a path, opening it on first use.
+    """
+    return QuestionPack(path)
+
+
+class _StringTable:
+    def __init__(self, compress):
+        self.compress = compress
+        self.ids = {}
+        self.index = bytearray()
+        self.data = bytearray()  # The string data, or the compressed blocks
+        self.block_offsets = array("Q", [0])
+        self._block = bytearray()
+
+    def add(self, text):
+        string_id = self.ids.get(text)
+        if string_id is not None:
+            return string_id
+        encoded = text.encode("utf-8")
+        if self.compress:
+            if self._block and len(self._block) + len(encoded) > BLOCK_SIZE:
+                self._flush()  # Strings never span two blocks
+            position = (len(self.block_offsets) - 1) << 32 | len(self._block)
+            self._block += encoded
+        else:
+            position = len(self.data)
+            self.data += encoded
+        string_id = self.ids[text] = len(self.ids)
+        self.index += _STRING.pack(position, len(encoded))
+        return string_id
+
+    def _flush(self):
+        self.data += zlib.compress(bytes(self._block), 9)
+        self.block_offsets.append(len(self.data))
+        self._block = bytearray()
+
+    def finish(self):
+        if self.compress and self._block:
+            self._flush()
+
+
+def compile_pack(filenames, output=DEFAULT_PACK_FILE, compress=False):
+    """
+    Compiles question pool files into a binary question pack.
+
+    The questions are cleaned with text_normalizer.normalize_text and their points computed once, here, so
+    loading a pack does no text processing. Every distinct string (categories, answers such as "True", questions)
+    is stored once in the string table. Questions are streamed from the files (see question_stream.py), so only
+    the records and the string table are held in memory while compiling.
+
+    File layout (little endian):
+        header       magic "QPAK", version, flags, counts and the offsets of the sections below
+        buckets      (start, end) of every (difficulty, type), in DIFFICULTIES x QUESTION_TYPES order
+        records      one fixed-width record per question: string ids of its fields, points, answer count
+        string index one (position, length) entry per string id
+        block index  offsets of the compressed string blocks (compressed packs only)
+        string data  UTF-8 strings, or zlib blocks of at most BLOCK_SIZE bytes of strings
+
+    Parameters:
+        filenames (list): JSON array or JSONL question files. Questions with an unknown difficulty or type, or
+            more than three incorrect answers, are skipped.
+        output (str): The file path of the pack.
+        compress (bool): Compress the string table, for a pack about a third smaller whose questions take a few
+            times longer to read.
+
+    Returns:
+        int: The number of questions in the pack.
+    """
+    strings = _StringTable(compress)
+    buckets = {bucket: bytearray() for bucket in _BUCKETS}
+    for filename in filenames:
+        for data in iter_questions(filename):
+            bucket = buckets.get((data.get("difficulty"), data.get("type")))
+            incorrect = data.get("incorrect_answers", [])
+            if bucket is None or len(incorrect) > 3:
+                continue
+            ids = [strings.add(data["type"]), strings.add(data["difficulty"]),
+                   strings.add(normalize_text(data.get("category", ""))), strings.add(normalize_text(data["question"])),
+                   strings.add(normalize_text(data["correct_answer"]))]
+            ids += [strings.add(normalize_text(answer)) for answer in incorrect]
+            ids += [_NO_STRING] * (3 - len(incorrect))
+            bucket += _RECORD.pack(*ids, POINTS.get(data["difficulty"], 0), len(incorrect))
+    strings.finish()
+
+    header_size = _HEADER.size + len(_BUCKETS) * _BUCKET.size
+    records_size = sum(len(records) for records in buckets.values())
+    string_index = header_size + records_size
+    block_index = string_index + len(strings.index)
+    data_offset = block_index + (len(strings.block_offsets) * 8 if compress else 0)
+    count = records_size // _RECORD.size
+    temp_output = f"{output}.tmp"
+    with open(temp_output, "wb") as file:
+        file.write(_HEADER.pack(MAGIC, VERSION, FLAG_COMPRESSED if compress else 0, count, len(strings.ids),
+                                len(strings.block_offsets) - 1 if compress else 0, header_size, string_index,
+                                block_index, data_offset))
+        start = 0
+        for bucket in _BUCKETS:
+            end = start + len(buckets[bucket]) // _RECORD.size
+            file.write(_BUCKET.pack(start, end))
+            start = end
+        for bucket in _BUCKETS:
+            file.write(buckets[bucket])
+        file.write(strings.index)
+        if compress:
+            file.write(strings.block_offsets.tobytes())
+        file.write(strings.data)
+    os.replace(temp_output, output)  # Processes that mapped the old pack keep reading it
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile question pools into a memory-mapped question pack.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    compile_parser = subcommands.add_parser("compile", help="compile pool files into a pack")
+    compile_parser.add_argument("files", nargs="*", help="JSON or JSONL pool files (default: data/*_questions.json)")
+    compile_parser.add_argument("--output", default=DEFAULT_PACK_FILE)
+    compile_parser.add_argument("--compress", action="store_true", help="compress the string table with zlib")
+    info_parser = subcommands.add_parser("info", help="describe a pack")
+    info_parser.add_argument("pack", nargs="?", default=DEFAULT_PACK_FILE)
+    args = parser.parse_args()
+
+    if args.command == "compile":
+        files = args.files or sorted(glob.glob(os.path.join("data", "*_questions.json")))
+        count = compile_pack(files, args.output, args.compress)
+        print(f"Compiled {count} questions into {args.output} ({os.path.getsize(args.output) / 1024:.0f} KiB)")
+    else:
+        pack = QuestionPack(args.pack)
+        print(f"{args.pack}: {len(pack)} questions, {pack._string_count} strings, "
+              f"{'compressed' if pack.compressed else 'uncompressed'}, {os.path.getsize(args.pack) / 1024:.0f} KiB")
+        for difficulty, question_type in _BUCKETS:
+            start, end = pack.bucket(difficulty, question_type)
+            print(f"  {difficulty:6s} {question_type:8s} {end - start}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+import argparse
+import itertools
+import json
+import math
+import random
+
+CHUNK_SIZE = 1 << 16  # Characters read at a time
+MAX_ITEM_SIZE = 1 << 20  # A single question larger than this is treated as a broken file
+
+_WHITESPACE = " \t\n\r"
+
+
+def iter_questions(filename, chunk_size=CHUNK_SIZE):
+    """
+    Yields the questions of a JSON array file or a JSONL file (one question per line) one at a time.
+
+    Unlike json.load, the file is read in chunks of chunk_size characters and each question is parsed as soon
+    as it is complete, so memory is bounded by one chunk plus the questions the caller keeps, not by the size
+    of the file. The format is detected from the first character: "[" for a JSON array, anything else for JSONL.
+
+    Parameters:
+        filename (str): The question file.
+        chunk_size (int): The number of characters read at a time.
+
+    Yields:
+        dict: Question dictionaries, in file order.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+        json.JSONDecodeError: If the file is not a valid JSON array or JSONL file.
+    """
+    with open(filename, "r", encoding="utf-8") as file:
+        head = file.read(chunk_size)
+        if not head.strip(_WHITESPACE):
+            raise json.JSONDecodeError("Expecting value", head, 0)  # Like json.load, an empty file is invalid
+        if head.lstrip(_WHITESPACE)[:1] == "[":
+            yield from _iter_json_array(file, head, chunk_size)
+            return
+        file.seek(0)
+        keys = {}
+        for number, line in enumerate(file, start=1):
+            line = line.strip()
+            if line:
+                try:
+                    yield _share_keys(json.loads(line), keys)
+                except json.JSONDecodeError as e:
+                    raise json.JSONDecodeError(f"{e.msg} (line {number})", e.doc, e.pos) from None
+
+
+def _share_keys(item, keys):
+    # json.load shares the key strings of every object in a document, parsing item by item does not: every
+    # question would hold its own copy of "question", "correct_answer" and so on
+    if isinstance(item, dict):
+        return {keys.setdefault(key, key): value for key, value in item.items()}
+    return item
+
+
+def _iter_json_array(file, buffer, chunk_size):
+    decoder = json.JSONDecoder()
+    keys = {}
+    eof = False
+    pos = _skip_whitespace(buffer, 0) + 1  # Past the "["
+    expect_item = True  # Only false after an item, when a "," or "]" must follow
+    first_item = True  # Whether no item was parsed yet, so "]" may directly follow "["
+
+    while True:
+        pos = _skip_whitespace(buffer, pos)
+        if pos == len(buffer):
+            if eof:
+                raise json.JSONDecodeError("Unterminated array", buffer, pos)
+            buffer, pos, eof = _refill(file, buffer, pos, chunk_size)
+            continue
+        char = buffer[pos]
+        if char == "]":
+            if expect_item and not first_item:
+                raise json.JSONDecodeError("Illegal trailing comma before end of array", buffer, pos)
+            return
+        if not expect_item:
+            if char != ",":
+                raise json.JSONDecodeError("Expecting ',' delimiter", buffer, pos)
+            pos += 1
+            expect_item = True
+            continue
+        first_item = False
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            end = None
+        if end is None or (end == len(buffer) and not eof):
+            # The item runs past the end of the buffer (or a number might go on): read more and parse it again
+            if eof or len(buffer) - pos > MAX_ITEM_SIZE:
+                decoder.raw_decode(buffer, pos)  # Raises the parse error
+                raise json.JSONDecodeError("Item too large", buffer, pos)
+            buffer, pos, eof = _refill(file, buffer, pos, chunk_size)
+            continue
+        yield _share_keys(item, keys)
+        pos = end
+        expect_item = False
+
+
+def _skip_whitespace(buffer, pos):
+    while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+        pos += 1
+    return pos
+
+
+def _refill(file, buffer, pos, chunk_size):
+    # Drop what was parsed and append the next chunk
+    chunk = file.read(chunk_size)
+    return buffer[pos:] + chunk, 0, not chunk
+
+
+def filter_questions(questions, difficulty=None, question_type=None, category=None):
+    """
+    Yields the questions that match every given filter, lazily.
+
+    Parameters:
+        questions (iterable): Question dictionaries.
+        difficulty (str, optional): Only questions of this difficulty.
+        question_type (str, optional): Only questions of this type ("multiple" or "boolean").
+        category (str, optional): Only questions of this category (case insensitive).
+    """
+    category = category.lower() if category else None
+    for question in questions:
+        if difficulty and question.get("difficulty") != difficulty:
+            continue
+        if question_type and question.get("type") != question_type:
+            continue
+        if category and question.get("category", "").lower() != category:
+            continue
+        yield question
+
+
+def reservoir_sample(items, k, rng=random):
+    """
+    Returns k items drawn uniformly at random from an iterable of unknown length, in one pass.
+
+    Uses reservoir sampling with geometric skips (Li's Algorithm L): only the k kept items are held, and the
+    random number generator is called O(k log(n / k)) times instead of once per item.
+
+    Parameters:
+        items (iterable): The items to sample, e.g. iter_questions(...).
+        k (int): The number of items to draw.
+        rng (random.Random): The random number generator to draw with.
+
+    Returns:
+        list: Up to k items (all of them if there are fewer), in no particular order.
+    """
+    if k <= 0:
+        return []
+    iterator = iter(items)
+    reservoir = list(itertools.islice(iterator, k))
+    if len(reservoir) < k:
+        return reservoir
+    w = math.exp(math.log(1.0 - rng.random()) / k)
+    while True:
+        skip = int(math.log(1.0 - rng.random()) / math.log(1.0 - w)) if w < 1.0 else 0
+        item = next(itertools.islice(iterator, skip, None), _END)
+        if item is _END:
+            return reservoir
+        reservoir[rng.randrange(k)] = item
+        w *= math.exp(math.log(1.0 - rng.random()) / k)
+
+
+_END = object()
+
+
+def sample_questions(filename, k, difficulty=None, question_type=None, category=None, rng=random):
+    """
+    Streams a question file and returns k random questions matching the filters, holding at most k in memory.
+
+    Parameters:
+        filename (str): A JSON array or JSONL question file.
+        k (int): The number of questions to draw.
+        difficulty (str, optional): Only questions of this difficulty.
+        question_type (str, optional): Only questions of this type.
+        category (str, optional): Only questions of this category.
+        rng (random.Random): The random number generator to draw with.
+
+    Returns:
+        list: Up to k question dictionaries.
+    """
+    return reservoir_sample(
+        filter_questions(iter_questions(filename), difficulty, question_type, category), k, rng
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Draw a random sample from a large JSON or JSONL question file without loading it at once, "
+                    "e.g. to build a smaller pool for a device with little memory.")
+    parser.add_argument("file")
+    parser.add_argument("--sample", type=int, required=True, help="the number of questions to draw")
+    parser.add_argument("--difficulty", choices=("easy", "medium", "hard"))
+    parser.add_argument("--type", dest="question_type", choices=("multiple", "boolean"))
+    parser.add_argument("--category")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", help="write the sample as a JSON array to this file instead of stdout")
+    args = parser.parse_args()
+
+    questions = sample_questions(args.file, args.sample, args.difficulty, args.question_type, args.category,
+                                 random.Random(args.seed))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(questions, file)
+    else:
+        print(json.dumps(questions, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,42 @@
 import os
 import time
 from utils import getch, clear_screen
-import sys  # to use animation effect
+from renderer import get_renderer
+from assets import get_asset
 import random  # to use shuffle function
+import game_engine
+import memory_profile
+import metrics
+from game_engine import QuestionDeck
 
 class QuizGame:
 
-    def __init__(self, questions, score_manager):
+    @metrics.timed("quiz_game.setup")
+    def __init__(self, questions, score_manager, adaptive_deck=None, player=None):
         """
         Initializes a new instance of the QuizGame class.
 
         Args:
             questions (list): A list of question objects.
             score_manager (ScoreManager): An instance of the ScoreManager class.
+            adaptive_deck (QuestionDeck, optional): Play an adaptive game on this deck instead of asking the given
+                questions: each question is chosen to match the player's skill rating (see ratings.py).
+            player (str, optional): The name of the player, whose skill rating an adaptive game uses. The score is
+                saved under it without asking for a name again.
 
         Returns:
             None
 
         This constructor initializes the QuizGame object with the provided questions and score manager.
-        It also initializes the score attribute to 0.
+        It also initializes the score attribute to 0. The game logic itself runs on the step-based engine in
+        game_engine.py, with the questions asked in the given order.
         """
         self.questions = questions
         self.score_manager = score_manager
         self.score = 0
+        self.deck = QuestionDeck.from_questions(questions)
+        self.adaptive_deck = adaptive_deck
+        self.player = player
 
     def print_ascii_art(self, file_path):
         """
@@ -35,9 +49,7 @@ class QuizGame:
             None
         """
         try:
-            with open(file_path, "r") as file:
-                ascii_art = file.read()
-                print(ascii_art)
+            print(get_asset(file_path))
         except FileNotFoundError:
             print("Error: ASCII art file not found.")
 
@@ -51,14 +63,11 @@ class QuizGame:
         Returns:
             None
 
-        This function iterates over each character in the given text and prints it one by one.
-        It flushes the output after each character to ensure immediate display.
-        The function also adds a small delay of 0.03 seconds between each character to create an animation effect.
+        This function types the text out with a delay of 0.03 seconds between each character to create an animation effect.
+        The renderer groups the characters typed within one frame into a single write, and the pace follows its
+        animation profile (set QUIZ_ANIMATION=instant to print the text at once).
         """
-        for char in text:
-            sys.stdout.write(char)
-            sys.stdout.flush()
-            time.sleep(0.03)  # Adjust the speed of animation here
+        get_renderer().animate(text, 0.03)  # Adjust the speed of animation here
 
     def print_countdown(self):
         """
@@ -71,9 +80,9 @@ class QuizGame:
         """
         for i in range(3, 0, -1):
             print(i)
-            time.sleep(1)
+            get_renderer().pause(1)
         print("Let's go!")
-        time.sleep(1)
+        get_renderer().pause(1)
         clear_screen()
 
     def announce_start(self):
@@ -133,16 +142,33 @@ class QuizGame:
         Returns:
             list: A list of answers in randomized order, with the correct answer included.
         """
-        all_answers = question.incorrect_answers[:]
+        all_answers = list(question.incorrect_answers)
         all_answers.append(question.correct_answer)
         random.shuffle(all_answers)
         return all_answers
 
+    def play_headless(self, strategy, rng=None):
+        """
+        Plays the quiz game without any terminal input, output or pauses.
+
+        Args:
+            strategy: An answer strategy from simulation.py (RandomStrategy, OracleStrategy, AccuracyStrategy).
+            rng (random.Random, optional): The random number generator to use, for reproducible games.
+
+        Returns:
+            dict: The result of the game, as returned by simulation.play_headless.
+        """
+        from simulation import play_headless
+        result = play_headless(self.deck, strategy, rng or random.Random(), record_answers=True,
+                               selection=range(len(self.questions)))
+        self.score = result["score"]
+        return result
+
     def play(self):
         """
         Plays the quiz game.
 
-        This method iterates over each question in the `questions` list and presents it to the user.
+        This method steps the game engine through each question in the `questions` list and presents it to the user.
         For each question, the answers are displayed with corresponding numbers.
         The user is prompted to enter their answer, which is then checked against the correct answer.
         If the user's answer is correct, the score is incremented by the question's points and a "Correct!" message is printed.
@@ -156,31 +182,31 @@ class QuizGame:
             None
         """
         self.announce_start()
-
-        # Announce the start of easy questions
-        self.announce_easy_questions()
-        current_difficulty = "easy"
-        question_count = 0
-
-        for idx, question in enumerate(self.questions, start=1):
-            if question_count == 5:
-                self.announce_medium_questions()
-                current_difficulty = "medium"
-            elif question_count == 10:
-                self.announce_hard_questions()
-                current_difficulty = "hard"
+        stage_announcements = {
+            "easy": self.announce_easy_questions,
+            "medium": self.announce_medium_questions,
+            "hard": self.announce_hard_questions,
+        }
+
+        if self.adaptive_deck is not None:
+            state = game_engine.start(self.adaptive_deck, player=self.player, adaptive=True)
+            stage_announcements = {}  # The difficulty follows the player, there are no stages to announce
+        else:
+            state = game_engine.start(self.deck, selection=range(len(self.questions)))
+        while state.status == game_engine.PLAYING:
+            turn = game_engine.next_question(state)
+            if turn.new_stage and turn.question.difficulty in stage_announcements:
+                stage_announcements[turn.question.difficulty]()
 
             clear_screen()
-    
-            self.print_with_animation(f"Question {idx}: ")
-            self.print_with_animation(question.question + "\n")
 
-            randomized_answers = self.randomize_answers(question)
+            self.print_with_animation(f"Question {turn.number}: ")
+            self.print_with_animation(turn.question.question + "\n")
 
-            for index, answer in enumerate(randomized_answers):
-                print(f"{index + 1}. {answer}")
-            
-            valid_options = [str(i) for i in range(1, len(randomized_answers) + 1)]
+            get_renderer().write("".join(f"{index + 1}. {answer}\n" for index, answer in enumerate(turn.answers)))
+
+            valid_options = [str(i) for i in range(1, len(turn.answers) + 1)]
+            state.shown_at = time.time()  # The answer time is logged with the answer (see answer_events.py)
 
             user_answer = input("Your answer: ").strip().lower()
 
@@ -190,33 +216,35 @@ class QuizGame:
                 print(f"Valid options: {valid_options}")
                 user_answer = input("Your answer: ").strip().lower()
 
-            user_answer = randomized_answers[int(user_answer) - 1]
+            result = game_engine.answer(state, int(user_answer) - 1)
+            metrics.increment("quiz_game.answers")
+            memory_profile.checkpoint(f"question {turn.number}")
+            self.score = result["score"]
 
-            if question.check_answer(user_answer):
-                points = question.calculate_points()
-                self.score += points
+            if result["correct"]:
                 print("Correct! Next question!")
-                question_count += 1
                 print(f"Your current score is {self.score}")
-                time.sleep(1.5)  # Pause for 1.5 seconds to show "Correct!" message
+                if "rating" in result:
+                    print(f"Your skill rating is now {result['rating']}")
+                get_renderer().pause(1.5)  # Pause for 1.5 seconds to show "Correct!" message
             else:
-                correct_answer = question.correct_answer
-                if question.difficulty == "boolean":
-                    correct_answer = "True" if correct_answer == "True" else "False"
-                print(f"Incorrect. The correct answer is: {correct_answer}. Game over.")
-                time.sleep(2)  # Pause to show the correct answer
+                print(f"Incorrect. The correct answer is: {result['correct_answer']}. Game over.")
+                get_renderer().pause(2)  # Pause to show the correct answer
                 clear_screen()
-                break
 
         print(f"Your final score is {self.score}")
-        name = input("Enter your name to save your score: ").strip()
-        self.score_manager.update_high_scores(name, self.score)
+        name = self.player or input("Enter your name to save your score: ").strip()
+        with metrics.span("quiz_game.save_score"):
+            saved = game_engine.finish(state, name, self.score_manager)
+        metrics.increment("quiz_game.games")
+        memory_profile.checkpoint("score save")
         print("Score saved!")
+        print(f"You are ranked #{saved['rank']}, better than {saved['percentile']:.0f}% of players.")
 
         if self.score == 45:  # This is the most points a person can score, meaning they won!
             self.print_ascii_art('congrats.txt')
             
-            time.sleep(5)
+            get_renderer().pause(5)
             clear_screen()
         else:
             input("Press any key to return to the main menu")
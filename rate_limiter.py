@@ -0,0 +1,152 @@
+import json
+import os
+import threading
+import time
+
+import metrics
+from file_lock import file_lock
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity=1, state_file=None):
+        """
+        Initializes a token bucket that paces requests to a rate-limited upstream.
+
+        Tokens are added at the given rate up to capacity, and every request takes one. When a state file is given,
+        the bucket is kept in that file under a file lock, so every process using the same file shares one budget.
+
+        Parameters:
+            rate (float): The number of tokens added per second.
+            capacity (int): The maximum number of tokens, i.e. the largest burst of requests.
+            state_file (str, optional): The file the bucket is shared through. The bucket is per process if None.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.state_file = state_file
+        self._state = {"tokens": capacity, "updated": time.time(), "blocked_until": 0.0}
+        self._lock = threading.Lock()
+
+    def _read_state(self):
+        try:
+            with open(self.state_file, "r") as file:
+                return json.load(file)
+        except (FileNotFoundError, ValueError):
+            return {"tokens": self.capacity, "updated": time.time(), "blocked_until": 0.0}
+
+    def _write_state(self, state):
+        with open(self.state_file, "w") as file:
+            json.dump(state, file)
+
+    def _update(self, change):
+        # Wall-clock time, since the state is compared across processes
+        with self._lock:
+            if self.state_file is None:
+                return change(self._state, time.time())
+            directory = os.path.dirname(self.state_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with file_lock(f"{self.state_file}.lock"):
+                state = self._read_state()
+                result = change(state, time.time())
+                self._write_state(state)
+                return result
+
+    def _take(self, state, now):
+        state["tokens"] = min(self.capacity, state["tokens"] + max(0.0, now - state["updated"]) * self.rate)
+        state["updated"] = now
+        if now < state["blocked_until"]:
+            return state["blocked_until"] - now
+        if state["tokens"] >= 1:
+            state["tokens"] -= 1
+            return 0.0
+        return (1 - state["tokens"]) / self.rate
+
+    def acquire(self, timeout=None):
+        """
+        Takes a token, waiting for one if the bucket is empty.
+
+        Parameters:
+            timeout (float, optional): The maximum number of seconds to wait. 0 never waits, None waits as long
+                as needed.
+
+        Returns:
+            bool: Whether a token was taken.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self._update(self._take)
+            if wait <= 0:
+                return True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+    def backoff(self, seconds):
+        """
+        Blocks every request for the given number of seconds, e.g. after the upstream answered 429.
+        """
+        def block(state, now):
+            state["tokens"] = 0
+            state["updated"] = now
+            state["blocked_until"] = max(state["blocked_until"], now + seconds)
+        self._update(block)
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self):
+        """
+        Initializes a group of calls that are coalesced by key.
+
+        While a call for a key is running, other callers with the same key wait for it and share its result
+        instead of making the same call again.
+        """
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def do(self, key, function):
+        """
+        Calls function() unless a call for key is already running, in which case its result is returned.
+
+        Parameters:
+            key: The key of the call.
+            function (callable): A function without arguments.
+
+        Returns:
+            The result of the call. If the call raised an exception, every waiting caller raises it.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+                metrics.increment("single_flight.coalesced")
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = function()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result
@@ -0,0 +1,200 @@
+import math
+import threading
+from array import array
+from bisect import bisect_left, insort
+
+from dedup_index import text_hash
+
+# Starting ratings of questions that were never answered, by their difficulty label
+INITIAL_RATINGS = {"easy": 1200.0, "medium": 1500.0, "hard": 1800.0}
+PLAYER_RATING = 1400.0  # The starting rating of a new player
+PLAYER_K = 32.0
+QUESTION_K = 16.0
+PROVISIONAL_ANSWERS = 20  # Questions move twice as fast until they were answered this many times
+TARGET_SUCCESS = 0.6  # The chance of a correct answer the next question is chosen for
+BUCKET_WIDTH = 25  # Rating points per bucket
+PICK_TRIES = 8  # Random picks per bucket before moving on to the next nearest bucket
+
+
+def expected_score(player_rating, question_rating):
+    """
+    Returns the chance that a player with the given rating answers a question with the given rating correctly.
+    """
+    return 1.0 / (1.0 + 10.0 ** ((question_rating - player_rating) / 400.0))
+
+
+class RatingTable:
+    def __init__(self, questions, bank=None, persist=True, bucket_width=BUCKET_WIDTH):
+        """
+        Initializes Elo-style skill ratings for the questions of a deck, used to pick questions adaptively.
+
+        Every answer moves the player's rating and the question's rating toward the outcome, by how surprising it
+        was. Questions are kept in buckets of bucket_width rating points, and the ids of the non-empty buckets in
+        a sorted list, so choosing a question near a target rating is a binary search plus a few random picks,
+        and a rating update only moves a question to another bucket when it crosses a bucket boundary.
+
+        Players' ratings are not kept here: a game carries its player's rating, which is read when the game starts
+        and saved when it ends, so concurrent processes never hold a stale copy.
+
+        Every process holds its own copy of the question ratings, so save() stores how much each rating changed
+        since the last save rather than its value: the bank adds up the changes of every process.
+
+        Parameters:
+            questions (sequence): The deck's Question objects, looked up by position.
+            bank (QuestionBank, optional): The question bank ratings are stored in. Defaults to the shared bank,
+                looked up on every use, so a forked process opens its own connection.
+            persist (bool): Load and save ratings in the question bank. Off for simulations.
+            bucket_width (int): The number of rating points per bucket.
+        """
+        self.questions = questions
+        self.persist = persist
+        self.bucket_width = bucket_width
+        self._bank = bank
+        self._lock = threading.Lock()
+        self._ratings = array("d", (INITIAL_RATINGS.get(q.difficulty, INITIAL_RATINGS["medium"]) for q in questions))
+        self._answers = array("I", bytes(4 * len(questions)))
+        self._changed = {}  # The (rating, answers) changes of each question since the last save, by position
+        stored = self._get_bank().load_question_ratings() if persist else None
+        if stored:
+            for position, question in enumerate(questions):
+                rating = stored.get(text_hash(question.question, question.correct_answer))
+                if rating is not None:
+                    self._ratings[position], self._answers[position] = rating
+
+        self._bucket_ids = array("i", bytes(4 * len(questions)))
+        self._slots = array("I", bytes(4 * len(questions)))  # The index of each question in its bucket
+        self._buckets = {}
+        self._keys = []  # The ids of the non-empty buckets, sorted
+        for position, rating in enumerate(self._ratings):
+            self._add(position, int(rating // bucket_width))
+
+    def _get_bank(self):
+        if self._bank is not None:
+            return self._bank
+        from question_bank import get_question_bank
+        return get_question_bank()
+
+    def _add(self, position, bucket_id):
+        bucket = self._buckets.get(bucket_id)
+        if bucket is None:
+            bucket = self._buckets[bucket_id] = []
+            insort(self._keys, bucket_id)
+        self._bucket_ids[position] = bucket_id
+        self._slots[position] = len(bucket)
+        bucket.append(position)
+
+    def _remove(self, position):
+        bucket_id = self._bucket_ids[position]
+        bucket = self._buckets[bucket_id]
+        # Swap with the last question of the bucket, so removal does not shift the list
+        last = bucket.pop()
+        if last != position:
+            slot = self._slots[position]
+            bucket[slot] = last
+            self._slots[last] = slot
+        if not bucket:
+            del self._buckets[bucket_id]
+            del self._keys[bisect_left(self._keys, bucket_id)]
+
+    def rating(self, position):
+        """
+        Returns the current rating of the question at the given deck position.
+        """
+        return self._ratings[position]
+
+    def player_rating(self, player):
+        """
+        Returns the stored rating of a player, or the starting rating for a new or anonymous player.
+        """
+        if player and self.persist:
+            rating = self._get_bank().load_player_rating(player)
+            if rating is not None:
+                return rating
+        return PLAYER_RATING
+
+    def update(self, position, player_rating, correct):
+        """
+        Updates the ratings of a question and its player after an answer.
+
+        Parameters:
+            position (int): The deck position of the answered question.
+            player_rating (float): The player's rating before the answer.
+            correct (bool): Whether the answer was correct.
+
+        Returns:
+            float: The player's new rating.
+        """
+        with self._lock:
+            rating = self._ratings[position]
+            surprise = correct - expected_score(player_rating, rating)
+            answers = self._answers[position]
+            k = QUESTION_K * (2 if answers < PROVISIONAL_ANSWERS else 1)
+            change = -k * surprise
+            rating += change
+            self._ratings[position] = rating
+            self._answers[position] = answers + 1
+            bucket_id = int(rating // self.bucket_width)
+            if bucket_id != self._bucket_ids[position]:
+                self._remove(position)
+                self._add(position, bucket_id)
+            if self.persist:
+                rating_change, answers_change = self._changed.get(position, (0.0, 0))
+                self._changed[position] = (rating_change + change, answers_change + 1)
+        return player_rating + PLAYER_K * surprise
+
+    def choose(self, rng, player_rating, exclude=(), target=TARGET_SUCCESS):
+        """
+        Returns the deck position of a question the player answers correctly with about the target chance.
+
+        The bucket of the target rating is found by binary search, then buckets are visited from the nearest
+        outwards until one has a question that is not excluded.
+
+        Parameters:
+            rng (random.Random): The random number generator to pick with.
+            player_rating (float): The player's current rating.
+            exclude (container): Deck positions not to choose, e.g. the questions already asked in the game.
+            target (float): The chance of a correct answer to aim for, between 0 and 1.
+
+        Returns:
+            int: The deck position, or None if every question is excluded.
+        """
+        goal = int((player_rating + 400.0 * math.log10(1.0 / target - 1.0)) // self.bucket_width)
+        with self._lock:
+            keys = self._keys
+            high = bisect_left(keys, goal)
+            low = high - 1
+            while low >= 0 or high < len(keys):
+                if high < len(keys) and (low < 0 or keys[high] - goal <= goal - keys[low]):
+                    bucket = self._buckets[keys[high]]
+                    high += 1
+                else:
+                    bucket = self._buckets[keys[low]]
+                    low -= 1
+                if len(bucket) > PICK_TRIES:
+                    for _ in range(PICK_TRIES):
+                        position = bucket[rng.randrange(len(bucket))]
+                        if position not in exclude:
+                            return position
+                candidates = [position for position in bucket if position not in exclude]
+                if candidates:
+                    return rng.choice(candidates)
+        return None
+
+    def save(self, player=None, player_rating=None):
+        """
+        Stores the rating changes of the questions answered since the last save, and optionally a player's rating.
+        """
+        if not self.persist:
+            return
+        with self._lock:
+            changed = self._changed
+            self._changed = {}
+            rows = []
+            for p, (rating, answers) in changed.items():
+                question = self.questions[p]
+                question_hash = text_hash(question.question, question.correct_answer)
+                rows.append((question_hash, self._ratings[p], self._answers[p], rating, answers))
+        bank = self._get_bank()
+        bank.save_question_ratings(rows)
+        if player and player_rating is not None:
+            bank.save_player_rating(player, player_rating)
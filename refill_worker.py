@@ -0,0 +1,89 @@
+import logging
+import threading
+
+import api
+from question_bank import get_question_bank, DIFFICULTIES, QUESTION_TYPES
+
+
+class RefillWorker(threading.Thread):
+    def __init__(self, low_water_mark=100, interval=60.0, request_interval=5.0, buckets=None, bank=None):
+        """
+        Initializes a background worker that keeps every question pool above a low-water mark.
+
+        The worker wakes up every interval seconds and fetches more questions from the trivia API for every
+        (difficulty, question type) bucket holding fewer than low_water_mark questions. All requests share one
+        session token, so the API does not hand out questions the worker already fetched, and new questions are
+        merged into the existing pool rather than replacing it. Players never wait on these fetches.
+
+        Parameters:
+            low_water_mark (int): The number of questions below which a bucket is refilled.
+            interval (float): The number of seconds between two refill rounds.
+            request_interval (float): The number of seconds to wait between two API requests.
+            buckets (list, optional): The (difficulty, question_type) buckets to keep filled. Defaults to all of them.
+            bank (QuestionBank, optional): The question bank to keep in sync. Defaults to the shared bank.
+        """
+        super().__init__(name="question-refill", daemon=True)
+        self.low_water_mark = low_water_mark
+        self.interval = interval
+        self.request_interval = request_interval
+        self.buckets = buckets or [(d, t) for d in DIFFICULTIES for t in QUESTION_TYPES]
+        self.bank = bank
+        self.session_token = api.SessionToken()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        """
+        Runs refill rounds until stop() is called.
+        """
+        if self.bank is None:
+            self.bank = get_question_bank()
+        while not self._stop_event.is_set():
+            self.refill_once()
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        """
+        Asks the worker to stop after the current request.
+        """
+        self._stop_event.set()
+
+    def refill_once(self):
+        """
+        Fetches one batch of questions for every bucket below the low-water mark.
+
+        Returns:
+            int: The number of questions added across all buckets.
+        """
+        added = 0
+        for difficulty, question_type in self.buckets:
+            if self._stop_event.is_set():
+                break
+            self.bank.sync_bucket(difficulty, question_type)
+            size = self.bank.count(difficulty, question_type)
+            if size >= self.low_water_mark:
+                continue
+            try:
+                added += self.refill_bucket(difficulty, question_type)
+            except Exception as e:
+                logging.error(f"Refill of {difficulty} {question_type} failed: {e}")
+            # Leave room under the API's per-IP rate limit for the games' own fetches
+            self._stop_event.wait(self.request_interval)
+        return added
+
+    def refill_bucket(self, difficulty, question_type):
+        """
+        Fetches one batch of questions for a bucket and appends the new ones to the pool file and the question bank.
+
+        Parameters:
+            difficulty (str): The difficulty level of the bucket.
+            question_type (str): The type of the bucket.
+
+        Returns:
+            int: The number of new questions added to the bucket.
+        """
+        questions = api.fetch_bucket(difficulty, question_type, session_token=self.session_token, wait=True)
+        if not questions:
+            return 0
+        added = api.add_questions_to_pool(difficulty, question_type, questions, bank=self.bank)
+        logging.info(f"Refilled {difficulty} {question_type} with {added} new questions")
+        return added
@@ -0,0 +1,154 @@
+import os
+import sys
+import time
+
+CLEAR_SCREEN = "\x1b[2J\x1b[H"
+CLEAR_LINE = "\x1b[K"
+CLEAR_BELOW = "\x1b[J"
+
+
+def _move_to(row):
+    """
+    Returns the ANSI escape moving the cursor to the start of the given (1-based) row.
+    """
+    return f"\x1b[{row};1H"
+
+
+class AnimationProfile:
+    def __init__(self, name, speed, frame_interval=1 / 60):
+        """
+        Initializes an animation pacing profile.
+
+        Parameters:
+            name (str): The name of the profile.
+            speed (float): The factor applied to every animation delay and pause. 0 disables them.
+            frame_interval (float): The minimum number of seconds between two writes of a typing animation.
+                Characters typed within one interval are written together, so the animation costs one write per
+                frame instead of one per character.
+        """
+        self.name = name
+        self.speed = speed
+        self.frame_interval = frame_interval
+
+
+PROFILES = {
+    "normal": AnimationProfile("normal", 1.0),
+    "fast": AnimationProfile("fast", 0.25),
+    "instant": AnimationProfile("instant", 0.0),
+}
+
+
+class Renderer:
+    def __init__(self, stream=None, profile=None):
+        """
+        Initializes a terminal renderer that writes buffered frames with ANSI escapes.
+
+        The renderer remembers the lines of the last frame drawn with draw_frame, so redrawing a screen only
+        rewrites the lines that changed. Clearing the screen writes an escape sequence instead of starting a
+        'clear' subprocess.
+
+        Parameters:
+            stream (file, optional): The stream to write to. Defaults to sys.stdout.
+            profile (AnimationProfile, optional): The animation pacing. Defaults to the profile named by the
+                QUIZ_ANIMATION environment variable ("normal", "fast" or "instant").
+        """
+        self.stream = stream
+        self.profile = profile or PROFILES.get(os.environ.get("QUIZ_ANIMATION", "normal"), PROFILES["normal"])
+        self._buffer = []
+        self._frame = None  # Lines currently on screen, or None if unknown
+
+    def _write(self, text):
+        self._buffer.append(text)
+
+    def flush(self):
+        """
+        Writes everything buffered so far with a single write and flush.
+        """
+        if self._buffer:
+            stream = self.stream or sys.stdout
+            stream.write("".join(self._buffer))
+            stream.flush()
+            self._buffer.clear()
+
+    def write(self, text):
+        """
+        Writes text at the cursor position.
+        """
+        self._write(text)
+        self.flush()
+
+    def clear(self):
+        """
+        Clears the terminal screen and moves the cursor to the top left corner.
+        """
+        if os.name == 'nt' and self.stream is None:  # Older Windows consoles do not understand ANSI escapes
+            os.system('cls')
+        else:
+            self._write(CLEAR_SCREEN)
+            self.flush()
+        self._frame = []
+
+    def draw_frame(self, lines):
+        """
+        Draws a full-screen frame, rewriting only the lines that differ from the previous frame.
+
+        Anything printed below the previous frame (such as prompts and typed input) is erased, and the cursor is
+        left on the line right below the frame.
+
+        Parameters:
+            lines (list): The lines of the frame, from the top of the screen.
+        """
+        if self._frame is None:
+            self._write(CLEAR_SCREEN)
+            self._frame = []
+        for row, line in enumerate(lines, start=1):
+            if row > len(self._frame) or self._frame[row - 1] != line:
+                self._write(_move_to(row) + line + CLEAR_LINE)
+        self._write(_move_to(len(lines) + 1) + CLEAR_BELOW)
+        self.flush()
+        self._frame = list(lines)
+
+    def animate(self, text, delay):
+        """
+        Writes text with a typing animation, at the pace of the current profile.
+
+        Parameters:
+            text (str): The text to write.
+            delay (float): The delay (in seconds) between two characters at normal speed.
+        """
+        delay *= self.profile.speed
+        if delay <= 0:
+            self.write(text)
+            return
+        chunk_size = max(1, int(self.profile.frame_interval / delay))
+        for start in range(0, len(text), chunk_size):
+            chunk = text[start:start + chunk_size]
+            self.write(chunk)
+            time.sleep(delay * len(chunk))
+
+    def pause(self, seconds):
+        """
+        Waits for the given number of seconds, scaled by the current profile.
+        """
+        seconds *= self.profile.speed
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def invalidate(self):
+        """
+        Forgets what is on screen, so the next frame is drawn in full.
+        """
+        self._frame = None
+
+
+_renderer = None
+
+
+def get_renderer():
+    """
+    Returns the shared renderer for the terminal.
+    """
+    global _renderer
+    if _renderer is None:
+        _renderer = Renderer()
+    return _renderer
@@ -0,0 +1,250 @@
+import atexit
+import csv
+import io
+import logging
+import os
+import threading
+import time
+import weakref
+from typing import Dict, Iterator, List
+
+from file_lock import file_lock
+from leaderboard import Leaderboard
+
+
+def _parse_rows(text: str) -> Iterator[Dict]:
+    """
+    Parses CSV rows of the form name,score,date, skipping malformed rows.
+    """
+    for row in csv.reader(io.StringIO(text)):
+        if len(row) == 3:
+            try:
+                yield {"name": row[0], "score": int(row[1]), "date": row[2]}
+            except ValueError:
+                # Skip rows with invalid integer values
+                continue
+
+
+# Journals with a writer that may still hold scores, closed by one exit handler per process
+_open_journals = weakref.WeakSet()
+
+
+def _close_all() -> None:
+    for journal in list(_open_journals):
+        try:
+            journal.close()
+        except OSError as e:
+            logging.error(f"Lost the uncommitted scores of {journal.journal_file}: {e}")
+
+
+atexit.register(_close_all)
+
+
+class ScoreJournal:
+    def __init__(self, snapshot_file: str, flush_interval: float = 0.2, max_batch: int = 256,
+                 compact_threshold: int = 1000):
+        """
+        Initializes a crash-safe score store made of a snapshot and an append-only journal.
+
+        The snapshot is the high score CSV file. Every new score is appended to snapshot_file + ".journal" by a
+        background writer, which groups all scores recorded within flush_interval seconds into one write and one
+        fsync (group commit). Once the journal holds compact_threshold rows, it is compacted into a new snapshot,
+        which is written to a temporary file and renamed into place. Appends and compactions hold a file lock,
+        so several processes can share the same files.
+
+        A batch that cannot be written stays queued and is retried every flush_interval seconds; flush() raises
+        the error instead of reporting the scores as saved.
+
+        Parameters:
+            snapshot_file (str): The file path of the high score snapshot.
+            flush_interval (float): The maximum number of seconds a score waits before it is committed.
+            max_batch (int): The number of pending scores that triggers an immediate commit.
+            compact_threshold (int): The number of journal rows that triggers a compaction.
+        """
+        self.snapshot_file = snapshot_file
+        self.journal_file = snapshot_file + ".journal"
+        self.lock_file = snapshot_file + ".lock"
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.compact_threshold = compact_threshold
+        self._pending: List[Dict] = []
+        self._appended = 0
+        self._committed = 0
+        self._journal_rows = 0
+        self._closing = False
+        self._flush_requested = False
+        self._failures = 0
+        self._error = None
+        self._cond = threading.Condition()
+        self._writer = None
+        _open_journals.add(self)
+
+    def replay(self) -> List[Dict]:
+        """
+        Reads the snapshot followed by the journal.
+
+        A torn last journal row (from a crash in the middle of a write) is ignored.
+
+        Returns:
+            list: Every score row, in the order it was recorded.
+        """
+        with file_lock(self.lock_file, shared=True):
+            rows = list(_parse_rows(self._read(self.snapshot_file)))
+            journal = self._read(self.journal_file)
+        if journal and not journal.endswith("\n"):
+            journal = journal[:journal.rfind("\n") + 1]
+        journal_rows = list(_parse_rows(journal))
+        self._journal_rows = len(journal_rows)
+        return rows + journal_rows
+
+    @staticmethod
+    def _read(path: str) -> str:
+        try:
+            with open(path, mode='r', newline='') as file:
+                return file.read()
+        except FileNotFoundError:
+            return ""
+
+    def append(self, name: str, score: int, date: str) -> None:
+        """
+        Queues a score row for the next group commit. Returns without waiting for the disk.
+        """
+        with self._cond:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run, name="score-journal", daemon=True)
+                self._writer.start()
+            self._pending.append({"name": name, "score": score, "date": date})
+            self._appended += 1
+            if len(self._pending) >= self.max_batch:
+                self._cond.notify_all()
+
+    def flush(self) -> None:
+        """
+        Blocks until every queued score has been written and fsynced.
+
+        Raises:
+            OSError: If a write failed while waiting. The scores stay queued and the writer keeps retrying them.
+        """
+        with self._cond:
+            target = self._appended
+            failures = self._failures
+            self._flush_requested = bool(self._pending)
+            self._cond.notify_all()
+            while self._committed < target and self._writer is not None and self._writer.is_alive():
+                if self._failures != failures:
+                    raise OSError(f"Could not write the scores to {self.journal_file}: {self._error}") \
+                        from self._error
+                self._cond.wait(self.flush_interval)
+
+    def close(self) -> None:
+        """
+        Commits the queued scores and stops the writer.
+
+        Raises:
+            OSError: If the queued scores could not be written. They are lost.
+        """
+        try:
+            self.flush()
+        finally:
+            with self._cond:
+                self._closing = True
+                self._cond.notify_all()
+                writer = self._writer
+            _open_journals.discard(self)
+            if writer is not None and writer is not threading.current_thread():
+                writer.join()  # Lets a compaction started by the last commit finish
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closing:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                # Give other scores a chance to join this commit
+                deadline = time.monotonic() + self.flush_interval
+                while len(self._pending) < self.max_batch and not self._closing and not self._flush_requested:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch, self._pending = self._pending, []
+                self._flush_requested = False
+            try:
+                self._commit(batch)
+            except OSError as e:
+                with self._cond:
+                    self._error = e
+                    self._failures += 1
+                    self._cond.notify_all()
+                    if self._closing:
+                        logging.error(f"Failed to write {len(batch) + len(self._pending)} scores to "
+                                      f"{self.journal_file}, giving up: {e}")
+                        return
+                    logging.error(f"Failed to write {len(batch)} scores to {self.journal_file}, retrying: {e}")
+                    self._pending[:0] = batch  # Keep the order the scores were recorded in
+                    self._cond.wait(self.flush_interval)
+                continue
+            with self._cond:
+                self._committed += len(batch)
+                self._cond.notify_all()
+            if self._journal_rows >= self.compact_threshold:
+                try:
+                    self.compact()
+                except OSError as e:
+                    logging.error(f"Failed to compact {self.journal_file}: {e}")
+
+    def _commit(self, batch: List[Dict]) -> None:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for entry in batch:
+            writer.writerow([entry["name"], entry["score"], entry["date"]])
+        data = buffer.getvalue().encode()
+        with file_lock(self.lock_file):
+            fd = os.open(self.journal_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                # Cut off a torn row left behind by a crash, so it neither merges with this batch nor becomes a
+                # row of its own
+                size = os.fstat(fd).st_size
+                if size and not self._ends_with_newline(size):
+                    os.ftruncate(fd, self._last_row_end())
+                os.write(fd, data)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        self._journal_rows += len(batch)
+        logging.info(f"Committed {len(batch)} scores to {self.journal_file}")
+
+    def _ends_with_newline(self, size: int) -> bool:
+        with open(self.journal_file, 'rb') as file:
+            file.seek(size - 1)
+            return file.read(1) == b"\n"
+
+    def _last_row_end(self) -> int:
+        # The journal is compacted every compact_threshold rows, so reading it whole stays cheap
+        with open(self.journal_file, 'rb') as file:
+            return file.read().rfind(b"\n") + 1
+
+    def compact(self) -> None:
+        """
+        Folds the journal into a new snapshot that keeps each player's best score, then empties the journal.
+        """
+        with file_lock(self.lock_file):
+            leaderboard = Leaderboard()
+            journal = self._read(self.journal_file)
+            if journal and not journal.endswith("\n"):
+                journal = journal[:journal.rfind("\n") + 1]
+            for entry in list(_parse_rows(self._read(self.snapshot_file))) + list(_parse_rows(journal)):
+                leaderboard.update(entry["name"], entry["score"], entry["date"])
+            temp_file = self.snapshot_file + ".tmp"
+            with open(temp_file, mode='w', newline='') as file:
+                writer = csv.writer(file)
+                for entry in leaderboard:
+                    writer.writerow([entry["name"], entry["score"], entry["date"]])
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp_file, self.snapshot_file)
+            with open(self.journal_file, 'w'):
+                pass
+        self._journal_rows = 0
+        logging.info(f"Compacted {self.journal_file} into {self.snapshot_file}")
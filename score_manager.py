@@ -1,6 +1,8 @@
-import csv
-from typing import Dict, List
+from typing import Dict, List, Optional
 from datetime import datetime
+from leaderboard import Leaderboard
+from score_journal import ScoreJournal
+import metrics
 
 class ScoreManager:
     def __init__(self, high_score_file: str):
@@ -11,42 +13,48 @@ class ScoreManager:
             high_score_file (str): The file path of the high score file.
         """
         self.high_score_file = high_score_file
-        self.high_scores = self.load_high_scores()
+        self.journal = ScoreJournal(high_score_file)
+        self.leaderboard = Leaderboard()
+        for entry in self.load_high_scores():
+            self.leaderboard.update(entry["name"], entry["score"], entry["date"])
 
+    @property
+    def high_scores(self) -> List[Dict]:
+        """
+        All high score entries, sorted in descending order of score.
+        """
+        return list(self.leaderboard)
+
+    @metrics.timed("score_manager.load_high_scores")
     def load_high_scores(self) -> List[Dict[str, str]]:
         """
-        Load the high scores from the high scores CSV file.
+        Load the high scores from the high scores CSV snapshot and replay the score journal on top of it.
 
         Returns:
             list: A list of dictionaries containing player names, scores, and dates.
         """
-        high_scores = []
-        try:
-            with open(self.high_score_file, mode='r') as file:
-                reader = csv.reader(file)
-                for rows in reader:
-                    if len(rows) == 3:
-                        try:
-                            high_scores.append({"name": rows[0], "score": int(rows[1]), "date": rows[2]})
-                        except ValueError:
-                            # Skip rows with invalid integer values
-                            continue
-        except FileNotFoundError:
-            return high_scores
-        return high_scores
+        return self.journal.replay()
 
+    @metrics.timed("score_manager.save_high_scores")
     def save_high_scores(self) -> None:
         """
-        Saves the high scores to a CSV file.
+        Makes sure every recorded score has been committed to the score journal on disk.
+
+        Scores are appended to the journal as they are recorded (see score_journal.py), so this only waits for
+        the pending group commit instead of rewriting the whole high scores file.
+
+        Raises:
+            OSError: If the scores could not be written. They stay queued and are retried.
+        """
+        self.journal.flush()
+
+    def close(self) -> None:
+        """
+        Commits the pending scores and stops the journal writer.
         """
-        try:
-            with open(self.high_score_file, mode='w', newline='') as file:
-                writer = csv.writer(file)
-                for entry in self.high_scores:
-                    writer.writerow([entry["name"], entry["score"], entry["date"]])
-        except Exception as e:
-            print(f"An error occurred while saving high scores: {e}")
+        self.journal.close()
 
+    @metrics.timed("score_manager.update_high_scores")
     def update_high_scores(self, player_name: str, score: int) -> None:
         """
         Updates the high scores with the given player name and score.
@@ -60,30 +68,44 @@ class ScoreManager:
 
         This function updates the high scores by checking if the player's score is higher than the existing score for the player. 
         If the score is higher, the player's score and date are updated. If the player does not exist in the high scores list, a new entry is added. 
-        The high scores list is then sorted in descending order based on the score. Finally, the updated high scores are saved to a file.
+        The leaderboard index keeps the entries ordered by score, so no re-sorting is needed. Finally, the new score is appended to the score journal.
         """
         date_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        updated = False
-        for entry in self.high_scores:
-            if entry["name"] == player_name:
-                if score > entry["score"]:
-                    entry["score"] = score
-                    entry["date"] = date_str
-                updated = True
-                break
-        if not updated:
-            self.high_scores.append({"name": player_name, "score": score, "date": date_str})
-        
-        # Sort and keep all scores, but only the top 10 scores will be displayed
-        self.high_scores = sorted(self.high_scores, key=lambda x: x["score"], reverse=True)
-        self.save_high_scores()
+        if self.leaderboard.update(player_name, score, date_str):
+            self.journal.append(player_name, score, date_str)
+
+    def get_rank(self, player_name: str) -> Optional[int]:
+        """
+        Returns the rank of the player on the leaderboard (1 is the best), or None if the player has no score yet.
+
+        Parameters:
+            player_name (str): The name of the player.
+        """
+        return self.leaderboard.rank(player_name)
+
+    def get_percentile(self, score: int) -> float:
+        """
+        Returns the percentage of players with a lower score than the given score.
+
+        Parameters:
+            score (int): The score to compare.
+        """
+        return self.leaderboard.percentile(score)
+
+    def get_top_scores(self, count: int) -> List[Dict]:
+        """
+        Returns the best count high score entries, in descending order of score.
+
+        Parameters:
+            count (int): The number of entries to return.
+        """
+        return self.leaderboard.top(count)
 
     def display_high_scores(self) -> None:
         """
         Displays the top 10 high scores in descending order with ranks.
         """
         titles = ["1st", "2nd", "3rd", "4th", "5th", "6th", "7th", "8th", "9th", "10th"]
-        sorted_scores = sorted(self.high_scores, key=lambda x: x["score"], reverse=True)[:10]
-        for idx, entry in enumerate(sorted_scores):  # Display only the top 10 scores
+        for idx, entry in enumerate(self.leaderboard.top(10)):  # Display only the top 10 scores
             title = titles[idx] if idx < len(titles) else f"{idx+1}th"
             print(f"{title}: {entry['name']} - {entry['score']} (on {entry['date']})\n")
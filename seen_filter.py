@@ -0,0 +1,87 @@
+import hashlib
+
+DEFAULT_NUM_BITS = 8192  # 1 KiB per generation
+DEFAULT_NUM_HASHES = 5
+DEFAULT_CAPACITY = 800  # Questions per generation, for about 1% false positives
+
+
+def _positions(key, num_bits, num_hashes):
+    # Double hashing: the k bit positions are derived from two 64-bit halves of one digest
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+    h1 = int.from_bytes(digest[:8], "little")
+    h2 = int.from_bytes(digest[8:], "little") | 1
+    return [(h1 + i * h2) % num_bits for i in range(num_hashes)]
+
+
+class SeenFilter:
+    def __init__(self, num_bits=DEFAULT_NUM_BITS, num_hashes=DEFAULT_NUM_HASHES, capacity=DEFAULT_CAPACITY,
+                 data=None):
+        """
+        Initializes a fixed-size Bloom filter of the questions a player has already seen.
+
+        The filter has two generations of num_bits bits. Questions are added to the current generation; when it
+        holds capacity questions, it becomes the previous generation and a new one is started. A question counts
+        as seen if either generation has it, so a player's most recent capacity to 2 * capacity questions are
+        remembered, in 2 * num_bits / 8 bytes no matter how long they play.
+
+        False positives only make the sampler skip a question the player has not seen.
+
+        Parameters:
+            num_bits (int): The number of bits per generation.
+            num_hashes (int): The number of bit positions per question.
+            capacity (int): The number of questions per generation.
+            data (bytes, optional): A filter serialized with to_bytes.
+        """
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.capacity = capacity
+        size = num_bits // 8
+        if data is not None and len(data) == 2 * size + 4:
+            self.count = int.from_bytes(data[:4], "little")
+            self._current = bytearray(data[4:4 + size])
+            self._previous = bytearray(data[4 + size:])
+        else:
+            self.count = 0
+            self._current = bytearray(size)
+            self._previous = bytearray(size)
+
+    def add(self, question):
+        """
+        Marks a question as seen.
+
+        Parameters:
+            question (str): The question text.
+        """
+        key = question_key(question)
+        if self.count >= self.capacity:
+            self._previous = self._current
+            self._current = bytearray(len(self._previous))
+            self.count = 0
+        for position in _positions(key, self.num_bits, self.num_hashes):
+            self._current[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, question):
+        positions = _positions(question_key(question), self.num_bits, self.num_hashes)
+        for bits in (self._current, self._previous):
+            if all(bits[position >> 3] & (1 << (position & 7)) for position in positions):
+                return True
+        return False
+
+    def to_bytes(self):
+        """
+        Serializes the filter, e.g. to store it in the question bank.
+        """
+        return self.count.to_bytes(4, "little") + bytes(self._current) + bytes(self._previous)
+
+
+def question_key(question):
+    """
+    Returns the key a question is remembered by: its text, case and surrounding whitespace ignored.
+
+    The text stays the same when the question bank re-imports its pools, unlike the question's row id.
+
+    Parameters:
+        question (str): The question text.
+    """
+    return question.strip().lower()
@@ -0,0 +1,329 @@
+import argparse
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import Flask, Response, jsonify, request
+
+import answer_events
+import game_engine
+import metrics
+from game_engine import QuestionDeck
+from question_bank import get_question_bank
+from score_manager import ScoreManager
+
+
+LOCK_TIMEOUT = 10.0  # Seconds a request waits for another request on the same game
+LEASE_SECONDS = 30.0  # Seconds after which a checked out game is taken back from a request that never returned it
+
+
+class GameBusyError(Exception):
+    """
+    Raised when a game stays checked out by another request for longer than LOCK_TIMEOUT.
+    """
+
+
+class SessionStore:
+    def __init__(self, ttl=1800, max_sessions=100_000):
+        """
+        Initializes the in-process store of live games.
+
+        Each game is a compact game_engine.GameState pointing into a deck shared by every game, so one process
+        can hold many thousands of them.
+
+        Parameters:
+            ttl (float): The number of seconds after which an idle session is dropped.
+            max_sessions (int): The maximum number of live sessions. The idlest sessions are dropped beyond it.
+        """
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._sessions = {}
+        self._leases = {}  # When the check-out of each checked out game lapses
+        self._lock = threading.Lock()
+        self._returned = threading.Condition(self._lock)
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def create(self, state):
+        """
+        Stores a new game and returns its id.
+        """
+        game_id = secrets.token_urlsafe(16)
+        with self._lock:
+            if len(self._sessions) >= self.max_sessions:
+                self._expire()
+            if len(self._sessions) >= self.max_sessions:
+                # Dicts keep insertion order, and checkout() re-inserts games on access, so the first one is the idlest
+                self._sessions.pop(next(iter(self._sessions)))
+            self._sessions[game_id] = (state, time.monotonic())
+        return game_id
+
+    def checkout(self, game_id, timeout=LOCK_TIMEOUT):
+        """
+        Returns a game for a request that changes it, and keeps every other request out of the game until the
+        request returns it with checkin(). Requests on one game therefore read, change and save it one at a time.
+
+        A game that was checked out more than LEASE_SECONDS ago is taken back, so a worker process that died
+        while holding a game does not lock it forever.
+
+        Parameters:
+            game_id (str): The id of the game.
+            timeout (float): The maximum number of seconds to wait for another request on the game.
+
+        Returns:
+            The game, or None if it does not exist or expired (then nothing is checked out).
+
+        Raises:
+            GameBusyError: If the game is still checked out after timeout seconds.
+        """
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while True:
+                now = time.monotonic()
+                lease = self._leases.get(game_id)
+                if lease is None or lease < now:
+                    break
+                if now >= deadline:
+                    raise GameBusyError("The game is busy with another request, try again.")
+                self._returned.wait(min(lease, deadline) - now)
+            entry = self._sessions.pop(game_id, None)
+            if entry is None or now - entry[1] > self.ttl:
+                self._leases.pop(game_id, None)
+                return None
+            self._sessions[game_id] = (entry[0], now)
+            self._leases[game_id] = now + LEASE_SECONDS
+            return entry[0]
+
+    def checkin(self, game_id, state):
+        """
+        Saves a game taken with checkout() (unless it was removed meanwhile) and lets the next request have it.
+        """
+        with self._lock:
+            if game_id in self._sessions:
+                self._sessions[game_id] = (state, time.monotonic())
+            self._leases.pop(game_id, None)
+            self._returned.notify_all()
+
+    def remove(self, game_id):
+        """
+        Drops a session.
+        """
+        with self._lock:
+            self._sessions.pop(game_id, None)
+
+    def _expire(self):
+        now = time.monotonic()
+        expired = [game_id for game_id, (_, last_seen) in self._sessions.items() if now - last_seen > self.ttl]
+        for game_id in expired:
+            del self._sessions[game_id]
+
+
+class _NotFound(Exception):
+    pass
+
+
+def _error(message, status):
+    return jsonify({"error": message}), status
+
+
+def create_app(score_manager=None, deck_loader=QuestionDeck.load, sessions=None, decks=None):
+    """
+    Creates the Flask application serving the quiz game over HTTP.
+
+    Games run on the step-based engine in game_engine.py, drawn from one shared deck per question type.
+
+    Endpoints:
+        POST /games                   Start a game. JSON body: {"question_type": "multiple" | "boolean" | "mixed"},
+                                      plus an optional "player" name to avoid questions the player has seen,
+                                      and an optional "category" and "keywords" (list of words) for a themed game,
+                                      or "adaptive": true to choose each question by the player's skill rating.
+        GET  /games/<id>/question     Get the current question and its answers.
+        POST /games/<id>/answer       Answer the current question. JSON body: {"answer": <1-based answer number>}.
+        POST /games/<id>/finish       Save the final score. JSON body: {"name": <player name>}.
+        GET  /leaderboard             Read the top scores. Query parameter: limit (default 10).
+        GET  /categories              List the categories and their number of questions. Query parameter:
+                                      question_type (default "mixed").
+        GET  /metrics                 The timers and counters of this process in the Prometheus text format,
+                                      if QUIZ_METRICS is set (see metrics.py).
+
+    Parameters:
+        score_manager (ScoreManager, optional): The score manager to save scores with. Defaults to high_scores.csv.
+        deck_loader (callable, optional): A function returning the QuestionDeck for a question type.
+            Defaults to QuestionDeck.load (the question pack named by QUIZ_QUESTION_PACK, or the question bank).
+        sessions (SessionStore, optional): The store for live games.
+        decks (dict, optional): Prebuilt decks by question type, e.g. shared by the prefork server workers.
+            Missing decks are loaded with deck_loader for every game.
+
+    Returns:
+        Flask: The application.
+    """
+    app = Flask(__name__)
+    score_manager = score_manager or ScoreManager("high_scores.csv")
+    sessions = sessions or SessionStore()
+    score_lock = threading.Lock()  # ScoreManager is not thread-safe
+    decks = dict(decks or {})
+    app.config["SESSIONS"] = sessions
+    app.config["SCORE_MANAGER"] = score_manager
+
+    def get_deck(question_type):
+        # Prebuilt decks are fixed; otherwise the loader is asked every time, so a deck that QuestionDeck.load
+        # rebuilt after the bank changed is used by the next game (games already running keep their deck)
+        deck = decks.get(question_type)
+        return deck if deck is not None else deck_loader(question_type)
+
+    def remember_asked(state):
+        bank = get_question_bank()
+        seen = bank.load_seen(state.player)
+        for question in game_engine.asked_questions(state):
+            seen.add(question.question)
+        bank.save_seen(state.player, seen)
+
+    @contextmanager
+    def checked_out_game(game_id):
+        # Requests on the same game run one at a time, from reading it to saving it
+        state = sessions.checkout(game_id)
+        if state is None:
+            raise _NotFound()
+        try:
+            yield state
+        finally:
+            sessions.checkin(game_id, state)
+
+    def json_body():
+        body = request.get_json(silent=True)
+        return {} if body is None else body
+
+    @app.errorhandler(game_engine.GameStateError)
+    @app.errorhandler(GameBusyError)
+    def game_state_error(error):
+        return _error(str(error), 409)
+
+    @app.errorhandler(_NotFound)
+    def not_found(error):
+        return _error("Game not found.", 404)
+
+    @app.post("/games")
+    def start_game():
+        body = json_body()
+        if not isinstance(body, dict):
+            return _error("The request body must be a JSON object.", 400)
+        question_type = body.get("question_type", "multiple")
+        if question_type not in ("multiple", "boolean", "mixed"):
+            return _error("question_type must be 'multiple', 'boolean' or 'mixed'.", 400)
+        player = body.get("player")
+        if player is not None and (not isinstance(player, str) or not player.strip()):
+            return _error("player must be a non-empty name.", 400)
+        category = body.get("category")
+        keywords = body.get("keywords", [])
+        if isinstance(keywords, str):
+            keywords = keywords.split()
+        if (category is not None and not isinstance(category, str)) or not isinstance(keywords, list) or \
+                not all(isinstance(keyword, str) for keyword in keywords):
+            return _error("category must be a string and keywords a list of words.", 400)
+        adaptive = body.get("adaptive", False)
+        if not isinstance(adaptive, bool):
+            return _error("adaptive must be true or false.", 400)
+        if adaptive and (category or keywords):
+            return _error("An adaptive game cannot have a theme.", 400)
+        seen = get_question_bank().load_seen(player.strip()) if player and not adaptive else None
+        state = game_engine.start(get_deck(question_type), player=player and player.strip(), seen=seen,
+                                  category=category, keywords=keywords, adaptive=adaptive)
+        if state.status != game_engine.PLAYING:
+            if category or keywords:
+                return _error("No questions match the theme.", 404)
+            return _error("No questions available.", 503)
+        game_id = sessions.create(state)
+        return jsonify({"game_id": game_id, "total_questions": state.total_questions}), 201
+
+    @app.get("/games/<game_id>/question")
+    def next_question(game_id):
+        with checked_out_game(game_id) as state:
+            turn = game_engine.next_question(state)
+            if state.shown_at is None:
+                state.shown_at = time.time()  # The answer time is measured from the first fetch of the question
+        return jsonify({
+            "number": turn.number,
+            "total_questions": turn.total,
+            "difficulty": turn.question.difficulty,
+            "category": turn.question.category,
+            "question": turn.question.question,
+            "answers": turn.answers,
+            "score": state.score,
+        })
+
+    @app.post("/games/<game_id>/answer")
+    def answer(game_id):
+        body = json_body()
+        choice = body.get("answer") if isinstance(body, dict) else None
+        if isinstance(choice, bool) or not isinstance(choice, int):
+            return _error("answer must be the number of the chosen answer.", 400)
+        with checked_out_game(game_id) as state:
+            try:
+                result = game_engine.answer(state, choice - 1)
+            except ValueError as e:
+                return _error(str(e), 400)
+        if result["game_over"] and state.player:
+            remember_asked(state)
+        if result["correct"]:
+            del result["correct_answer"]  # Only revealed after a wrong answer
+        del result["points"]
+        return jsonify(result)
+
+    @app.post("/games/<game_id>/finish")
+    def finish(game_id):
+        body = json_body()
+        name = str(body.get("name", "")).strip() if isinstance(body, dict) else ""
+        if not name:
+            return _error("name is required.", 400)
+        with checked_out_game(game_id) as state:
+            with score_lock:
+                saved = game_engine.finish(state, name, score_manager)
+            sessions.remove(game_id)
+        return jsonify(saved)
+
+    @app.get("/leaderboard")
+    def leaderboard():
+        limit = request.args.get("limit", default=10, type=int)
+        with score_lock:
+            entries = score_manager.get_top_scores(max(0, min(limit, 1000)))
+        return jsonify([dict(entry, rank=index) for index, entry in enumerate(entries, start=1)])
+
+    @app.get("/categories")
+    def categories():
+        question_type = request.args.get("question_type", "mixed")
+        if question_type not in ("multiple", "boolean", "mixed"):
+            return _error("question_type must be 'multiple', 'boolean' or 'mixed'.", 400)
+        return jsonify([{"category": name, "questions": count}
+                        for name, count in get_deck(question_type).index.categories()])
+
+    @app.get("/metrics")
+    def export_metrics():
+        if not metrics.enabled:
+            return _error("Metrics are off, start the server with QUIZ_METRICS=1.", 404)
+        return Response(metrics.registry.to_prometheus(), mimetype="text/plain; version=0.0.4")
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the quiz game over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of prefork worker processes sharing the question decks (see prefork.py)")
+    args = parser.parse_args()
+    if args.workers > 1:
+        from prefork import serve
+        serve(args.host, args.port, args.workers)
+    else:
+        answer_events.start_event_log()
+        try:
+            create_app().run(host=args.host, port=args.port, threaded=True)
+        finally:
+            answer_events.stop_event_log()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import argparse
+import json
+import random
+
+import game_engine
+from game_engine import QuestionDeck
+from question import POINTS
+
+
+class RandomStrategy:
+    """
+    Picks one of the answers at random.
+    """
+    name = "random"
+
+    def choose(self, question, answers, rng):
+        return rng.randrange(len(answers))
+
+
+class OracleStrategy:
+    """
+    Always picks the correct answer.
+    """
+    name = "oracle"
+
+    def choose(self, question, answers, rng):
+        return answers.index(question.correct_answer)
+
+
+class AccuracyStrategy:
+    def __init__(self, accuracy):
+        """
+        Initializes a bot that answers correctly with the given probability and picks a wrong answer otherwise.
+
+        Parameters:
+            accuracy (float): The probability of answering correctly, between 0 and 1.
+        """
+        self.accuracy = accuracy
+        self.name = f"accuracy-{accuracy:g}"
+
+    def choose(self, question, answers, rng):
+        correct = answers.index(question.correct_answer)
+        if rng.random() < self.accuracy or len(answers) == 1:
+            return correct
+        wrong = rng.randrange(len(answers) - 1)
+        return wrong if wrong < correct else wrong + 1
+
+
+def play_headless(deck, strategy, rng, points_table=None, record_answers=False, selection=None):
+    """
+    Plays one game on the game engine with the same rules as QuizGame.play, without any terminal I/O or pauses.
+
+    The strategy picks one of the shown answers for every question, a correct answer adds the question's points
+    to the score and the first wrong answer ends the game.
+
+    Parameters:
+        deck (QuestionDeck): The shared deck to draw the game from.
+        strategy: An object with a choose(question, answers, rng) method returning the index of the chosen answer.
+        rng (random.Random): The random number generator used for the game seed and by the strategy.
+        points_table (dict, optional): Points per difficulty, to try out another scoring table than question.POINTS.
+        record_answers (bool): Include a per-question record in the result.
+        selection (list, optional): Deck indices of the questions to ask, instead of a random draw.
+
+    Returns:
+        dict: The result of the game, with the keys 'score', 'answered', 'correct' and 'completed'
+            (plus 'answers' if record_answers is set).
+    """
+    state = game_engine.start(deck, seed=rng.getrandbits(64), selection=selection)
+    score = 0
+    correct_count = 0
+    answered_count = 0
+    answered = []
+    while state.status == game_engine.PLAYING:
+        turn = game_engine.next_question(state)
+        choice = strategy.choose(turn.question, turn.answers, rng)
+        result = game_engine.answer(state, choice)
+        answered_count += 1
+        if record_answers:
+            answered.append({"difficulty": turn.question.difficulty, "chosen": turn.answers[choice],
+                             "correct": result["correct"]})
+        if result["correct"]:
+            correct_count += 1
+            score += points_table[turn.question.difficulty] if points_table else result["points"]
+    result = {
+        "score": score,
+        "answered": answered_count,
+        "correct": correct_count,
+        "completed": correct_count == state.total_questions,
+    }
+    if record_answers:
+        result["answers"] = answered
+    return result
+
+
+def simulate(deck, strategy, games, seed=None, points_table=None):
+    """
+    Plays many headless games on a shared deck and aggregates their results.
+
+    Parameters:
+        deck (QuestionDeck): The deck every game is drawn from, e.g. QuestionDeck.from_bank("mixed").
+        strategy: The answer strategy used in every game.
+        games (int): The number of games to play.
+        seed (int, optional): The seed of the random number generator, for reproducible runs.
+        points_table (dict, optional): Points per difficulty to use instead of question.POINTS.
+
+    Returns:
+        dict: The number of games, the mean score, the completion rate and a histogram of final scores.
+    """
+    rng = random.Random(seed)
+    histogram = {}
+    total_score = 0
+    completed = 0
+    for _ in range(games):
+        result = play_headless(deck, strategy, rng, points_table)
+        total_score += result["score"]
+        completed += result["completed"]
+        histogram[result["score"]] = histogram.get(result["score"], 0) + 1
+    return {
+        "games": games,
+        "strategy": strategy.name,
+        "mean_score": total_score / games if games else 0.0,
+        "completion_rate": completed / games if games else 0.0,
+        "score_histogram": dict(sorted(histogram.items())),
+    }
+
+
+def make_strategy(name, accuracy=0.7):
+    """
+    Returns the strategy with the given name: "random", "oracle" or "accuracy".
+    """
+    if name == "random":
+        return RandomStrategy()
+    if name == "oracle":
+        return OracleStrategy()
+    if name == "accuracy":
+        return AccuracyStrategy(accuracy)
+    raise ValueError(f"Unknown strategy: {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run headless quiz games at machine speed.")
+    parser.add_argument("--games", type=int, default=10000, help="number of games to play")
+    parser.add_argument("--type", default="multiple", choices=["multiple", "boolean", "mixed"], help="question type")
+    parser.add_argument("--strategy", default="accuracy", choices=["random", "oracle", "accuracy"])
+    parser.add_argument("--accuracy", type=float, default=0.7, help="accuracy of the accuracy strategy")
+    parser.add_argument("--seed", type=int, default=None, help="random seed")
+    parser.add_argument("--points", default=None,
+                        help='scoring table as JSON, e.g. \'{"easy": 1, "medium": 3, "hard": 5}\'')
+    args = parser.parse_args()
+
+    points_table = json.loads(args.points) if args.points else None
+    results = simulate(QuestionDeck.from_bank(args.type), make_strategy(args.strategy, args.accuracy), args.games,
+                       seed=args.seed, points_table=points_table)
+    results["points_table"] = points_table or POINTS
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
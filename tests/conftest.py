@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import api  # noqa: E402
+import game_engine  # noqa: E402
+import question_bank  # noqa: E402
+
+
+def make_question(text, difficulty="easy", question_type="multiple", answer=None, category="General Knowledge"):
+    """
+    Returns a question dictionary in the Open Trivia Database format.
+    """
+    if question_type == "boolean":
+        return {"type": "boolean", "difficulty": difficulty, "category": category, "question": text,
+                "correct_answer": answer or "True", "incorrect_answers": ["False"]}
+    return {"type": "multiple", "difficulty": difficulty, "category": category, "question": text,
+            "correct_answer": answer or f"Answer to {text}", "incorrect_answers": ["Wrong 1", "Wrong 2", "Wrong 3"]}
+
+
+def distinct_text(i):
+    """
+    Returns the i-th of a series of question texts that are not near duplicates of each other.
+    """
+    return f"What is {hashlib.blake2b(str(i).encode(), digest_size=6).hexdigest()}?"
+
+
+def write_pool(directory, difficulty, question_type, questions):
+    """
+    Writes a pool file in the data directory of a workspace.
+    """
+    with open(os.path.join(directory, "data", f"{difficulty}_{question_type}_questions.json"), "w") as file:
+        json.dump(questions, file)
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """
+    Runs a test in an empty working directory with a data/ directory, its own question bank and pool cache, and
+    restores the module-level API settings afterwards.
+    """
+    (tmp_path / "data").mkdir()
+    monkeypatch.chdir(tmp_path)
+    for name in ("API_BASE_URL", "rate_limiter"):
+        monkeypatch.setattr(api, name, getattr(api, name))  # Restored after the test, even if it is replaced
+    question_bank._default_bank = None
+    api.pool_cache.invalidate()
+    game_engine._decks.clear()
+    yield tmp_path
+    if question_bank._default_bank is not None:
+        question_bank._default_bank.close()
+        question_bank._default_bank = None
+    api.pool_cache.invalidate()
+    game_engine._decks.clear()
+
+
+class FakeTriviaAPI(ThreadingHTTPServer):
+    def __init__(self, statuses=(), latency=0.0, retry_after=1):
+        """
+        Initializes a local stand-in for the Open Trivia Database API.
+
+        Every request is answered with the next status code of statuses (200 once they run out): 429 with a
+        Retry-After header, or 200 with 50 questions of the requested difficulty and type.
+
+        Parameters:
+            statuses (iterable): The status codes of the first responses.
+            latency (float): The number of seconds every response takes.
+            retry_after (float): The Retry-After value of 429 responses.
+        """
+        super().__init__(("127.0.0.1", 0), _FakeTriviaHandler)
+        self.statuses = list(statuses)
+        self.latency = latency
+        self.retry_after = retry_after
+        self.request_times = []
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/api.php"
+
+
+class _FakeTriviaHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.request_times.append(time.monotonic())
+            serial = len(server.request_times)
+            status = server.statuses.pop(0) if server.statuses else 200
+        time.sleep(server.latency)
+        if status == 200:
+            query = parse_qs(urlparse(self.path).query)
+            difficulty, question_type = query["difficulty"][0], query["type"][0]
+            results = [make_question(f"Fake question &quot;{serial}-{i}&quot;?", difficulty, question_type,
+                                     answer="True" if question_type == "boolean" else f"Answer {serial}-{i}")
+                       for i in range(50)]
+            body = json.dumps({"response_code": 0, "results": results}).encode()
+        else:
+            body = b"Too Many Requests"
+        self.send_response(status)
+        if status == 429:
+            self.send_header("Retry-After", str(server.retry_after))
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def fake_api():
+    """
+    Returns a factory of running FakeTriviaAPI servers, which are shut down after the test.
+    """
+    servers = []
+
+    def start(**kwargs):
+        server = FakeTriviaAPI(**kwargs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,19 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from answer_stats import AnswerStats  # noqa: E402
+
+
+def events(question, distractors, chosen):
+    return [{"question": question, "correct": choice < 0, "distractor": choice, "distractors": distractors,
+             "latency_ms": 2500} for choice in chosen]
+
+
+def test_multiple_choice_with_two_never_chosen_distractors_is_flagged():
+    stats = AnswerStats()
+    stats.add(events(1, 3, [0] * 40 + [-1] * 20))  # Every wrong answer is the first distractor
+    stats.add(events(2, 1, [0] * 40 + [-1] * 20))  # True/false: a single distractor
+    stats.add(events(3, 3, [0, 1, 2] * 15 + [-1] * 20))
+    flagged = {(question, reason) for question, reason, _, _ in stats.flagged(min_answers=30)}
+    assert flagged == {(1, "dead distractor")}
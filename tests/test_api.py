@@ -0,0 +1,153 @@
+import json
+import os
+import socket
+import threading
+import time
+
+import pytest
+
+import api
+from conftest import distinct_text, make_question, write_pool
+from question_bank import get_question_bank
+from rate_limiter import TokenBucket
+
+
+def test_429_backs_off_and_retries(workspace, fake_api):
+    server = fake_api(statuses=[429], retry_after=0.3)
+    api.rate_limiter = TokenBucket(rate=100, state_file="data/.api_rate_limit")
+    questions = api.fetch_questions_from_api(f"{server.url}?amount=50&difficulty=easy&type=multiple", wait=True)
+    assert len(questions) == 50
+    assert questions[0]["question"] == 'Fake question "2-0"?'  # Cleaned
+    assert len(server.request_times) == 2
+    assert server.request_times[1] - server.request_times[0] >= 0.25  # Waited for Retry-After
+
+
+def test_429_without_wait_gives_up_and_pauses_every_request(workspace, fake_api):
+    server = fake_api(statuses=[429], retry_after=30)
+    api.rate_limiter = TokenBucket(rate=100, state_file="data/.api_rate_limit")
+    url = f"{server.url}?amount=50&difficulty=easy&type=multiple"
+    start = time.perf_counter()
+    assert api.fetch_questions_from_api(url) == []
+    assert api.fetch_questions_from_api(url) == []  # Blocked by the backoff, not sent
+    assert time.perf_counter() - start < 1
+    assert len(server.request_times) == 1
+    # Another process sharing the limiter's state file is paused too
+    assert not TokenBucket(rate=100, state_file="data/.api_rate_limit").acquire(timeout=0)
+
+
+def test_buckets_are_loaded_concurrently(workspace, fake_api):
+    server = fake_api(latency=0.3)
+    api.API_BASE_URL = server.url
+    api.rate_limiter = TokenBucket(rate=100, capacity=10, state_file="data/.api_rate_limit")
+    start = time.perf_counter()
+    questions = api.get_random_questions("mixed")
+    elapsed = time.perf_counter() - start
+    assert len(server.request_times) == 6  # One per (difficulty, type)
+    assert [q["difficulty"] for q in questions] == ["easy"] * 5 + ["medium"] * 5 + ["hard"] * 5
+    assert {q["type"] for q in questions} <= {"multiple", "boolean"}
+    assert elapsed < 6 * 0.3  # About the slowest bucket, not the sum of all of them
+
+
+def test_back_to_back_games_do_not_touch_pool_files(workspace, monkeypatch):
+    for difficulty in ("easy", "medium", "hard"):
+        write_pool(workspace, difficulty, "multiple",
+                   [make_question(f"{difficulty} question {i}?", difficulty) for i in range(20)])
+    assert len(api.get_random_questions("multiple")) == 15
+
+    stat = os.stat
+    pool_stats = []
+
+    def counting_stat(path, *args, **kwargs):
+        if str(path).endswith("_questions.json"):
+            pool_stats.append(path)
+        return stat(path, *args, **kwargs)
+
+    monkeypatch.setattr(os, "stat", counting_stat)
+    for _ in range(3):
+        assert len(api.get_random_questions("multiple")) == 15
+    assert pool_stats == []
+
+
+def test_refill_appends_to_pool_and_bank(workspace):
+    write_pool(workspace, "easy", "multiple", [make_question(distinct_text(i)) for i in range(50)])
+    bank = get_question_bank()
+    before = {q["id"]: q["question"] for q in bank.iter_bucket("easy", "multiple")}
+
+    batch = [make_question(distinct_text(i)) for i in range(100, 110)] + [make_question(distinct_text(3))]
+    assert api.add_questions_to_pool("easy", "multiple", batch) == 10
+    pool = api.load_questions_from_file("data/easy_multiple_questions.json")
+    assert [q["question"] for q in pool[-10:]] == [distinct_text(i) for i in range(100, 110)]
+    assert len(pool) == 60
+    assert not bank.sync_bucket("easy", "multiple")  # File and bank are in step, nothing to re-import
+    after = {q["id"]: q["question"] for q in bank.iter_bucket("easy", "multiple")}
+    assert len(after) == 60
+    assert all(after[question_id] == text for question_id, text in before.items())  # Rows were kept
+
+
+def test_append_to_empty_array_and_jsonl(workspace):
+    with open("data/empty.json", "w") as file:
+        file.write("[ ]\n")
+    api.append_questions_to_file([make_question("A?")], "data/empty.json")
+    assert [q["question"] for q in api.load_questions_from_file("data/empty.json")] == ["A?"]
+
+    with open("data/pool.jsonl", "w") as file:
+        file.write(json.dumps(make_question("A?")))  # No final newline
+    api.append_questions_to_file([make_question("B?"), make_question("C?")], "data/pool.jsonl")
+    assert [q["question"] for q in api.load_questions_from_file("data/pool.jsonl")] == ["A?", "B?", "C?"]
+
+
+@pytest.mark.parametrize("content", ["not json", '[{"question": "A?"}'])
+def test_failed_append_leaves_no_temp_file(workspace, content):
+    with open("data/broken.json", "w") as file:
+        file.write(content)
+    with pytest.raises(json.JSONDecodeError):
+        api.append_questions_to_file([make_question("B?")], "data/broken.json")
+    assert os.listdir("data") == ["broken.json"]
+    assert open("data/broken.json").read() == content
+
+
+def test_game_fetch_does_not_join_a_waiting_refill(workspace, fake_api):
+    server = fake_api()
+    api.API_BASE_URL = server.url
+    api.rate_limiter = TokenBucket(rate=0.5, state_file="data/.api_rate_limit")
+    assert api.rate_limiter.acquire(timeout=0)  # The next token comes in two seconds
+    refill = threading.Thread(target=api.fetch_bucket, args=("easy", "multiple"), kwargs={"wait": True})
+    refill.start()
+    time.sleep(0.1)  # The refill is now waiting for the limiter
+    start = time.perf_counter()
+    assert api.fetch_bucket("easy", "multiple") == []  # Gives up instead of waiting with the refill
+    assert time.perf_counter() - start < 0.5
+    refill.join()
+    assert len(server.request_times) == 1
+
+
+def test_players_do_not_get_repeats(workspace):
+    for difficulty in ("easy", "medium", "hard"):
+        write_pool(workspace, difficulty, "multiple",
+                   [make_question(distinct_text(f"{difficulty}{i}"), difficulty) for i in range(20)])
+    first = {q["question"] for q in api.get_random_questions("multiple", player="Ann")}
+    second = {q["question"] for q in api.get_random_questions("multiple", player="Ann")}
+    assert len(first) == len(second) == 15
+    assert not first & second
+
+
+def test_hung_api_times_out_and_games_get_the_banked_questions(workspace, fake_api, monkeypatch):
+    server = fake_api(latency=2.0)
+    api.API_BASE_URL = server.url
+    api.rate_limiter = TokenBucket(rate=100, capacity=10, state_file="data/.api_rate_limit")
+    monkeypatch.setattr(api, "API_TIMEOUT", 0.2)
+    write_pool(workspace, "easy", "multiple", [make_question(distinct_text(i)) for i in range(3)])
+    start = time.perf_counter()
+    questions = api.get_random_questions("multiple")
+    assert time.perf_counter() - start < 1.5
+    assert len(questions) == 3  # Too few for a full stage, but better than none
+
+
+def test_unreachable_api_falls_back_to_the_bank(workspace, monkeypatch):
+    with socket.socket() as unused:
+        unused.bind(("127.0.0.1", 0))
+        port = unused.getsockname()[1]
+    api.API_BASE_URL = f"http://127.0.0.1:{port}/api.php"  # Nothing listens there
+    api.rate_limiter = TokenBucket(rate=100, capacity=10, state_file="data/.api_rate_limit")
+    write_pool(workspace, "easy", "multiple", [make_question(distinct_text(i)) for i in range(3)])
+    assert len(api.get_random_questions("multiple")) == 3
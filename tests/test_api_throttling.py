@@ -0,0 +1,16 @@
+import pytest
+
+from benchmarks import bench_api_throttling
+
+
+@pytest.mark.parametrize("scenario", [
+    bench_api_throttling.coalesced_misses,
+    bench_api_throttling.stale_when_throttled,
+    bench_api_throttling.games_during_refill,
+])
+def test_scenario(workspace, scenario):
+    scenario()
+
+
+def test_shared_across_processes(workspace):
+    bench_api_throttling.shared_across_processes(processes=3, seconds=2.0)
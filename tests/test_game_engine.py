@@ -0,0 +1,26 @@
+from conftest import distinct_text, make_question, write_pool
+from game_engine import QuestionDeck
+from question_bank import get_question_bank
+
+
+def test_load_reuses_the_deck_until_the_bank_changes(workspace):
+    write_pool(workspace, "easy", "multiple", [make_question(distinct_text(i)) for i in range(10)])
+    deck = QuestionDeck.load("mixed")
+    assert len(deck.questions) == 10
+    assert QuestionDeck.load("mixed") is deck
+    assert QuestionDeck.load("multiple") is not deck
+
+    get_question_bank().add_questions("easy", "multiple", [make_question(distinct_text(10))])
+    reloaded = QuestionDeck.load("mixed")
+    assert reloaded is not deck
+    assert len(reloaded.questions) == 11
+    assert QuestionDeck.load("mixed") is reloaded
+
+
+def test_revision_changes_with_commits_of_other_connections(workspace):
+    bank = get_question_bank()
+    revision = bank.revision()
+    other = type(bank)()
+    other.add_questions("hard", "boolean", [make_question(distinct_text(1), "hard", "boolean")])
+    other.close()
+    assert bank.revision() != revision
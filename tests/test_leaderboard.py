@@ -0,0 +1,40 @@
+import time
+
+from leaderboard import Leaderboard
+
+
+def make_leaderboard(scores):
+    leaderboard = Leaderboard()
+    for name, score in scores:
+        leaderboard.update(name, score, "2024-01-01")
+    return leaderboard
+
+
+def test_rank_percentile_and_top():
+    leaderboard = make_leaderboard([("Ann", 10), ("Bob", 30), ("Cid", 20), ("Dee", 20), ("Eve", 5)])
+    assert [entry["name"] for entry in leaderboard.top(3)] == ["Bob", "Cid", "Dee"]
+    assert leaderboard.top(10)[-1]["name"] == "Eve"
+    assert [leaderboard.rank(name) for name in ("Bob", "Cid", "Dee", "Ann", "Eve")] == [1, 2, 2, 4, 5]
+    assert leaderboard.rank("Nobody") is None
+    assert leaderboard.percentile(20) == 40.0
+    assert leaderboard.percentile(31) == 100.0
+    assert leaderboard.percentile(0) == 0.0
+    assert Leaderboard().percentile(10) == 100.0
+
+
+def test_improved_scores_move_players_up():
+    leaderboard = make_leaderboard([("Ann", 10), ("Bob", 30)])
+    assert not leaderboard.update("Bob", 25, "2024-01-02")  # Only the best score counts
+    assert leaderboard.update("Ann", 40, "2024-01-02")
+    assert leaderboard.rank("Ann") == 1
+    assert leaderboard.rank("Bob") == 2
+    assert leaderboard.percentile(30) == 0.0
+    assert leaderboard.percentile(35) == 50.0
+
+
+def test_huge_and_negative_scores_cost_nothing_extra():
+    start = time.perf_counter()
+    leaderboard = make_leaderboard([("Ann", 10**12), ("Bob", -5), ("Cid", 50_000_000), ("Dee", 3)])
+    assert [leaderboard.rank(name) for name in ("Ann", "Cid", "Dee", "Bob")] == [1, 2, 3, 4]
+    assert leaderboard.percentile(10**9) == 75.0
+    assert time.perf_counter() - start < 0.05
@@ -0,0 +1,34 @@
+import multiprocessing
+import threading
+
+import game_engine
+from conftest import distinct_text, make_question
+from game_engine import QuestionDeck
+from prefork import OwnerManager, SharedSessionStore
+from question import Question
+
+
+def test_workers_do_not_lose_updates_of_a_shared_game(workspace):
+    deck = QuestionDeck.from_questions([Question.from_dict(make_question(distinct_text(i))) for i in range(10)])
+    manager = OwnerManager(ctx=multiprocessing.get_context("fork"))
+    manager.start()
+    try:
+        # Two workers' views of the same owner, as after the fork
+        workers = [SharedSessionStore(manager.sessions(1800, 1000), {"multiple": deck}) for _ in range(2)]
+        game_id = workers[0].create(game_engine.start(deck, seed=1))
+
+        def score(sessions):
+            for _ in range(100):
+                state = sessions.checkout(game_id)
+                state.score += 1
+                sessions.checkin(game_id, state)
+
+        threads = [threading.Thread(target=score, args=(sessions,)) for sessions in workers for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        state = workers[1].checkout(game_id)
+        assert state.score == 400
+    finally:
+        manager.shutdown()
@@ -0,0 +1,29 @@
+import question
+from conftest import distinct_text, make_question, write_pool
+from question import questions_from_dicts
+from question_bank import QuestionBank
+
+
+def test_cache_survives_reused_row_ids(workspace):
+    question._question_cache.clear()
+    bank = QuestionBank()
+    write_pool(workspace, "easy", "multiple", [make_question(distinct_text(i), "easy") for i in range(10)])
+    write_pool(workspace, "hard", "boolean",
+               [make_question(distinct_text(i), "hard", "boolean") for i in range(100, 140)])
+    bank.sync_from_files()
+    # Cache every hard/boolean question under its current row
+    questions_from_dicts(list(bank.iter_bucket("hard", "boolean")))
+
+    # Shrink the bucket with the highest ids and grow another: SQLite reuses the freed ids
+    write_pool(workspace, "hard", "boolean",
+               [make_question(distinct_text(i), "hard", "boolean") for i in range(100, 105)])
+    bank.sync_bucket("hard", "boolean")
+    write_pool(workspace, "easy", "multiple", [make_question(distinct_text(i), "easy") for i in range(40)])
+    bank.sync_bucket("easy", "multiple")
+
+    drawn = bank.sample("easy", "multiple", 25)
+    questions = questions_from_dicts(drawn)
+    assert [(q.difficulty, q.type, q.question) for q in questions] == \
+        [("easy", "multiple", data["question"]) for data in drawn]
+    assert questions_from_dicts(drawn)[0] is questions[0]  # Still built once
+    bank.close()
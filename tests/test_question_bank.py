@@ -0,0 +1,78 @@
+from conftest import make_question, write_pool
+from dedup_index import legacy_text_hash, text_hash
+from question_bank import QuestionBank
+
+
+def test_malformed_pool_keeps_bucket(workspace):
+    bank = QuestionBank()
+    write_pool(workspace, "easy", "multiple", [make_question(f"Question {i}?") for i in range(50)])
+    assert bank.sync_bucket("easy", "multiple")
+
+    broken = [make_question(f"New question {i}?") for i in range(10)]
+    del broken[5]["correct_answer"]
+    write_pool(workspace, "easy", "multiple", broken)
+    assert not bank.sync_bucket("easy", "multiple")
+    assert bank.count("easy", "multiple") == 50
+
+    # An unrelated commit must not commit a half-done import
+    bank.save_seen("ava", bank.load_seen("ava"))
+    bank.close()
+    reopened = QuestionBank()
+    assert reopened.count("easy", "multiple") == 50
+    assert len(list(reopened.iter_bucket("easy", "multiple"))) == 50
+    reopened.close()
+
+
+NEAR_MISSES = [
+    ("In which year did WWI end in Europe and the Pacific?", "1918",
+     "In which year did WWII end in Europe and the Pacific?", "1945"),
+    ("What is the result of the multiplication 7 x 8 in decimal?", "56",
+     "What is the result of the multiplication 7 x 9 in decimal?", "63"),
+]
+
+
+def test_near_misses_with_other_answers_are_not_duplicates(workspace):
+    bank = QuestionBank()
+    first = [make_question(text, answer=answer) for text, answer, _, _ in NEAR_MISSES]
+    second = [make_question(text, answer=answer) for _, _, text, answer in NEAR_MISSES]
+    # Within one batch
+    assert bank.find_duplicates(first + second) == [None] * 4
+    # Against the bank
+    bank.add_questions("easy", "multiple", first)
+    assert bank.find_duplicates(second) == [None, None]
+
+
+def test_reworded_question_with_the_same_answer_is_a_duplicate(workspace):
+    bank = QuestionBank()
+    original = make_question("In which year did WWI end in Europe and the Pacific?", answer="1918")
+    reworded = make_question("In which year did WWI end, in Europe and the Pacific??", answer=" 1918.")
+    bank.add_questions("easy", "multiple", [original])
+    assert bank.find_duplicates([reworded]) == [original["question"]]
+    other = make_question("In which year did WWI end in Europe and in the Pacific?", answer="1918")
+    assert bank.find_duplicates([other]) == [original["question"]]
+
+
+def test_operator_only_differences_are_not_exact_duplicates(workspace):
+    bank = QuestionBank()
+    bank.add_questions("easy", "multiple", [make_question("What is 10 + 5?", answer="15")])
+    batch = [make_question("What is 10 - 5?", answer="5"), make_question("What is 10 * 5?", answer="50"),
+             make_question("What is 10 + 5 ?", answer="15")]
+    assert bank.find_duplicates(batch) == [None, None, "What is 10 + 5?"]
+
+
+def test_old_banks_are_rehashed_with_their_ratings(workspace):
+    bank = QuestionBank()
+    bank.add_questions("easy", "multiple", [make_question("What is 10 + 5?", answer="15")])
+    new_hash = text_hash("What is 10 + 5?", "15")
+    # Turn it into a bank from before text hashes covered the answer
+    old_hash = legacy_text_hash("What is 10 + 5?")
+    bank._conn.execute("UPDATE questions SET text_hash = ?", (old_hash,))
+    bank._conn.execute("INSERT INTO question_ratings VALUES (?, 1300.0, 7)", (old_hash,))
+    bank._conn.execute("PRAGMA user_version = 0")
+    bank._conn.commit()
+    bank.close()
+
+    bank = QuestionBank()
+    assert bank.load_question_ratings() == {new_hash: (1300.0, 7)}
+    assert bank.get_by_text_hash(new_hash)["question"] == "What is 10 + 5?"
+    assert bank.find_duplicates([make_question("What is 10 - 5?", answer="5")]) == [None]
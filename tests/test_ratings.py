@@ -0,0 +1,28 @@
+import pytest
+
+from conftest import distinct_text, make_question
+from dedup_index import text_hash
+from question import Question
+from question_bank import QuestionBank
+from ratings import INITIAL_RATINGS, RatingTable
+
+
+def test_tables_of_two_processes_add_up_their_updates(workspace):
+    bank = QuestionBank()
+    questions = [Question.from_dict(make_question(distinct_text(i))) for i in range(3)]
+    # Two workers load the same stored ratings, then each updates and saves its own copy
+    workers = [RatingTable(questions, bank=bank) for _ in range(2)]
+    changes = []
+    for table, correct in zip(workers, (True, False)):
+        for _ in range(3):
+            table.update(0, 1400.0, correct)
+        changes.append(table.rating(0) - INITIAL_RATINGS["easy"])
+        table.save()
+
+    rating, answers = bank.load_question_ratings()[text_hash(questions[0].question, questions[0].correct_answer)]
+    assert answers == 6
+    assert rating == pytest.approx(INITIAL_RATINGS["easy"] + sum(changes))
+    # Saving again without new answers changes nothing
+    workers[0].save()
+    assert bank.load_question_ratings()[text_hash(questions[0].question, questions[0].correct_answer)] == (rating, answers)
+    assert RatingTable(questions, bank=bank).rating(0) == pytest.approx(rating)
@@ -0,0 +1,62 @@
+import pytest
+
+from score_journal import ScoreJournal
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = ScoreJournal(str(tmp_path / "high_scores.csv"), flush_interval=0.01)
+    yield journal
+    journal.close()
+
+
+def test_replay_reads_snapshot_then_journal_and_skips_a_torn_row(journal):
+    with open(journal.snapshot_file, "w") as file:
+        file.write("Ann,5,2024-01-01\nbroken row\n")
+    with open(journal.journal_file, "w") as file:
+        file.write("Bob,7,2024-01-02\nCid,not a number,2024-01-03\nDee,9,2024-0")  # Crashed mid-write
+    assert [(row["name"], row["score"]) for row in journal.replay()] == [("Ann", 5), ("Bob", 7)]
+
+    # The next commit starts on a new line instead of merging with the torn row
+    journal.append("Eve", 3, "2024-01-04")
+    journal.flush()
+    assert [row["name"] for row in journal.replay()] == ["Ann", "Bob", "Eve"]
+
+
+def test_compaction_keeps_each_players_best_score(journal):
+    for name, score in [("Ann", 5), ("Bob", 7), ("Ann", 8), ("Bob", 2)]:
+        journal.append(name, score, "2024-01-01")
+    journal.flush()
+    journal.compact()
+    assert open(journal.journal_file).read() == ""
+    assert sorted((row["name"], row["score"]) for row in journal.replay()) == [("Ann", 8), ("Bob", 7)]
+
+
+def test_compaction_starts_at_the_threshold(tmp_path):
+    journal = ScoreJournal(str(tmp_path / "high_scores.csv"), flush_interval=0.01, compact_threshold=3)
+    for score in range(3):
+        journal.append(f"Player {score}", score, "2024-01-01")
+    journal.close()
+    assert open(journal.journal_file).read() == ""
+    assert len(ScoreJournal(journal.snapshot_file).replay()) == 3
+
+
+def test_failed_writes_stay_pending_and_flush_raises(journal, monkeypatch):
+    commit = journal._commit
+    failing = True
+
+    def flaky_commit(batch):
+        if failing:
+            raise OSError("disk full")
+        commit(batch)
+
+    monkeypatch.setattr(journal, "_commit", flaky_commit)
+    journal.append("Ann", 5, "2024-01-01")
+    with pytest.raises(OSError, match="disk full"):
+        journal.flush()
+    assert journal.replay() == []
+
+    failing = False
+    journal.append("Bob", 7, "2024-01-02")
+    journal.flush()
+    assert [row["name"] for row in journal.replay()] == ["Ann", "Bob"]
@@ -0,0 +1,64 @@
+import threading
+
+import pytest
+
+from conftest import distinct_text, make_question
+from game_engine import QuestionDeck
+from question import Question
+from score_manager import ScoreManager
+from server import GameBusyError, SessionStore, create_app
+
+
+@pytest.fixture
+def client(workspace):
+    questions = [Question.from_dict(make_question(distinct_text(i))) for i in range(10)]
+    deck = QuestionDeck.from_questions(questions)
+    app = create_app(ScoreManager(str(workspace / "high_scores.csv")), deck_loader=lambda question_type: deck)
+    return app.test_client()
+
+
+def start(client):
+    response = client.post("/games", json={"question_type": "multiple"})
+    assert response.status_code == 201
+    return response.get_json()["game_id"]
+
+
+@pytest.mark.parametrize("body", [[1, 2], "multiple", {"keywords": 5}, {"keywords": None}, {"keywords": [1]}])
+def test_start_game_rejects_bad_bodies(client, body):
+    assert client.post("/games", json=body).status_code == 400
+
+
+def test_answer_rejects_booleans(client):
+    game_id = start(client)
+    client.get(f"/games/{game_id}/question")
+    assert client.post(f"/games/{game_id}/answer", json={"answer": True}).status_code == 400
+    assert client.post(f"/games/{game_id}/answer", json=[1]).status_code == 400
+    assert client.post(f"/games/{game_id}/answer", json={"answer": 1}).status_code == 200
+
+
+def test_checkout_serializes_updates_of_a_game():
+    store = SessionStore()
+    game_id = store.create(0)
+
+    def increment():
+        for _ in range(200):
+            count = store.checkout(game_id)
+            store.checkin(game_id, count + 1)
+
+    threads = [threading.Thread(target=increment) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert store.checkout(game_id) == 800
+
+
+def test_checkout_times_out_while_the_game_is_busy():
+    store = SessionStore()
+    game_id = store.create("state")
+    assert store.checkout(game_id) == "state"
+    with pytest.raises(GameBusyError):
+        store.checkout(game_id, timeout=0.05)
+    store.checkin(game_id, "changed")
+    assert store.checkout(game_id, timeout=0.05) == "changed"
+    assert store.checkout("missing") is None
@@ -0,0 +1,88 @@
+import html
+import re
+from functools import lru_cache
+
+# Matches a run of whitespace (including non-breaking space entities) or an HTML entity (named, decimal or
+# hexadecimal), so both are handled in one pass
+_TOKEN_PATTERN = re.compile(
+    r"(?:\s|&nbsp;|&#160;|&#[xX][aA]0;)+|&(?:#[0-9]+|#[xX][0-9a-fA-F]+|[A-Za-z][A-Za-z0-9]*);"
+)
+
+# Text fields of a question that are shown to the player
+_TEXT_FIELDS = ("question", "correct_answer", "category")
+
+
+@lru_cache(maxsize=1024)
+def _decode_entity(entity):
+    """
+    Decodes a single HTML entity, e.g. '&quot;' to '"'. Unknown entities are kept as they are.
+    """
+    decoded = html.unescape(entity)
+    # Non-breaking and other unicode spaces collapse like regular whitespace
+    return " " if decoded.isspace() else decoded
+
+
+def _replace_token(match):
+    token = match.group()
+    if token[0] == "&" and token[-1] == ";" and token.count(";") == 1:
+        return _decode_entity(token)
+    return " "
+
+
+@lru_cache(maxsize=65536)
+def normalize_text(text):
+    """
+    Normalizes a piece of text from the trivia API.
+
+    HTML entities are decoded (so '&quot;' becomes '"' instead of disappearing), runs of whitespace are collapsed
+    into a single space, and leading and trailing whitespace is stripped. Punctuation is kept. Everything happens
+    in a single regex pass, and results are cached, so repeated answers such as 'True' and 'False' cost a dict lookup.
+
+    Parameters:
+        text (str): The text to normalize.
+
+    Returns:
+        str: The normalized text.
+
+    Example:
+        >>> normalize_text("Hello, &quot;world&quot;!  This is a test #123.")
+        'Hello, "world"! This is a test #123.'
+    """
+    if "&" not in text:
+        # No entities to decode: str.split collapses every kind of whitespace at C speed
+        return " ".join(text.split())
+    return _TOKEN_PATTERN.sub(_replace_token, text).strip()
+
+
+def normalize_question(question):
+    """
+    Normalizes the question, answer and category fields of a question dictionary in place.
+
+    Parameters:
+        question (dict): A question in the Open Trivia Database format.
+
+    Returns:
+        dict: The same dictionary, normalized.
+    """
+    for field in _TEXT_FIELDS:
+        value = question.get(field)
+        if value is not None:
+            question[field] = normalize_text(value)
+    if "incorrect_answers" in question:
+        question["incorrect_answers"] = [normalize_text(answer) for answer in question["incorrect_answers"]]
+    return question
+
+
+def normalize_questions(questions):
+    """
+    Normalizes a whole batch of question dictionaries in place.
+
+    Parameters:
+        questions (list): Questions in the Open Trivia Database format.
+
+    Returns:
+        list: The same list, with every question normalized.
+    """
+    for question in questions:
+        normalize_question(question)
+    return questions
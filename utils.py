@@ -3,14 +3,14 @@ import os
 import sys
 import tty
 import termios
+from renderer import get_renderer
 
 def clear_screen():
     """
     Clears the terminal screen.
 
-    This function checks the operating system and clears the screen accordingly.
-    On Windows, it uses the 'cls' command, while on Unix-based systems (Linux, macOS),
-    it uses the 'clear' command.
+    This function writes the ANSI clear-screen escape sequence through the shared renderer (see renderer.py)
+    instead of starting a 'clear' or 'cls' subprocess. Older Windows consoles without ANSI support still use 'cls'.
 
     Parameters:
         None
@@ -18,10 +18,7 @@ def clear_screen():
     Returns:
         None
     """
-    if os.name == 'nt':  # For Windows
-        os.system('cls')
-    else:  # For Unix-based systems (Linux, macOS)
-        os.system('clear')
+    get_renderer().clear()
 
 def getch():
     """